@@ -5,9 +5,29 @@ import plotly.express as px
 import time
 from streamlit_lottie import st_lottie
 import json
-import requests
+import os
+import tempfile
 from datetime import datetime
-import pytz
+from mantenimiento.analisis import analizar_irregularidades_rpm
+from mantenimiento.alertas import DespachadorTelegram, construir_mensaje
+from mantenimiento.configuracion import (FRECUENCIA_SERIAL, PUERTO_METRICAS, RUTA_ALERTAS, RUTA_ALMACEN, RUTA_MODELO,
+                                         TELEGRAM_CHAT_ID, TELEGRAM_TOKEN)
+from mantenimiento.reloj import ZONA_HORARIA, obtener_fecha_hora_mty
+from mantenimiento import fuentes
+from mantenimiento.fuentes import ticks_flota, ticks_ingesta, ticks_sinteticos
+from mantenimiento.monitoreo import CRITICO, ADVERTENCIA, monitorear
+from mantenimiento.sesion import SesionMonitoreo
+from mantenimiento.ingesta import FuenteSerial, Ingesta
+from mantenimiento.graficos import GraficoEnVivo
+from mantenimiento.almacen import AlmacenTelemetria
+from mantenimiento import resumenes
+from mantenimiento.flota import MonitorFlota, monitorear_flota
+from mantenimiento.modelo import ModeloAnomalias, entrenar_desde_almacen, puntuar_almacen
+from mantenimiento.registros import analizar_registro
+from mantenimiento.reglas import error_reglas, motor_reglas
+from mantenimiento.supresion import SupresorAlertas
+from mantenimiento import instrumentacion
+from mantenimiento.instrumentacion import instrumentar, medir
 
 # Configuración de la página
 st.set_page_config(
@@ -16,123 +36,23 @@ st.set_page_config(
     page_icon="🔧"
 )
 
-# ---- Configuración de Telegram ----
-TELEGRAM_TOKEN = "7991651835:AAE6ZPekhcddQs8yBc6Q0HzwBWaymfE-23c"
-TELEGRAM_CHAT_ID = "6583159864"
+# La lógica de detección, alertas y fuentes vive en el paquete `mantenimiento`
+# (también se puede correr sin interfaz con `python -m mantenimiento`)
 
-# ---- Zona horaria de Monterrey, México ----
-ZONA_HORARIA = pytz.timezone('America/Monterrey')
-
-def obtener_fecha_hora_mty():
-    """Obtiene la fecha y hora actual de Monterrey, México"""
-    ahora = datetime.now(ZONA_HORARIA)
-    return ahora.strftime("%Y-%m-%d %H:%M:%S"), ahora.strftime("%A, %d de %B de %Y"), ahora.strftime("%H:%M:%S")
-
-def analizar_irregularidades_rpm(datos_rpm):
-    """Analiza irregularidades en las RPM y sugiere fallos probables"""
-    irregularidades = []
-    fallos_probables = []
-    
-    # Calcular estadísticas
-    media_rpm = np.mean(datos_rpm)
-    std_rpm = np.std(datos_rpm)
-    variacion = (std_rpm / media_rpm) * 100  # Variación porcentual
-    
-    # Detectar irregularidades
-    if variacion > 15:
-        irregularidades.append(f"Alta variación en RPM ({variacion:.1f}%)")
-        fallos_probables.extend(["Bujías desgastadas", "Problema de encendido", "Filtro de aire obstruido"])
-    
-    if any(rpm < 1000 for rpm in datos_rpm[-3:]):  # Últimas 3 mediciones
-        irregularidades.append("RPM muy bajas (<1000)")
-        fallos_probables.extend(["Fallo de sensores", "Problema de combustible", "Filtro obstruido"])
-    
-    if any(rpm > 5700 for rpm in datos_rpm[-3:]):  # Cambiado a 5700 RPM
-        irregularidades.append("RPM muy altas (>5700)")
-        fallos_probables.extend(["Fallo del acelerador", "Problema de transmisión", "Sobrecarga del motor"])
-    
-    # Detectar patrones irregulares
-    if len(datos_rpm) > 5:
-        ultimas_rpm = datos_rpm[-5:]
-        diferencias = np.diff(ultimas_rpm)
-        if np.std(diferencias) > 150:
-            irregularidades.append("Patrón irregular en RPM")
-            fallos_probables.extend(["Bujías defectuosas", "Bobinas de encendido", "Sensores dañados"])
-    
-    # Eliminar duplicados
-    fallos_probables = list(set(fallos_probables))
-    
-    return irregularidades, fallos_probables
-
-def predecir_fallo(temp_actual, rpm_actual, historial_rpm):
-    """Predice el fallo más probable basado en los datos actuales"""
-    irregularidades, fallos_probables = analizar_irregularidades_rpm(historial_rpm)
-    
-    # Basado en temperatura (cambiado a 40°C)
-    if temp_actual > 40:
-        fallos_probables.append("Fallo de refrigeración")
-    if temp_actual > 50:
-        fallos_probables.append("Sobrecarga del motor")
-    
-    # Basado en RPM (cambiado a 5700 RPM)
-    if rpm_actual < 700:
-        fallos_probables.append("Problema de combustible")
-    if rpm_actual > 5700:
-        fallos_probables.append("Fallo del acelerador")
-    
-    # Eliminar duplicados y priorizar
-    fallos_probables = list(set(fallos_probables))
-    
-    # Priorizar fallos basados en severidad
-    if "Sobrecarga del motor" in fallos_probables:
-        fallo_principal = "Sobrecarga del motor"
-    elif "Fallo de refrigeración" in fallos_probables:
-        fallo_principal = "Fallo de refrigeración"
-    elif "Bujías desgastadas" in fallos_probables:
-        fallo_principal = "Bujías desgastadas"
-    elif fallos_probables:
-        fallo_principal = fallos_probables[0]
-    else:
-        fallo_principal = "Sin fallos detectados"
-    
-    return irregularidades, fallos_probables, fallo_principal
+@st.cache_resource
+def obtener_despachador():
+    """Despachador de Telegram compartido por todas las sesiones del servidor"""
+    return DespachadorTelegram(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
 
 def enviar_alerta_telegram(mensaje, irregularidades=None, fallo_probable=None):
-    """Envía un mensaje de alerta a Telegram con análisis de fallos"""
+    """Encola un mensaje de alerta a Telegram con análisis de fallos (no bloquea)"""
     fecha_completa, fecha_formateada, hora_actual = obtener_fecha_hora_mty()
+    mensaje_completo = construir_mensaje(mensaje, fecha_formateada, hora_actual, irregularidades, fallo_probable)
     
-    # Construir mensaje completo
-    mensaje_completo = f"🕒 {fecha_formateada}\n⏰ Hora: {hora_actual}\n\n{mensaje}"
-    
-    # Añadir análisis de irregularidades si existe
-    if irregularidades:
-        mensaje_completo += f"\n\n🔍 **Irregularidades detectadas:**"
-        for irregularidad in irregularidades:
-            mensaje_completo += f"\n• {irregularidad}"
-    
-    # Añadir fallo probable si existe
-    if fallo_probable and fallo_probable != "Sin fallos detectados":
-        mensaje_completo += f"\n\n⚠️ **Fallo más probable:** {fallo_probable}"
-    
-    # Añadir recomendación
-    if irregularidades or (fallo_probable and fallo_probable != "Sin fallos detectados"):
-        mensaje_completo += f"\n\n🔧 **Recomendación:** Verificar sistema inmediatamente"
-    
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": mensaje_completo,
-        "parse_mode": "Markdown"
-    }
-    
-    try:
-        response = requests.post(url, json=payload)
-        if response.status_code != 200:
-            st.error(f"Error al enviar mensaje a Telegram: {response.text}")
-        else:
-            st.success("✅ Alerta enviada a Telegram")
-    except Exception as e:
-        st.error(f"Error de conexión: {e}")
+    if obtener_despachador().enviar(mensaje_completo):
+        st.success("✅ Alerta encolada para Telegram")
+    else:
+        st.error("Cola de alertas llena: alerta descartada")
 
 # ---- Carga de animación Lottie (opcional) ----
 def load_lottie(filepath: str):
@@ -143,22 +63,100 @@ def load_lottie(filepath: str):
         return None
 
 # ---- Datos sintéticos en tiempo real ----
-@st.cache_data
-def generar_datos_sinteticos():
-    np.random.seed(42)
-    horas = np.arange(0, 24)
-    # Datos más realistas con posibles irregularidades
-    rpm = np.random.normal(3000, 500, 24)  # Aumentada la desviación estándar para mayor variación
-    # Añadir algunas irregularidades
-    rpm[5:8] += np.random.normal(1000, 200, 3)  # Pico de RPM más alto
-    rpm[15:18] -= np.random.normal(800, 150, 3)  # Caída de RPM más pronunciada
-    
-    datos = pd.DataFrame({
-        "Hora": horas,
-        "RPM": rpm,
-        "Temperatura (°C)": np.random.normal(35, 10, 24)  # Temperaturas más bajas para ajustar a 40°C
-    })
-    return datos
+generar_datos_sinteticos = st.cache_data(fuentes.generar_datos_sinteticos)
+
+# ---- Ingesta desde puerto serial ----
+@st.cache_resource
+def obtener_almacen():
+    """Almacén columnar de telemetría en disco (ruta configurable con MIA_ALMACEN)"""
+    return AlmacenTelemetria(RUTA_ALMACEN)
+
+@st.cache_resource
+def obtener_ingesta(puerto, baudios):
+    """Hilo de ingesta compartido por puerto; el muestreo no depende del refresco de la interfaz"""
+    return Ingesta(FuenteSerial(puerto, baudios), almacen=obtener_almacen())
+
+# ---- Detector de anomalías aprendido ----
+@st.cache_resource
+def obtener_modelo():
+    """Modelo entrenado con el histórico (se recarga al iniciar; None si aún no existe)"""
+    try:
+        return ModeloAnomalias.cargar(RUTA_MODELO)
+    except FileNotFoundError:
+        return None
+
+@st.cache_data(max_entries=16, show_spinner="Puntuando las ventanas del rango...")
+def puntuar_rango(t_inicio, t_fin, vehiculo, paso, version_modelo):
+    """Resumen del puntaje por lotes de un rango; solo se recalcula al cambiar el rango o el modelo
+    (`version_modelo` es la fecha de modificación del archivo del modelo)"""
+    tiempos, ids, puntajes = puntuar_almacen(obtener_modelo(), obtener_almacen(), t_inicio, t_fin, vehiculo, paso)
+    peores = np.argsort(puntajes)[::-1][:10]
+    return len(puntajes), int((puntajes > 1).sum()), tiempos[peores], ids[peores], puntajes[peores]
+
+# ---- Estado de las alertas (deduplicación y escalamiento) ----
+@st.cache_resource
+def obtener_supresor():
+    """Estado de las alertas de la telemetría real, persistido en MIA_ALERTAS"""
+    return SupresorAlertas(RUTA_ALERTAS)
+
+# ---- Métricas de rendimiento en formato Prometheus ----
+@st.cache_resource
+def obtener_servidor_metricas():
+    """Servidor local de /metrics compartido por las sesiones (None si MIA_METRICAS_PUERTO no está definido)"""
+    return instrumentacion.servir_metricas(PUERTO_METRICAS) if PUERTO_METRICAS else None
+
+# ---- Sesión de monitoreo en segundo plano ----
+INTERVALO_REFRESCO = 0.1  # Segundos entre lecturas de la vista (latencia de muestra a pantalla < 200 ms)
+INTERVALO_SIMULACION = 0.5  # Velocidad de actualización de las fuentes sintéticas
+N_TICKS_FLOTA = 24
+
+def crear_sesion(fuente_datos, umbrales):
+    """Arranca el monitoreo de la fuente en un hilo que sobrevive a las recargas del script"""
+    serial = fuente_datos == "Puerto serial"
+    sesion = SesionMonitoreo(umbrales, obtener_despachador(), intervalo=0.0 if serial else INTERVALO_SIMULACION,
+                             tiempos_de_ingesta=serial)
+    if fuente_datos == "Flota sintética":
+        # Cada trabajador conserva el estado de sus vehículos; los procesos se liberan al terminar
+        monitor = MonitorFlota(modo="procesos")
+        monitor.umbrales = sesion.umbrales
+        sesion.iniciar(monitorear_flota(monitor, ticks_flota(n_vehiculos, N_TICKS_FLOTA), sesion.enviar_alerta,
+                                        sesion.notificando),
+                       al_cerrar=monitor.cerrar)
+    elif fuente_datos == "Puerto serial":
+        ingesta = obtener_ingesta(puerto_serial, baudios)
+        # La línea base aprendida solo aplica a la telemetría real con la que se entrenó
+        sesion.iniciar(monitorear(ticks_ingesta(ingesta), sesion.umbrales, sesion.enviar_alerta,
+                                  ingesta.vehiculo, modelo=obtener_modelo(), supresor=obtener_supresor(),
+                                  frecuencia_espectral=frecuencia_serial or None, notificar=sesion.notificando))
+    else:
+        ticks = ticks_sinteticos(generar_datos_sinteticos())
+        sesion.iniciar(monitorear(ticks, sesion.umbrales, sesion.enviar_alerta, notificar=sesion.notificando))
+    return sesion
+
+def mostrar_alertas(sesion):
+    """Confirmaciones de las alertas encoladas por el hilo de monitoreo"""
+    for _, _, encolada in list(sesion.alertas)[-3:]:
+        if encolada:
+            st.success("✅ Alerta encolada para Telegram")
+        else:
+            st.error("Cola de alertas llena: alerta descartada")
+
+def mostrar_latencia(sesion, nuevos):
+    sesion.registrar_mostrados(nuevos)
+    metricas = sesion.metricas()
+    if metricas["latencia_p50"] is not None:
+        st.caption(f"⏱️ Latencia muestra → pantalla: p50 {metricas['latencia_p50'] * 1000:.0f} ms | "
+                   f"p95 {metricas['latencia_p95'] * 1000:.0f} ms | máx {metricas['latencia_max'] * 1000:.0f} ms")
+
+def cerrar_vista(sesion):
+    """Al terminar la sesión, una recarga completa detiene el refresco periódico"""
+    if sesion.error:
+        st.error(f"Error en el monitoreo: {sesion.error}")
+    if sesion.terminada and not st.session_state.vista["finalizada"]:
+        st.session_state.vista["finalizada"] = True
+        st.rerun()
+
+servidor_metricas = obtener_servidor_metricas()
 
 # ---- Sidebar (Controles de usuario) ----
 st.sidebar.header("🔧 Panel de Control")
@@ -171,8 +169,12 @@ st.sidebar.info(f"📍 Monterrey, México\n📅 {fecha_formateada}\n🕒 {hora_a
 st.sidebar.header("🚀 Control de Monitoreo")
 if 'monitoreo_activo' not in st.session_state:
     st.session_state.monitoreo_activo = False
+    st.session_state.sesion = None
+if st.session_state.sesion is not None and st.session_state.sesion.terminada:
+    st.session_state.monitoreo_activo = False
 
-if st.sidebar.button("▶️ Iniciar", type="primary", use_container_width=True):
+iniciar = st.sidebar.button("▶️ Iniciar", type="primary", use_container_width=True)
+if iniciar:
     st.session_state.monitoreo_activo = True
     st.sidebar.success("✅ Monitoreo iniciado")
 
@@ -180,7 +182,30 @@ if st.session_state.monitoreo_activo:
     st.sidebar.info("🔴 Monitoreo en curso...")
     if st.sidebar.button("⏹️ Detener", use_container_width=True):
         st.session_state.monitoreo_activo = False
-        st.sidebar.warning("⏹️ Monitoreo detenido")
+        st.sidebar.warning("⏹️ Monitoreo en pausa: 'Iniciar' lo reanuda sin perder el estado")
+
+# Fuente de datos
+st.sidebar.header("📡 Fuente de datos")
+fuente_datos = st.sidebar.radio("Origen de las mediciones", ["Datos sintéticos", "Puerto serial", "Flota sintética"])
+if fuente_datos == "Flota sintética":
+    n_vehiculos = st.sidebar.slider("Vehículos en la flota", 2, 500, 50)
+if fuente_datos == "Puerto serial":
+    puerto_serial = st.sidebar.text_input("Puerto o URL de pyserial", "/dev/ttyUSB0")
+    baudios = st.sidebar.selectbox("Baudios", [9600, 57600, 115200, 230400, 921600], index=2)
+    # A cientos de Hz se agrega el análisis espectral de las RPM (órdenes del motor)
+    frecuencia_serial = st.sidebar.number_input("Muestreo de las RPM (Hz, 0 = sin análisis espectral)", 0.0, 20000.0,
+                                                FRECUENCIA_SERIAL, 100.0)
+    try:
+        ingesta = obtener_ingesta(puerto_serial, baudios)
+    except Exception as e:
+        st.sidebar.error(f"No se pudo abrir el puerto: {e}")
+        fuente_datos = "Datos sintéticos"
+    else:
+        if ingesta.error:
+            st.sidebar.error(f"Error de ingesta: {ingesta.error}")
+        metricas_ingesta = ingesta.metricas()
+        st.sidebar.caption(f"Muestras: {metricas_ingesta['total']} | Perdidas: {metricas_ingesta['perdidas']} | "
+                           f"Malformadas: {metricas_ingesta['malformadas']}")
 
 # Controles para Temperatura
 st.sidebar.header("🌡️ Configuración de Umbrales")
@@ -191,6 +216,7 @@ umbral_temp_max = st.sidebar.slider("Umbral máximo de temperatura crítica (°C
 st.sidebar.subheader("⚙️ Control de RPM")
 umbral_rpm_min = st.sidebar.slider("Umbral mínimo de RPM", 700, 5000, 1000)  # Cambiado rango a 700-9000
 umbral_rpm_max = st.sidebar.slider("Umbral máximo de RPM", 3000, 9000, 5700)  # Cambiado a 5700 RPM
+umbrales = {"temp_min": umbral_temp_min, "temp_max": umbral_temp_max, "rpm_min": umbral_rpm_min, "rpm_max": umbral_rpm_max}
 
 # Selector de variables a visualizar
 st.sidebar.subheader("📊 Visualización")
@@ -208,6 +234,45 @@ if telegram_enabled:
 else:
     st.sidebar.warning("❌ Alertas de Telegram desactivadas")
 
+# Estado del despachador de alertas
+metricas_telegram = obtener_despachador().metricas()
+latencia = metricas_telegram["latencia_envio_media"]
+st.sidebar.caption(
+    f"📨 Enviadas: {metricas_telegram['enviadas']} | En cola: {metricas_telegram['profundidad_cola']} | "
+    f"Descartadas: {metricas_telegram['descartadas']} | Fallidas: {metricas_telegram['fallidas']}"
+    + (f" | Latencia: {latencia * 1000:.0f} ms" if latencia is not None else "")
+)
+if metricas_telegram["ultimo_error"]:
+    st.sidebar.error(metricas_telegram["ultimo_error"])
+if fuente_datos == "Puerto serial":
+    metricas_supresion = obtener_supresor().metricas()
+    st.sidebar.caption(
+        f"🔕 Activas: {metricas_supresion['activas']} | Suprimidas: {metricas_supresion['suprimidas']} | "
+        f"Escaladas: {metricas_supresion['escaladas']}"
+    )
+
+# La sesión sigue viva entre recargas: pausar, reanudar o cambiar umbrales no la reinicia
+clave_sesion = (fuente_datos, n_vehiculos if fuente_datos == "Flota sintética" else None,
+                (puerto_serial, baudios, frecuencia_serial) if fuente_datos == "Puerto serial" else None)
+sesion = st.session_state.sesion
+if sesion is not None and (st.session_state.clave_sesion != clave_sesion or (iniciar and sesion.terminada)):
+    sesion.cerrar()
+    sesion = st.session_state.sesion = None
+if st.session_state.monitoreo_activo:
+    if sesion is None:
+        sesion = st.session_state.sesion = crear_sesion(fuente_datos, umbrales)
+        st.session_state.clave_sesion = clave_sesion
+        st.session_state.vista = {"cursor": 0, "ultimo": None, "finalizada": False, "grafico": GraficoEnVivo(
+            ["RPM", "Temperatura (°C)"], "Tendencias en Tiempo Real - Monterrey, México",
+            convertir_x=(lambda x: pd.to_datetime(x, unit="s", utc=True).tz_convert(ZONA_HORARIA))
+            if fuente_datos == "Puerto serial" else None)}
+    sesion.reanudar()
+elif sesion is not None:
+    sesion.pausar()
+if sesion is not None:
+    sesion.umbrales.update(umbrales)
+    sesion.alertas_activas = telegram_enabled
+
 # Botón de prueba para Telegram
 if st.sidebar.button("🧪 Probar Telegram"):
     fecha_completa, fecha_formateada, hora_actual = obtener_fecha_hora_mty()
@@ -227,102 +292,113 @@ with tab1:
     fecha_completa, fecha_formateada, hora_actual = obtener_fecha_hora_mty()
     st.write(f"**📍 Ubicación:** Monterrey, México | **📅 Fecha:** {fecha_formateada} | **🕒 Hora:** {hora_actual}")
     
-    if not st.session_state.monitoreo_activo:
+    if sesion is None:
         st.warning("⏸️ El monitoreo está detenido. Presiona 'Iniciar' en el panel de control para comenzar.")
         st.info("💡 Configure los umbrales y visualización antes de iniciar el monitoreo.")
     else:
-        # Gráfico dinámico (simulación de streaming)
-        chart_placeholder = st.empty()
-        status_placeholder = st.empty()
-        analisis_placeholder = st.empty()
-        datos = generar_datos_sinteticos()
-        
-        # Variables para controlar el envío de alertas
-        alerta_temp_enviada = False
-        alerta_rpm_alta_enviada = False
-        alerta_rpm_baja_enviada = False
-        historial_rpm = []
-        
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        if not sesion.en_curso and not sesion.terminada:
+            st.warning("⏸️ Monitoreo en pausa. Presiona 'Iniciar' para reanudarlo desde donde quedó.")
         
-        for i in range(len(datos)):
-            if not st.session_state.monitoreo_activo:
-                st.warning("Monitoreo detenido por el usuario")
-                break
-                
-            subset = datos.iloc[:i+1]
-            fig = px.line(subset, x="Hora", y=variables, title="Tendencias en Tiempo Real - Monterrey, México")
-            chart_placeholder.plotly_chart(fig, use_container_width=True)
-            
-            # Actualizar barra de progreso
-            progress = (i + 1) / len(datos)
-            progress_bar.progress(progress)
-            status_text.text(f"Procesando datos: {i + 1}/{len(datos)}")
-            
-            # Obtener fecha y hora actual para Monterrey
-            fecha_completa, fecha_formateada, hora_actual = obtener_fecha_hora_mty()
-            
-            # Verificar alertas en cada iteración
-            temp_actual = subset["Temperatura (°C)"].iloc[-1]
-            rpm_actual = subset["RPM"].iloc[-1]
-            hora_simulada = subset["Hora"].iloc[-1]
-            
-            # Actualizar historial de RPM para análisis
-            historial_rpm.append(rpm_actual)
-            if len(historial_rpm) > 10:  # Mantener solo últimas 10 mediciones
-                historial_rpm = historial_rpm[-10:]
-            
-            # Analizar irregularidades
-            irregularidades, fallos_probables, fallo_principal = predecir_fallo(temp_actual, rpm_actual, historial_rpm)
-            
-            # Mostrar estado actual
-            status_text_display = f"**Hora: {hora_simulada}:00** | Temperatura: {temp_actual:.1f}°C | RPM: {rpm_actual:.0f}"
-            
-            # Mostrar análisis de irregularidades
-            if irregularidades:
-                analisis_text = "🔍 **Irregularidades detectadas:**\n"
-                for irregularidad in irregularidades:
-                    analisis_text += f"• {irregularidad}\n"
-                analisis_text += f"⚠️ **Fallo probable:** {fallo_principal}"
-                analisis_placeholder.warning(analisis_text)
+        # La vista no bloquea el script: cada refresco solo lee los resultados nuevos de la sesión
+        @st.fragment(run_every=INTERVALO_REFRESCO if sesion.en_curso else None)
+        @instrumentar("interfaz.vista_flota")
+        def vista_flota():
+            vista = st.session_state.vista
+            nuevos, vista["cursor"], _ = sesion.leer(vista["cursor"])
+            if nuevos:
+                vista["ultimo"] = nuevos[-1]
+            if vista["ultimo"] is None:
+                st.info("⏳ Esperando los primeros datos de la flota...")
             else:
-                analisis_placeholder.info("✅ No se detectaron irregularidades en RPM")
-            
-            # Determinar el estado general
-            if temp_actual > umbral_temp_max or rpm_actual > umbral_rpm_max or rpm_actual < umbral_rpm_min:
-                status_placeholder.error(f"🚨 {status_text_display} - ¡Condición crítica!")
-            elif temp_actual > umbral_temp_min or irregularidades:
-                status_placeholder.warning(f"⚠️ {status_text_display} - Advertencia")
+                tabla = pd.DataFrame(vista["ultimo"]["resumen"])
+                con_fallos = (tabla["Fallo probable"] != "Sin fallos detectados").sum()
+                st.write(f"**🚗 Vehículos:** {len(tabla)} | **⚠️ Con fallo probable:** {con_fallos} | "
+                         f"**🌡️ Temperatura máxima:** {tabla['Temperatura (°C)'].max():.1f}°C")
+                st.dataframe(tabla, height=400, use_container_width=True)
+            if sesion.terminada:
+                st.success("✅ Monitoreo de la flota completado")
             else:
-                status_placeholder.success(f"✅ {status_text_display} - Normal")
+                st.progress(min(sesion.total / N_TICKS_FLOTA, 1.0))
+            mostrar_latencia(sesion, nuevos)
+            cerrar_vista(sesion)
+        
+        @st.fragment(run_every=INTERVALO_REFRESCO if sesion.en_curso else None)
+        @instrumentar("interfaz.vista_vehiculo")
+        def vista_vehiculo():
+            vista = st.session_state.vista
+            nuevos, vista["cursor"], _ = sesion.leer(vista["cursor"])
+            # Solo se agregan los puntos nuevos; el gráfico se mantiene dentro de su presupuesto
+            for r in nuevos:
+                vista["grafico"].agregar(r["tiempos"], {"RPM": r["rpm_nuevas"], "Temperatura (°C)": r["temp_nuevas"]})
+            if nuevos:
+                vista["ultimo"] = nuevos[-1]
+            figura = vista["grafico"].mostrar(variables)
+            with medir("interfaz.plotly_chart"):
+                st.plotly_chart(figura, use_container_width=True)
             
-            # Enviar alertas si se superan los umbrales
-            if telegram_enabled:
-                # Alerta de temperatura alta (cambiado a 40°C)
-                if temp_actual > umbral_temp_max and not alerta_temp_enviada:
-                    mensaje = f"🚨 ALERTA: Temperatura crítica detectada\n\n• Valor actual: {temp_actual:.1f}°C\n• Umbral máximo: {umbral_temp_max}°C\n• Hora simulada: {hora_simulada}:00\n• RPM: {rpm_actual:.0f}"
-                    enviar_alerta_telegram(mensaje, irregularidades, fallo_principal)
-                    alerta_temp_enviada = True
+            resultado = vista["ultimo"]
+            if resultado is None:
+                st.info("⏳ Esperando las primeras muestras...")
+            else:
+                # Mostrar estado actual
+                status_text_display = (f"**Hora: {resultado['hora']}** | Temperatura: {resultado['temperatura']:.1f}°C | "
+                                       f"RPM: {resultado['rpm']:.0f}")
+                if resultado["espectro"] is not None and not np.isnan(resultado["espectro"]["subarmonicos"]):
+                    status_text_display += f" | Subarmónicos: {resultado['espectro']['subarmonicos']:.0%}"
+                if resultado["estado"] == CRITICO:
+                    st.error(f"🚨 {status_text_display} - ¡Condición crítica!")
+                elif resultado["estado"] == ADVERTENCIA:
+                    st.warning(f"⚠️ {status_text_display} - Advertencia")
+                else:
+                    st.success(f"✅ {status_text_display} - Normal")
                 
-                # Alerta de RPM alta (cambiado a 5700 RPM)
-                if rpm_actual > umbral_rpm_max and not alerta_rpm_alta_enviada:
-                    mensaje = f"🚨 ALERTA: RPM críticas detectadas\n\n• Valor actual: {rpm_actual:.0f} RPM\n• Umbral máximo: {umbral_rpm_max} RPM\n• Hora simulada: {hora_simulada}:00\n• Temperatura: {temp_actual:.1f}°C"
-                    enviar_alerta_telegram(mensaje, irregularidades, fallo_principal)
-                    alerta_rpm_alta_enviada = True
+                # Mostrar análisis de irregularidades
+                if resultado["irregularidades"]:
+                    analisis_text = "🔍 **Irregularidades detectadas:**\n"
+                    for irregularidad in resultado["irregularidades"]:
+                        analisis_text += f"• {irregularidad}\n"
+                    analisis_text += f"⚠️ **Fallo probable:** {resultado['fallo_principal']}"
+                    st.warning(analisis_text)
+                else:
+                    st.info("✅ No se detectaron irregularidades en RPM")
                 
-                # Alerta de RPM baja
-                if rpm_actual < umbral_rpm_min and not alerta_rpm_baja_enviada:
-                    mensaje = f"⚠️ ADVERTENCIA: RPM bajas detectadas\n\n• Valor actual: {rpm_actual:.0f} RPM\n• Umbral mínimo: {umbral_rpm_min} RPM\n• Hora simulada: {hora_simulada}:00\n• Temperatura: {temp_actual:.1f}°C"
-                    enviar_alerta_telegram(mensaje, irregularidades, fallo_principal)
-                    alerta_rpm_baja_enviada = True
+                # Progreso de la fuente
+                if resultado["progreso"] is not None and not sesion.terminada:
+                    st.progress(resultado["progreso"])
+                st.text(resultado["texto"])
             
-            time.sleep(0.5)  # Velocidad de actualización
+            if sesion.terminada:
+                st.success("✅ Monitoreo completado")
+            mostrar_alertas(sesion)
+            mostrar_latencia(sesion, nuevos)
+            cerrar_vista(sesion)
         
-        progress_bar.empty()
-        status_text.empty()
-        if st.session_state.monitoreo_activo:
-            st.success("✅ Monitoreo completado")
+        if st.session_state.clave_sesion[0] == "Flota sintética":
+            vista_flota()
+        else:
+            vista_vehiculo()
+    
+    # Dónde se va el tiempo: análisis, gráficos, Telegram y esperas (se actualiza cada segundo)
+    @st.fragment(run_every=1.0 if sesion is not None and sesion.en_curso else None)
+    def panel_diagnostico():
+        with st.expander("🩺 Diagnóstico de rendimiento"):
+            if not instrumentacion.ACTIVA:
+                st.info("Instrumentación desactivada (MIA_INSTRUMENTACION=0)")
+                return
+            resumen_operaciones = instrumentacion.resumen()
+            if not resumen_operaciones:
+                st.caption("Aún no hay mediciones.")
+                return
+            st.dataframe(pd.DataFrame([
+                {"Operación": nombre, "Llamadas": r["total"], "p50 (ms)": r["p50"] * 1000, "p95 (ms)": r["p95"] * 1000,
+                 "p99 (ms)": r["p99"] * 1000, "Llamadas/s": r["tasa"], "Ocupación (%)": r["ocupacion"] * 100}
+                for nombre, r in resumen_operaciones.items()
+            ]).round(2), use_container_width=True, hide_index=True)
+            if servidor_metricas is not None:
+                host, puerto = servidor_metricas.server_address[:2]
+                st.caption(f"Prometheus: http://{host}:{puerto}/metrics")
+    
+    panel_diagnostico()
 
 with tab2:
     st.header("Análisis Histórico")
@@ -331,7 +407,74 @@ with tab2:
     fecha_completa, fecha_formateada, hora_actual = obtener_fecha_hora_mty()
     st.write(f"**📍 Ubicación:** Monterrey, México | **📅 Fecha del reporte:** {fecha_formateada}")
     
-    datos = generar_datos_sinteticos()
+    almacen = obtener_almacen()
+    rango = almacen.rango_tiempo()
+    if rango is None:
+        st.info("💾 Aún no hay telemetría almacenada; se muestran los datos sintéticos.")
+        datos = generar_datos_sinteticos()
+        resumen = {
+            "rpm": {"max": datos["RPM"].max(), "media": datos["RPM"].mean(), "min": datos["RPM"].min(),
+                    "std": datos["RPM"].std()},
+            "temperatura": {"max": datos["Temperatura (°C)"].max(), "media": datos["Temperatura (°C)"].mean()},
+        }
+    else:
+        # Consultas por rango sobre el almacén columnar (memoria acotada)
+        col_rango, col_vehiculo = st.columns(2)
+        with col_rango:
+            inicio_almacen = datetime.fromtimestamp(rango[0], ZONA_HORARIA).date()
+            fin_almacen = datetime.fromtimestamp(rango[1], ZONA_HORARIA).date()
+            fechas = st.date_input("Rango de fechas", (inicio_almacen, fin_almacen),
+                                   min_value=inicio_almacen, max_value=fin_almacen)
+        with col_vehiculo:
+            vehiculo = st.selectbox("Vehículo", ["Todos"] + list(almacen.vehiculos))
+        fecha_inicio, fecha_fin = fechas if len(fechas) == 2 else (fechas[0], fechas[0])
+        t_inicio = datetime.combine(fecha_inicio, datetime.min.time(), tzinfo=ZONA_HORARIA).timestamp()
+        t_fin = datetime.combine(fecha_fin, datetime.max.time(), tzinfo=ZONA_HORARIA).timestamp()
+        vehiculo = None if vehiculo == "Todos" else vehiculo
+        
+        resumen = almacen.estadisticas(t_inicio, t_fin, vehiculo)
+        # Promedios por minuto/hora/día desde los resúmenes (tamaño acotado)
+        inicios, filas = almacen.serie(t_inicio, t_fin, vehiculo)
+        horas = pd.to_datetime(inicios, unit="s", utc=True).tz_convert(ZONA_HORARIA)
+        conteo = np.maximum(filas[:, resumenes.N], 1)
+        datos = pd.DataFrame({
+            "Fecha": horas,
+            "Hora": horas.hour + horas.minute / 60,
+            "RPM": filas[:, resumenes.VARIABLES["rpm"] + resumenes.SUMA] / conteo,
+            "Temperatura (°C)": filas[:, resumenes.VARIABLES["temperatura"] + resumenes.SUMA] / conteo,
+            "Muestras": filas[:, resumenes.N].astype(int),
+        })
+        st.caption(f"{resumen['rpm']['n']:,} muestras en el rango | {len(datos):,} promedios por intervalo")
+        
+        # Detector aprendido: línea base por vehículo y puntaje por lotes de todas las ventanas del rango
+        st.subheader("🧠 Detector de Anomalías Aprendido")
+        if st.button("Entrenar con todo el histórico"):
+            with st.spinner("Ajustando la línea base de cada vehículo..."):
+                try:
+                    entrenar_desde_almacen(almacen).guardar(RUTA_MODELO)
+                except ValueError as e:
+                    st.error(f"No se pudo entrenar: {e}")
+                else:
+                    obtener_modelo.clear()
+                    puntuar_rango.clear()
+                    st.success("✅ Modelo entrenado y guardado")
+        modelo = obtener_modelo()
+        if modelo is None:
+            st.info("Aún no hay un modelo entrenado.")
+        else:
+            paso = resumen["rpm"]["n"] // 1_000_000 + 1  # A lo sumo ~1 millón de ventanas
+            # Cacheado: los widgets vuelven a correr el script y no deben releer todas las muestras del rango
+            evaluadas, n_anomalas, tiempos_peores, ids_peores, puntajes_peores = puntuar_rango(
+                t_inicio, t_fin, vehiculo, paso, os.path.getmtime(RUTA_MODELO))
+            st.write(f"**Ventanas evaluadas:** {evaluadas:,} | **Anómalas:** {n_anomalas:,} "
+                     f"({n_anomalas / evaluadas * 100 if evaluadas else 0:.2f}%) | "
+                     f"**Vehículos con línea base propia:** {len(modelo.vehiculos)}")
+            if n_anomalas:
+                st.dataframe(pd.DataFrame({
+                    "Fecha": pd.to_datetime(tiempos_peores, unit="s", utc=True).tz_convert(ZONA_HORARIA),
+                    "Vehículo": [almacen.nombre_vehiculo(int(i)) for i in ids_peores],
+                    "Puntaje": puntajes_peores.round(1),
+                }), use_container_width=True)
     
     # Análisis completo de irregularidades
     st.subheader("🔍 Análisis de Irregularidades en RPM")
@@ -358,26 +501,64 @@ with tab2:
         st.subheader("Estadísticas")
         col21, col22 = st.columns(2)
         with col21:
-            st.metric("Temperatura máxima", f"{datos['Temperatura (°C)'].max():.1f}°C")
-            st.metric("Temperatura promedio", f"{datos['Temperatura (°C)'].mean():.1f}°C")
-            st.metric("Variación RPM", f"{(datos['RPM'].std() / datos['RPM'].mean() * 100):.1f}%")
+            st.metric("Temperatura máxima", f"{resumen['temperatura']['max']:.1f}°C")
+            st.metric("Temperatura promedio", f"{resumen['temperatura']['media']:.1f}°C")
+            st.metric("Variación RPM", f"{(resumen['rpm']['std'] / resumen['rpm']['media'] * 100):.1f}%")
         with col22:
-            st.metric("RPM máximo", f"{datos['RPM'].max():.0f}")
-            st.metric("RPM promedio", f"{datos['RPM'].mean():.0f}")
-            st.metric("RPM mínimo", f"{datos['RPM'].min():.0f}")
+            st.metric("RPM máximo", f"{resumen['rpm']['max']:.0f}")
+            st.metric("RPM promedio", f"{resumen['rpm']['media']:.0f}")
+            st.metric("RPM mínimo", f"{resumen['rpm']['min']:.0f}")
     
     # Gráfico interactivo
     st.subheader("Análisis de correlación")
-    fig_hist = px.scatter(
-        datos,
-        x="RPM",
-        y="Temperatura (°C)",
-        color="Hora",
-        title="Relación RPM vs Temperatura - Monterrey, México",
-        size="RPM",
-        hover_data=["Hora"]
-    )
-    st.plotly_chart(fig_hist, use_container_width=True)
+    with medir("graficos.correlacion"):
+        fig_hist = px.scatter(
+            datos,
+            x="RPM",
+            y="Temperatura (°C)",
+            color="Hora",
+            title="Relación RPM vs Temperatura - Monterrey, México",
+            size="RPM",
+            hover_data=["Hora"]
+        )
+    with medir("interfaz.plotly_chart"):
+        st.plotly_chart(fig_hist, use_container_width=True)
+    
+    # Importación masiva: el registro se lee y analiza por bloques (memoria acotada)
+    st.subheader("📂 Importar registros de manejo")
+    col_archivo, col_ruta = st.columns(2)
+    with col_archivo:
+        archivo_registro = st.file_uploader("Registro CSV o Parquet", type=["csv", "parquet"])
+    with col_ruta:
+        ruta_registro = st.text_input("...o ruta de un registro en el servidor (archivos de varios GB)")
+    col_guardar, col_formato = st.columns(2)
+    with col_guardar:
+        guardar_registro = st.checkbox("Guardar la telemetría en el almacén")
+    with col_formato:
+        formato_resultados = st.radio("Resultados por ventana", ["parquet", "csv"], horizontal=True)
+    registro = archivo_registro or ruta_registro.strip() or None
+    if st.button("Importar y analizar", disabled=registro is None):
+        destino = os.path.join(tempfile.mkdtemp(prefix="mia_"), f"ventanas.{formato_resultados}")
+        with st.spinner("Analizando el registro por bloques..."):
+            try:
+                inicio = time.perf_counter()
+                resumen_registro = analizar_registro(registro, destino,
+                                                     almacen=obtener_almacen() if guardar_registro else None)
+                resumen_registro["segundos"] = time.perf_counter() - inicio
+            except (OSError, ValueError, ImportError) as e:
+                st.error(f"No se pudo importar el registro: {e}")
+            else:
+                st.session_state.importacion = (resumen_registro, destino)
+    if "importacion" in st.session_state:
+        resumen_registro, destino = st.session_state.importacion
+        st.write(f"**Filas:** {resumen_registro['filas']:,} | **Vehículos:** {len(resumen_registro['vehiculos'])} | "
+                 f"**Ventanas:** {resumen_registro['ventanas']:,} | **Tiempo:** {resumen_registro['segundos']:.1f} s")
+        st.dataframe(pd.DataFrame({"Fallo principal": list(resumen_registro["por_fallo"]),
+                                   "Ventanas": list(resumen_registro["por_fallo"].values())}),
+                     use_container_width=True)
+        if os.path.exists(destino):
+            with open(destino, "rb") as f:
+                st.download_button("⬇️ Descargar resultados por ventana", f, file_name=os.path.basename(destino))
 
 with tab3:
     st.header("Simulador de Fallos")
@@ -386,103 +567,42 @@ with tab3:
     fecha_completa, fecha_formateada, hora_actual = obtener_fecha_hora_mty()
     st.write(f"**📍 Ubicación:** Monterrey, México | **🕒 Hora de simulación:** {hora_actual}")
     
+    # Escenarios y reglas salen de la tabla de reglas (se recarga al guardarla)
+    motor = motor_reglas()
+    if error_reglas() is not None:
+        st.error(f"La tabla de reglas tiene errores; se sigue usando la versión anterior: {error_reglas()}")
+    st.caption(f"📋 Reglas de fallos: {len(motor.reglas)} cargadas de `{motor.origen}`")
+    escenarios = motor.simulaciones
+    
     col1, col2 = st.columns(2)
     
     with col1:
         # Selector de fallos
-        fallo = st.selectbox("Selecciona un fallo para simular:", 
-                           ["Bujías", "Sobrecarga", "Fallo de refrigeración", "Filtro obstruido", "Problema de encendido", "Inyectores defectuosos"])
+        fallo = st.selectbox("Selecciona un fallo para simular:", list(escenarios))
         
         # Parámetros de simulación
         temp_simulacion = st.slider("Temperatura simulada (°C)", 20, 100, 40)  # Ajustado rango
         rpm_simulacion = st.slider("RPM simuladas", 700, 9000, 5700)  # Ajustado rango a 700-9000
         variacion_rpm = st.slider("Variación de RPM (%)", 0, 50, 20)
         
-        if st.button("🔍 Simular fallo", type="primary"):
+        if st.button("🔍 Simular fallo", type="primary", disabled=fallo is None):
             fecha_completa, fecha_formateada, hora_actual = obtener_fecha_hora_mty()
             
-            # Simular irregularidades basadas en el fallo seleccionado
-            if fallo == "Bujías":
-                sintomas = "RPM inestables, aumento de temperatura"
-                irregularidades = [f"Alta variación en RPM ({variacion_rpm}%)", "Chispa intermitente detectada"]
-                fallo_probable = "Bujías desgastadas"
+            # Simular irregularidades según el escenario de la tabla
+            escenario = escenarios[fallo]
+            sintomas = escenario["sintomas"]
+            irregularidades = [texto.format(variacion=variacion_rpm) for texto in escenario["irregularidades"]]
+            fallo_probable = escenario["fallo"]
+            if escenario["nivel"] == "error":
                 st.error(f"🚨 {sintomas}")
-                
-            elif fallo == "Fallo de refrigeración":
-                sintomas = "Temperatura elevada persistente, ventilador no funciona"
-                irregularidades = ["Temperatura críticamente alta", "RPM estables pero temperatura elevada"]
-                fallo_probable = "Fallo de refrigeración"
-                st.warning(f"⚠️ {sintomas}")
-                
-            elif fallo == "Filtro obstruido":
-                sintomas = "RPM bajas, temperatura variable"
-                irregularidades = ["RPM consistently bajas", "Pérdida de potencia"]
-                fallo_probable = "Filtro de aire obstruido"
+            else:
                 st.warning(f"⚠️ {sintomas}")
             
-            elif fallo == "Problema de encendido":
-                sintomas = "RPM irregulares, dificultad al arrancar"
-                irregularidades = ["Patrón irregular en RPM", "Fallos de encendido detectados"]
-                fallo_probable = "Bobinas de encendido defectuosas"
-                st.error(f"🚨 {sintomas}")
-            
-            elif fallo == "Inyectores defectuosos":
-                sintomas = "RPM fluctuantes, consumo excesivo de combustible"
-                irregularidades = ["RPM inestables", "Rendimiento pobre del motor"]
-                fallo_probable = "Inyectores de combustible defectuosos"
-                st.error(f"🚨 {sintomas}")
-                
-            else:  # Sobrecarga
-                sintomas = "Temperatura > 50°C, pérdida de potencia"  # Ajustado a 50°C
-                irregularidades = ["Temperatura críticamente alta", "RPM forzadas"]
-                fallo_probable = "Sobrecarga del motor"
-                st.error(f"🚨 {sintomas}")
-            
             if telegram_enabled:
                 mensaje = f"🔧 SIMULACIÓN: {fallo}\n• Síntomas: {sintomas}\n• Temperatura: {temp_simulacion}°C\n• RPM: {rpm_simulacion}"
                 enviar_alerta_telegram(mensaje, irregularidades, fallo_probable)
     
     with col2:
         st.subheader("Información del fallo")
-        if fallo == "Bujías":
-            st.info("""
-            **Fallo en bujías:**
-            - Causa: Desgaste normal o contaminación
-            - Síntomas: RPM inestables, aumento de temperatura
-            - Variación típica de RPM: 15-25%
-            """)
-        elif fallo == "Fallo de refrigeración":
-            st.info("""
-            **Fallo de refrigeración:**
-            - Causa: Líquido refrigerante bajo, ventilador defectuoso
-            - Síntomas: Temperatura elevada persistente
-            - Umbral crítico: >40°C
-            """)
-        elif fallo == "Filtro obstruido":
-            st.info("""
-            **Filtro de aire obstruido:**
-            - Causa: Acumulación de suciedad
-            - Síntomas: RPM bajas, pérdida de potencia
-            - Solución: Reemplazar filtro
-            """)
-        elif fallo == "Problema de encendido":
-            st.info("""
-            **Problema de encendido:**
-            - Causa: Bobinas o cables de bujía defectuosos
-            - Síntomas: RPM irregulares, dificultad al arrancar
-            - Variación típica: >20%
-            """)
-        elif fallo == "Inyectores defectuosos":
-            st.info("""
-            **Inyectores defectuosos:**
-            - Causa: Acumulación de residuos, desgaste
-            - Síntomas: RPM fluctuantes, alto consumo de combustible
-            - Solución: Limpieza o reemplazo
-            """)
-        else:
-            st.info("""
-            **Sobrecarga del motor:**
-            - Causa: Exceso de carga o condiciones extremas
-            - Síntomas: Temperatura >50°C, pérdida de potencia
-            - Acción: Detener vehículo inmediatamente
-            """)
\ No newline at end of file
+        if fallo is not None:
+            st.info(escenarios[fallo]["informacion"])
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""Ejercita `DespachadorTelegram` contra un servidor HTTP local que imita Telegram.
+
+El servidor responde con latencia configurable y devuelve 429 y 500 de vez en
+cuando para forzar la espera indicada y los reintentos. Comprueba además que
+detener el despachador a mitad de un lote deja los contadores cuadrados.
+
+Uso: python -m benchmarks.bench_alertas [alertas] [latencia_ms]
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mantenimiento.alertas import DespachadorTelegram, construir_mensaje
+
+
+class ServidorTelegramLocal(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latencia=0.05, cada_429=7, cada_500=11):
+        super().__init__(("127.0.0.1", 0), _Manejador)
+        self.latencia = latencia
+        self.cada_429 = cada_429
+        self.cada_500 = cada_500
+        self.peticiones = 0
+        self.mensajes = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    def do_POST(self):
+        servidor = self.server
+        cuerpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(servidor.latencia)
+        with servidor._lock:
+            servidor.peticiones += 1
+            n = servidor.peticiones
+        if servidor.cada_429 and n % servidor.cada_429 == 0:
+            self._responder(429, {"ok": False, "parameters": {"retry_after": 0.2}})
+        elif servidor.cada_500 and n % servidor.cada_500 == 0:
+            self._responder(500, {"ok": False})
+        else:
+            with servidor._lock:
+                servidor.mensajes.append(cuerpo["text"])
+            self._responder(200, {"ok": True})
+
+    def _responder(self, codigo, cuerpo):
+        datos = json.dumps(cuerpo).encode()
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def log_message(self, *args):
+        pass
+
+
+def medir(n_alertas=200, latencia=0.05, capacidad_cola=100):
+    servidor = ServidorTelegramLocal(latencia)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    despachador = DespachadorTelegram("TOKEN", "CHAT", url_base=servidor.url,
+                                      capacidad_cola=capacidad_cola, mensajes_por_segundo=5,
+                                      ventana_agrupacion=0.1, espera_base=0.05)
+    try:
+        # El ciclo de monitoreo solo paga el costo de encolar
+        peor_encolado = 0.0
+        for i in range(n_alertas):
+            texto = construir_mensaje(f"🚨 ALERTA {i}", "lunes", "12:00:00",
+                                      ["RPM muy altas (>5700)"], "Fallo del acelerador")
+            inicio = time.perf_counter()
+            despachador.enviar(texto)
+            peor_encolado = max(peor_encolado, time.perf_counter() - inicio)
+            if i % 20 == 19:
+                time.sleep(0.25)  # Ráfagas separadas
+        despachador.esperar_vacia(timeout=60)
+        metricas = despachador.metricas()
+    finally:
+        despachador.detener()
+        servidor.shutdown()
+
+    metricas["peor_encolado_ms"] = peor_encolado * 1000
+    metricas["peticiones_http"] = servidor.peticiones
+    metricas["mensajes_recibidos"] = len(servidor.mensajes)
+    assert metricas["enviadas"] + metricas["descartadas"] + metricas["fallidas"] == n_alertas
+    return metricas
+
+
+def verificar_detencion(n_alertas=20):
+    """Detener a mitad de un lote con reintentos: lo que no se envió cuenta como fallido"""
+    servidor = ServidorTelegramLocal(0.01, cada_429=0, cada_500=2)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    despachador = DespachadorTelegram("TOKEN", "CHAT", url_base=servidor.url, mensajes_por_segundo=20,
+                                      ventana_agrupacion=0.05, espera_base=0.2)
+    try:
+        for i in range(n_alertas):
+            despachador.enviar(f"🚨 ALERTA {i} " + "x" * 3000)  # Un mensaje por alerta
+        time.sleep(0.3)
+        despachador.detener()
+        metricas = despachador.metricas()
+    finally:
+        servidor.shutdown()
+    return (metricas["encoladas"] == n_alertas and 0 < metricas["enviadas"] < n_alertas
+            and metricas["enviadas"] + metricas["fallidas"] == n_alertas)
+
+
+if __name__ == "__main__":
+    n_alertas = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latencia = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.05
+    r = medir(n_alertas, latencia)
+    print(f"Alertas: {n_alertas} | enviadas: {r['enviadas']} en {r['mensajes']} mensajes | "
+          f"descartadas: {r['descartadas']} | fallidas: {r['fallidas']} | reintentos: {r['reintentos']}")
+    print(f"Peor tiempo de encolado: {r['peor_encolado_ms']:.3f} ms")
+    print(f"Latencia de envío media: {r['latencia_envio_media'] * 1000:.1f} ms | "
+          f"latencia alerta->entrega media: {r['latencia_alerta_media'] * 1000:.0f} ms")
+    print(f"Detener a mitad de un lote cuadra los contadores: {'sí' if verificar_detencion() else 'NO'}")
@@ -0,0 +1,69 @@
+"""Escritura, consultas por rango y estadísticas del almacén columnar.
+
+Uso: python -m benchmarks.bench_almacen [dias] [muestras_por_dia]
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from mantenimiento.almacen import AlmacenTelemetria, SEGUNDOS_POR_DIA
+
+INICIO = 1_760_000_000.0  # Octubre de 2025
+
+
+def llenar(almacen, dias, muestras_por_dia, vehiculos=4, bloque=100_000, seed=42):
+    rng = np.random.default_rng(seed)
+    total = dias * muestras_por_dia
+    paso = SEGUNDOS_POR_DIA / muestras_por_dia
+    for a in range(0, total, bloque):
+        n = min(bloque, total - a)
+        tiempo = INICIO + (a + np.arange(n)) * paso
+        almacen.agregar(tiempo, np.arange(a, a + n) % vehiculos,
+                        rng.normal(3000, 500, n), rng.normal(35, 10, n))
+    return total
+
+
+def medir(dias=7, muestras_por_dia=500_000):
+    with tempfile.TemporaryDirectory() as directorio:
+        almacen = AlmacenTelemetria(directorio)
+        inicio = time.perf_counter()
+        total = llenar(almacen, dias, muestras_por_dia)
+        escritura = total / (time.perf_counter() - inicio)
+
+        # Un día a la mitad del historial, un vehículo
+        t_inicio = INICIO + (dias // 2) * SEGUNDOS_POR_DIA
+        t_fin = t_inicio + SEGUNDOS_POR_DIA
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        estadisticas = almacen.estadisticas(t_inicio, t_fin, vehiculo=1)
+        consulta_dia = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        completas = almacen.estadisticas()
+        consulta_total = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Verificación contra el cálculo directo sobre las columnas
+        bloques = list(almacen.consultar(t_inicio, t_fin, vehiculo=1, columnas=("rpm",)))
+        rpm = np.concatenate([b["rpm"] for b in bloques]).astype(np.float64)
+        assert estadisticas["rpm"]["n"] == len(rpm)
+        assert np.isclose(estadisticas["rpm"]["media"], rpm.mean(), rtol=1e-12)
+        assert np.isclose(estadisticas["rpm"]["std"], rpm.std(ddof=1), rtol=1e-9)
+        assert estadisticas["rpm"]["max"] == rpm.max() and completas["rpm"]["n"] == total
+
+    return {"muestras": total, "escritura_muestras_s": escritura, "consulta_dia_ms": consulta_dia * 1000,
+            "consulta_total_ms": consulta_total * 1000, "pico_memoria_mb": pico / 2**20,
+            "datos_mb": total * 20 / 2**20}
+
+
+if __name__ == "__main__":
+    dias = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    muestras_por_dia = int(sys.argv[2]) if len(sys.argv) > 2 else 500_000
+    r = medir(dias, muestras_por_dia)
+    print(f"{r['muestras']:,} muestras ({r['datos_mb']:.0f} MB) | escritura: {r['escritura_muestras_s']:,.0f} muestras/s")
+    print(f"Estadísticas de 1 día / 1 vehículo: {r['consulta_dia_ms']:.1f} ms | "
+          f"historial completo: {r['consulta_total_ms']:.1f} ms | pico de memoria: {r['pico_memoria_mb']:.1f} MB")
@@ -0,0 +1,74 @@
+"""Compara el motor vectorizado `analizar_flota` contra el camino escalar.
+
+Uso: python -m benchmarks.bench_analisis [vehiculos] [ventana]
+"""
+import sys
+import time
+
+import numpy as np
+
+from mantenimiento.analisis import (
+    analizar_flota,
+    decodificar_flota,
+    decodificar_vehiculo,
+    predecir_fallo,
+)
+from mantenimiento.reglas import motor_reglas
+
+
+def generar_flota(n_vehiculos, ventana, seed=42):
+    """Ventanas de RPM y temperaturas con irregularidades mezcladas"""
+    rng = np.random.default_rng(seed)
+    rpm = rng.normal(3000, 500, (n_vehiculos, ventana))
+    rpm[::7, -2] += 3000  # Picos de RPM
+    rpm[3::11, -1] -= 2500  # Caídas de RPM
+    rpm[5::13] *= rng.uniform(0.5, 1.5, (len(rpm[5::13]), ventana))  # Alta variación
+    temperatura = rng.normal(35, 10, n_vehiculos)
+    return rpm, temperatura
+
+
+def verificar_equivalencia(rpm, temperatura):
+    """Comprueba que ambos caminos producen los mismos resultados"""
+    resultado = analizar_flota(rpm, temperatura)
+    for i, en_lote in enumerate(decodificar_flota(resultado)):
+        historial = list(rpm[i])
+        esperado = predecir_fallo(temperatura[i], historial[-1], historial)
+        obtenido = decodificar_vehiculo(resultado, i)
+        assert obtenido == esperado, (i, obtenido, esperado)
+        assert en_lote == esperado, (i, en_lote, esperado)
+
+
+def medir(n_vehiculos=10_000, ventana=10, repeticiones=5):
+    rpm, temperatura = generar_flota(n_vehiculos, ventana)
+    verificar_equivalencia(rpm[:2000], temperatura[:2000])
+
+    historiales = [list(fila) for fila in rpm]
+    inicio = time.perf_counter()
+    for historial, temp in zip(historiales, temperatura):
+        predecir_fallo(temp, historial[-1], historial)
+    escalar = n_vehiculos / (time.perf_counter() - inicio)
+
+    mejor = mejor_textos = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = analizar_flota(rpm, temperatura)
+        mejor = min(mejor, time.perf_counter() - inicio)
+        decodificar_flota(resultado)
+        mejor_textos = min(mejor_textos, time.perf_counter() - inicio)
+    vectorizado = n_vehiculos / mejor
+    con_textos = n_vehiculos / mejor_textos
+
+    return {"escalar_vehiculos_s": escalar, "vectorizado_vehiculos_s": vectorizado,
+            "aceleracion": vectorizado / escalar, "con_textos_vehiculos_s": con_textos,
+            "aceleracion_textos": con_textos / escalar}
+
+
+if __name__ == "__main__":
+    n_vehiculos = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    ventana = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    r = medir(n_vehiculos, ventana)
+    print(f"Fallos catalogados: {len(motor_reglas().fallos)} | vehículos: {n_vehiculos} | ventana: {ventana}")
+    print(f"Escalar:     {r['escalar_vehiculos_s']:>14,.0f} vehículos/s")
+    print(f"Vectorizado: {r['vectorizado_vehiculos_s']:>14,.0f} vehículos/s ({r['aceleracion']:.0f}x)")
+    print(f"Con textos:  {r['con_textos_vehiculos_s']:>14,.0f} vehículos/s ({r['aceleracion_textos']:.0f}x, "
+          f"decodificar_flota)")
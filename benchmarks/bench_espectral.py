@@ -0,0 +1,150 @@
+"""Análisis espectral de las RPM de una flota en tiempo real.
+
+Alimenta un `AnalizadorEspectral` con 100 vehículos muestreados a 1 kHz en
+ticks de 10 ms y en cada tick evalúa la predicción de toda la flota con las
+características de orden (`analizar_flota`): el cómputo debe tardar menos
+que la señal en un solo núcleo. Con episodios frecuentes de los fallos del
+generador sintético mide cuánto se dispara la regla de sub-armónicos en
+cada patrón (debe hacerlo en los fallos de encendido y casi nunca en el
+resto), y comprueba que el espectro coincide con `scipy.signal.welch`, que
+no depende del tamaño de los bloques y que `MonitorFlota` (repartiendo los
+vehículos entre trabajadores) obtiene las mismas características.
+
+Uso: python -m benchmarks.bench_espectral [segundos] [vehículos]
+"""
+import sys
+import time
+
+import numpy as np
+
+from mantenimiento.analisis import analizar_flota
+from mantenimiento.espectral import CARACTERISTICAS, AnalizadorEspectral
+from mantenimiento.flota import MonitorFlota
+from mantenimiento.reglas import motor_reglas
+from mantenimiento.sinteticos import PATRONES, SIN_PATRON, GeneradorFlota
+
+FRECUENCIA = 1000.0
+MUESTRAS_TICK = 10  # 10 ms por tick a 1 kHz
+
+
+def generar(segundos, n_vehiculos, **opciones):
+    """(rpm, temperatura, fallo) como matrices vehículos × muestras"""
+    generador = GeneradorFlota(n_vehiculos, FRECUENCIA, inicio=0, **opciones)
+    bloque = generador.generar(round(segundos * FRECUENCIA))
+    return tuple(bloque[c].reshape(-1, n_vehiculos).T.copy() for c in ("rpm", "temperatura", "fallo"))
+
+
+def tiempo_real(rpm, temperatura, prediccion=True):
+    """Segundos de cómputo por segundo de señal (debe ser < 1), procesando tick a tick"""
+    n_vehiculos, n = rpm.shape
+    analizador = AnalizadorEspectral(n_vehiculos, FRECUENCIA)
+    motor = motor_reglas()
+    inicio = time.perf_counter()
+    for i in range(0, n, MUESTRAS_TICK):
+        fin = i + MUESTRAS_TICK
+        analizador.agregar(rpm[:, i:fin])
+        if prediccion:  # La ventana de predicción son las últimas 10 muestras
+            analizar_flota(rpm[:, max(0, fin - 10):fin], temperatura[:, fin - 1], motor=motor,
+                           espectro=analizador.caracteristicas())
+    return (time.perf_counter() - inicio) / (n / FRECUENCIA)
+
+
+def deteccion(segundos=120, n_vehiculos=30):
+    """Fracción de ticks con la irregularidad de sub-armónicos por patrón de fallo activo"""
+    rpm, temperatura, fallo = generar(segundos, n_vehiculos, fallos_por_dia=3000, duracion_fallo=(20, 60))
+    analizador = AnalizadorEspectral(n_vehiculos, FRECUENCIA)
+    motor = motor_reglas()
+    bit = next(k for k, j in enumerate(motor.irregulares) if motor.reglas[j]["nombre"] == "subarmonicos")
+    disparos, patrones = [], []
+    paso = 100  # Se evalúa cada 100 ms
+    for i in range(0, rpm.shape[1], paso):
+        analizador.agregar(rpm[:, i:i + paso])
+        fin = i + paso
+        resultado = analizar_flota(rpm[:, fin - 10:fin], temperatura[:, fin - 1], motor=motor,
+                                   espectro=analizador.caracteristicas())
+        disparos.append(resultado.irregularidades >> bit & 1)
+        patrones.append(fallo[:, fin - 1])
+    disparos, patrones = np.array(disparos), np.array(patrones)
+    return {("Sano" if codigo == SIN_PATRON else PATRONES[codigo]): float(disparos[patrones == codigo].mean())
+            for codigo in np.unique(patrones)}
+
+
+def verificar_welch():
+    """El espectro coincide con scipy.signal.welch sobre los mismos segmentos y no depende de los bloques"""
+    rpm, _, _ = generar(20, 3, fallos_por_dia=0)
+    completo = AnalizadorEspectral(3, FRECUENCIA)
+    completo.agregar(rpm)
+    por_ticks = AnalizadorEspectral(3, FRECUENCIA)
+    for i in range(0, rpm.shape[1], 7):
+        por_ticks.agregar(rpm[:, i:i + 7])
+    assert np.allclose(completo.densidad(), por_ticks.densidad(), rtol=1e-5)
+    for nombre, valores in completo.caracteristicas().items():
+        assert np.allclose(valores, por_ticks.caracteristicas()[nombre]), nombre
+    try:
+        from scipy.signal import welch
+    except ImportError:
+        return None
+    a = completo
+    fin = (a.cerrados - 1) * a.paso + a.muestras_segmento
+    inicio = fin - a.muestras_segmento - (a.segmentos - 1) * a.paso
+    _, esperada = welch(rpm[:, inicio:fin].astype(np.float64), FRECUENCIA, window="hann", nperseg=a.muestras_segmento,
+                        noverlap=a.muestras_segmento - a.paso, detrend="constant")
+    return float(np.abs(a.densidad() - esperada).max() / esperada.max())
+
+
+def verificar_flota(segundos=60, n_vehiculos=20):
+    """MonitorFlota frente a un solo analizador: (mismas características, disparos con fallo de encendido, sin él)"""
+    rpm, temperatura, fallo = generar(segundos, n_vehiculos, fallos_por_dia=3000, duracion_fallo=(20, 60))
+    nombres = [f"Vehículo {v + 1}" for v in range(n_vehiculos)]
+    encendido = PATRONES.index("Problema de encendido")
+    analizador = AnalizadorEspectral(n_vehiculos, FRECUENCIA)
+    monitor = MonitorFlota(3, "hilos", frecuencia_espectral=FRECUENCIA)
+    disparos, patrones = [], []
+    paso = 100
+    try:
+        for i in range(0, rpm.shape[1], paso):
+            analizador.agregar(rpm[:, i:i + paso])
+            resultados = monitor.actualizar({nombre: (rpm[v, i:i + paso], temperatura[v, i + paso - 1])
+                                             for v, nombre in enumerate(nombres)})
+            disparos.append([any(t.startswith("Fallo de encendido periódico") for t in resultados[n]["irregularidades"])
+                             for n in nombres])
+            patrones.append(fallo[:, i + paso - 1] == encendido)
+    finally:
+        monitor.cerrar()
+    esperadas = analizador.caracteristicas()
+    iguales = all(np.allclose([resultados[n]["espectro"][c] for n in nombres], esperadas[c], equal_nan=True)
+                  for c in CARACTERISTICAS)
+    disparos, patrones = np.array(disparos), np.array(patrones)
+    return iguales, float(disparos[patrones].mean()), float(disparos[~patrones].mean())
+
+
+def medir(segundos=30, n_vehiculos=100):
+    rpm, temperatura, _ = generar(segundos, n_vehiculos)
+    return {
+        "segundos": segundos,
+        "vehiculos": n_vehiculos,
+        "espectral": tiempo_real(rpm, temperatura, prediccion=False),
+        "con_prediccion": tiempo_real(rpm, temperatura),
+        "error_welch": verificar_welch(),
+        "deteccion": deteccion(),
+        "flota": verificar_flota(),
+    }
+
+
+if __name__ == "__main__":
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    n_vehiculos = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    r = medir(segundos, n_vehiculos)
+    print(f"{r['vehiculos']} vehículos a {FRECUENCIA:.0f} Hz, ticks de {MUESTRAS_TICK / FRECUENCIA * 1000:.0f} ms, "
+          f"{r['segundos']:g} s de señal:")
+    for clave, titulo in (("espectral", "Solo análisis espectral"), ("con_prediccion", "Espectral + predicción")):
+        print(f"  {titulo:<24} {r[clave] * 100:5.1f}% de un núcleo ({1 / r[clave]:5.1f}x tiempo real)")
+    if r["error_welch"] is not None:
+        print(f"Frente a scipy.signal.welch: error relativo máximo {r['error_welch']:.1e}")
+    print("Independiente del tamaño de bloque: sí")
+    iguales, con_encendido, sin_encendido = r["flota"]
+    print(f"MonitorFlota igual a un solo analizador: {'sí' if iguales else 'NO'} | sub-armónicos en "
+          f"{con_encendido:.1%} de los ticks con fallo de encendido y {sin_encendido:.1%} del resto")
+    print("Ticks con la irregularidad de sub-armónicos por patrón activo:")
+    for patron, fraccion in r["deteccion"].items():
+        print(f"  {patron:<24} {fraccion:6.1%}")
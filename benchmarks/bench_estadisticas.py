@@ -0,0 +1,78 @@
+"""Compara `EstadisticasMoviles` contra el recálculo completo del historial.
+
+Uso: python -m benchmarks.bench_estadisticas [muestras] [ventana]
+"""
+import sys
+import time
+
+import numpy as np
+
+from mantenimiento.analisis import analizar_irregularidades_rpm
+from mantenimiento.estadisticas import EstadisticasMoviles
+
+
+def generar_rpm(n_muestras, seed=42):
+    rng = np.random.default_rng(seed)
+    rpm = rng.normal(3000, 500, n_muestras)
+    rpm[::97] += 3000
+    rpm[::89] -= 2500
+    return rpm
+
+
+def verificar_concordancia(rpm, ventana=10, tolerancia=1e-9):
+    """Devuelve el mayor error relativo; falla si supera la tolerancia"""
+    estadisticas = EstadisticasMoviles(ventana)
+    historial = []
+    peor = 0.0
+    for valor in rpm:
+        estadisticas.agregar(valor)
+        historial.append(valor)
+        historial = historial[-ventana:]
+
+        esperado = [np.mean(historial), np.std(historial), np.std(historial) / np.mean(historial) * 100]
+        obtenido = [estadisticas.media, estadisticas.std, estadisticas.variacion]
+        if len(historial) > 5:
+            esperado.append(np.std(np.diff(historial[-5:])))
+            obtenido.append(estadisticas.std_diferencias)
+        for a, b in zip(obtenido, esperado):
+            peor = max(peor, abs(a - b) / max(abs(b), 1.0))
+        assert estadisticas.ultimas(3) == historial[-3:]
+        assert list(estadisticas.valores()) == historial
+
+        irregularidades, _ = analizar_irregularidades_rpm(estadisticas)
+        assert irregularidades == analizar_irregularidades_rpm(historial)[0]
+    assert peor < tolerancia, f"Error relativo {peor:.2e} excede {tolerancia:.0e}"
+    return peor
+
+
+def medir(n_muestras=200_000, ventana=10):
+    rpm = generar_rpm(n_muestras)
+    peor = verificar_concordancia(rpm[:20_000], ventana)
+
+    historial = []
+    inicio = time.perf_counter()
+    for valor in rpm:
+        historial.append(valor)
+        if len(historial) > ventana:
+            historial = historial[-ventana:]
+        analizar_irregularidades_rpm(historial)
+    completo = n_muestras / (time.perf_counter() - inicio)
+
+    estadisticas = EstadisticasMoviles(ventana)
+    inicio = time.perf_counter()
+    for valor in rpm:
+        estadisticas.agregar(valor)
+        analizar_irregularidades_rpm(estadisticas)
+    incremental = n_muestras / (time.perf_counter() - inicio)
+
+    return {"error_relativo_max": peor, "recalculo_muestras_s": completo,
+            "incremental_muestras_s": incremental}
+
+
+if __name__ == "__main__":
+    n_muestras = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    ventana = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    r = medir(n_muestras, ventana)
+    print(f"Error relativo máximo: {r['error_relativo_max']:.2e}")
+    print(f"Recálculo completo: {r['recalculo_muestras_s']:>12,.0f} muestras/s")
+    print(f"Incremental:        {r['incremental_muestras_s']:>12,.0f} muestras/s")
@@ -0,0 +1,48 @@
+"""Escalamiento de `MonitorFlota` con el número de trabajadores y de vehículos.
+
+Uso: python -m benchmarks.bench_flota [vehiculos ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+from mantenimiento.flota import MonitorFlota
+
+
+def generar_ticks(n_vehiculos, n_ticks, muestras_por_tick=10, seed=42):
+    rng = np.random.default_rng(seed)
+    rpm = rng.normal(3000, 500, (n_ticks, n_vehiculos, muestras_por_tick))
+    temperatura = rng.normal(35, 10, (n_ticks, n_vehiculos))
+    return [{f"V{v:05d}": (rpm[t, v], temperatura[t, v]) for v in range(n_vehiculos)} for t in range(n_ticks)]
+
+
+def medir(vehiculos=(100, 1_000, 5_000), trabajadores=None, n_ticks=5):
+    trabajadores = trabajadores or sorted({1, 2, 4, os.cpu_count() or 1})
+    resultados = []
+    for n_vehiculos in vehiculos:
+        ticks = generar_ticks(n_vehiculos, n_ticks)
+        for modo in ("hilos", "procesos"):
+            for n in trabajadores:
+                monitor = MonitorFlota(n, modo)
+                try:
+                    monitor.actualizar(ticks[0])  # Calentamiento: crea estados y procesos
+                    inicio = time.perf_counter()
+                    for lote in ticks[1:]:
+                        monitor.actualizar(lote)
+                    duracion = time.perf_counter() - inicio
+                    assert len(monitor.resumen()) == n_vehiculos
+                finally:
+                    monitor.cerrar()
+                resultados.append({"vehiculos": n_vehiculos, "modo": modo, "trabajadores": n,
+                                   "vehiculos_s": n_vehiculos * (n_ticks - 1) / duracion})
+    return resultados
+
+
+if __name__ == "__main__":
+    vehiculos = [int(a) for a in sys.argv[1:]] or [100, 1_000, 5_000]
+    print(f"Núcleos disponibles: {os.cpu_count()}")
+    for r in medir(vehiculos):
+        print(f"{r['vehiculos']:>6} vehículos | {r['modo']:<8} x{r['trabajadores']:<2} | "
+              f"{r['vehiculos_s']:>10,.0f} evaluaciones/s")
@@ -0,0 +1,133 @@
+"""Costo de formatear la hora y el texto de cada alerta.
+
+Compara, por alerta, el camino anterior (`datetime.now` con pytz y tres
+`strftime` por llamada, más el texto armado de cero) con el reloj cacheado
+por segundo y las plantillas precompiladas: una alerta suelta como las del
+tablero y un tick de flota en el que muchos vehículos alertan a la vez
+(`mensajes_alerta`). También mide la hora de una muestra (`hora_de_muestra`)
+y comprueba que los textos no cambian.
+
+Uso: python -m benchmarks.bench_formato [vehículos]
+"""
+import sys
+import timeit
+from datetime import datetime
+
+from mantenimiento.alertas import construir_mensaje
+from mantenimiento.analisis import SIN_FALLO_TEXTO
+from mantenimiento.monitoreo import UMBRALES_POR_DEFECTO, mensaje_alerta, mensajes_alerta
+from mantenimiento.reloj import hora_de_muestra, obtener_fecha_hora_mty
+
+try:
+    import pytz
+
+    ZONA_ANTERIOR = pytz.timezone("America/Monterrey")
+except ImportError:  # Sin pytz, la misma zona sin caché
+    from mantenimiento.reloj import ZONA_HORARIA as ZONA_ANTERIOR
+
+IRREGULARIDADES = ["Alta variación en RPM (18.2%)", "Patrón irregular detectado"]
+FALLO = "Bujías desgastadas"
+
+
+# ---- Implementación anterior, como referencia ----
+def _fecha_hora_anterior():
+    ahora = datetime.now(ZONA_ANTERIOR)
+    return ahora.strftime("%Y-%m-%d %H:%M:%S"), ahora.strftime("%A, %d de %B de %Y"), ahora.strftime("%H:%M:%S")
+
+
+def _hora_de_muestra_anterior(segundos):
+    return datetime.fromtimestamp(segundos, ZONA_ANTERIOR).strftime("%H:%M:%S")
+
+
+def _mensaje_alerta_anterior(tipo, resultado, umbrales, hora, vehiculo=None):
+    rpm, temp = resultado["rpm"], resultado["temperatura"]
+    linea_vehiculo = f"• Vehículo: {vehiculo}\n" if vehiculo is not None else ""
+    nivel = resultado.get("niveles_alerta", {}).get(tipo, 1)
+    escalada = f"🔺 ESCALADA (nivel {nivel}): la condición sigue activa\n" if nivel > 1 else ""
+    return escalada + (f"🚨 ALERTA: Temperatura crítica detectada\n\n{linea_vehiculo}• Valor actual: {temp:.1f}°C\n"
+                       f"• Umbral máximo: {umbrales['temp_max']}°C\n• Hora de la muestra: {hora}\n• RPM: {rpm:.0f}")
+
+
+def _construir_mensaje_anterior(mensaje, fecha_formateada, hora_actual, irregularidades=None, fallo_probable=None):
+    partes = [f"🕒 {fecha_formateada}\n⏰ Hora: {hora_actual}\n\n{mensaje}"]
+    if irregularidades:
+        partes.append("\n\n🔍 **Irregularidades detectadas:**")
+        partes.extend(f"\n• {irregularidad}" for irregularidad in irregularidades)
+    hay_fallo = bool(fallo_probable) and fallo_probable != SIN_FALLO_TEXTO
+    if hay_fallo:
+        partes.append(f"\n\n⚠️ **Fallo más probable:** {fallo_probable}")
+    if irregularidades or hay_fallo:
+        partes.append("\n\n🔧 **Recomendación:** Verificar sistema inmediatamente")
+    return "".join(partes)
+
+
+def resultados_flota(n_vehiculos):
+    """Resultados de un tick en el que todos los vehículos tienen alerta de temperatura"""
+    return {f"Vehículo {v + 1}": {"rpm": 3000.0 + v, "temperatura": 41.0 + v % 10 / 10, "alertas": ["temperatura"],
+                                  "niveles_alerta": {"temperatura": 1 + v % 3},
+                                  "irregularidades": IRREGULARIDADES, "fallo_principal": FALLO}
+            for v in range(n_vehiculos)}
+
+
+def flota_anterior(resultados):
+    fecha_formateada, hora_actual = _fecha_hora_anterior()[1:]
+    textos = []
+    for vehiculo, r in resultados.items():
+        for tipo in r["alertas"]:
+            mensaje = _mensaje_alerta_anterior(tipo, r, UMBRALES_POR_DEFECTO, hora_actual, vehiculo)
+            _, fecha_formateada, hora = _fecha_hora_anterior()  # Cada envío vuelve a leer la hora
+            textos.append(_construir_mensaje_anterior(mensaje, fecha_formateada, hora, r["irregularidades"],
+                                                      r["fallo_principal"]))
+    return textos
+
+
+def flota_actual(resultados):
+    textos = []
+    for mensaje, irregularidades, fallo_principal in mensajes_alerta(resultados, UMBRALES_POR_DEFECTO,
+                                                                     obtener_fecha_hora_mty()[2]):
+        _, fecha_formateada, hora = obtener_fecha_hora_mty()
+        textos.append(construir_mensaje(mensaje, fecha_formateada, hora, irregularidades, fallo_principal))
+    return textos
+
+
+def por_llamada(funcion, n):
+    """Segundos por llamada (mejor de 5)"""
+    return min(timeit.repeat(funcion, number=n, repeat=5)) / n
+
+
+def medir(n_vehiculos=1_000):
+    resultado = {"temperatura": 45.3, "rpm": 3120.0, "niveles_alerta": {"temperatura": 2}}
+
+    def alerta_anterior():
+        _, fecha_formateada, hora_actual = _fecha_hora_anterior()
+        mensaje = _mensaje_alerta_anterior("temperatura", resultado, UMBRALES_POR_DEFECTO, hora_actual, "Vehículo 1")
+        return _construir_mensaje_anterior(mensaje, fecha_formateada, hora_actual, IRREGULARIDADES, FALLO)
+
+    def alerta_actual():
+        _, fecha_formateada, hora_actual = obtener_fecha_hora_mty()
+        mensaje = mensaje_alerta("temperatura", resultado, UMBRALES_POR_DEFECTO, hora_actual, "Vehículo 1")
+        return construir_mensaje(mensaje, fecha_formateada, hora_actual, IRREGULARIDADES, FALLO)
+
+    flota = resultados_flota(n_vehiculos)
+    # Mismo texto con ambos caminos (salvo que el segundo cambie entre las dos llamadas)
+    iguales = alerta_anterior() == alerta_actual() and flota_anterior(flota) == flota_actual(flota)
+    muestra = 1_760_000_000.5
+    return {
+        "iguales": iguales,
+        "reloj": (por_llamada(_fecha_hora_anterior, 20_000), por_llamada(obtener_fecha_hora_mty, 200_000)),
+        "hora_muestra": (por_llamada(lambda: _hora_de_muestra_anterior(muestra), 20_000),
+                         por_llamada(lambda: hora_de_muestra(muestra), 200_000)),
+        "alerta": (por_llamada(alerta_anterior, 10_000), por_llamada(alerta_actual, 50_000)),
+        "vehiculos": n_vehiculos,
+        "flota": (por_llamada(lambda: flota_anterior(flota), 5) / n_vehiculos,
+                  por_llamada(lambda: flota_actual(flota), 20) / n_vehiculos),
+    }
+
+
+if __name__ == "__main__":
+    r = medir(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000)
+    print(f"Textos idénticos al camino anterior: {'sí' if r['iguales'] else 'NO'}")
+    for clave, titulo in (("reloj", "Fecha y hora actuales"), ("hora_muestra", "Hora de una muestra"),
+                          ("alerta", "Alerta completa"), ("flota", f"Alerta en un tick de {r['vehiculos']:,} vehículos")):
+        antes, ahora = r[clave]
+        print(f"{titulo:<38} antes {antes * 1e6:7.2f} µs | ahora {ahora * 1e6:6.2f} µs ({antes / ahora:4.1f}x)")
@@ -0,0 +1,69 @@
+"""Tiempo de dibujo por tick: `px.line` sobre todo el prefijo contra `GraficoEnVivo`.
+
+Se mide construir la figura y serializarla (lo que `st.plotly_chart` envía al
+navegador) con series de 1k, 100k y 1M muestras ya acumuladas.
+
+Uso: python -m benchmarks.bench_graficos [muestras ...]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from mantenimiento.graficos import GraficoEnVivo
+
+VARIABLES = ["RPM", "Temperatura (°C)"]
+
+
+def _serie(n, seed=42):
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype=np.float64), rng.normal(3000, 500, n), rng.normal(35, 10, n)
+
+
+def medir_px_line(n, repeticiones=3):
+    x, rpm, temp = _serie(n)
+    datos = pd.DataFrame({"Hora": x, "RPM": rpm, "Temperatura (°C)": temp})
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subset = datos.iloc[:n]
+        px.line(subset, x="Hora", y=VARIABLES, title="Tendencias").to_json()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def medir_incremental(n, repeticiones=20, por_tick=10, presupuesto=2000):
+    x, rpm, temp = _serie(n + repeticiones * por_tick)
+    grafico = GraficoEnVivo(VARIABLES, "Tendencias", presupuesto=presupuesto)
+    grafico.agregar(x[:n], {"RPM": rpm[:n], "Temperatura (°C)": temp[:n]})
+    mejor = float("inf")
+    for r in range(repeticiones):
+        a, b = n + r * por_tick, n + (r + 1) * por_tick
+        inicio = time.perf_counter()
+        grafico.agregar(x[a:b], {"RPM": rpm[a:b], "Temperatura (°C)": temp[a:b]})
+        figura = grafico.mostrar(VARIABLES)
+        figura.to_json()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    puntos = sum(len(t.x) for t in figura.data)
+    assert puntos <= presupuesto * len(VARIABLES)
+    # El diezmado conserva los extremos de la serie completa
+    assert max(figura.data[0].y) == rpm[:b].max() and min(figura.data[0].y) == rpm[:b].min()
+    return mejor, puntos
+
+
+def medir(tamanos=(1_000, 100_000, 1_000_000)):
+    resultados = {}
+    for n in tamanos:
+        incremental, puntos = medir_incremental(n)
+        resultados[n] = {"px_line_ms": medir_px_line(n, 1 if n >= 1_000_000 else 3) * 1000,
+                         "incremental_ms": incremental * 1000, "puntos_dibujados": puntos}
+    return resultados
+
+
+if __name__ == "__main__":
+    tamanos = [int(a) for a in sys.argv[1:]] or [1_000, 100_000, 1_000_000]
+    for n, r in medir(tamanos).items():
+        print(f"{n:>9,} muestras | px.line: {r['px_line_ms']:>9.1f} ms/tick | "
+              f"incremental: {r['incremental_ms']:>6.1f} ms/tick ({r['puntos_dibujados']} puntos)")
@@ -0,0 +1,61 @@
+"""Mide el tiempo de importación en frío del núcleo frente a la pila de la interfaz.
+
+Cada importación corre en un intérprete nuevo (`python -X importtime`), así
+que incluye todo lo que el módulo arrastra. También verifica que el núcleo
+no cargue streamlit, plotly, pandas ni requests.
+
+Uso: python -m benchmarks.bench_importacion [repeticiones]
+"""
+import os
+import subprocess
+import sys
+
+MODULOS = (
+    "mantenimiento",
+    "mantenimiento.monitoreo",
+    "mantenimiento.__main__",
+    "numpy",
+    "pandas",
+    "plotly.express",
+    "streamlit",
+)
+PESADOS = ("streamlit", "plotly", "pandas", "requests", "serial")
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def importar(modulo):
+    """(segundos acumulados de la importación, módulos cargados) en un proceso nuevo"""
+    codigo = f"import sys, {modulo}; print(' '.join(sys.modules))"
+    salida = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], cwd=RAIZ,
+                            capture_output=True, text=True, check=True)
+    total = 0
+    # import time: self [us] | cumulative | imported package; se suman los de primer nivel
+    # posteriores al arranque del intérprete (site y lo que carga)
+    for linea in salida.stderr.splitlines()[::-1]:
+        campos = linea.split("|")
+        if len(campos) != 3 or campos[2].startswith("  ") or not campos[1].strip().isdigit():
+            continue
+        if campos[2].strip() == "site":
+            break
+        total += int(campos[1])
+    return total / 1e6, set(salida.stdout.split())
+
+
+def medir(repeticiones=5):
+    resultados = {}
+    for modulo in MODULOS:
+        tiempos = []
+        for _ in range(repeticiones):
+            segundos, cargados = importar(modulo)
+            tiempos.append(segundos)
+        resultados[modulo] = min(tiempos)
+        if modulo.startswith("mantenimiento"):
+            arrastrados = [p for p in PESADOS if p in cargados]
+            assert not arrastrados, f"{modulo} importa {arrastrados}"
+    return resultados
+
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for modulo, segundos in medir(repeticiones).items():
+        print(f"{modulo:<24} {segundos * 1000:8.1f} ms")
@@ -0,0 +1,86 @@
+"""Prueba de carga de la ingesta: reproducción a 1–10 kHz y un pty como puerto serial.
+
+Uso: python -m benchmarks.bench_ingesta [segundos]
+"""
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from mantenimiento.ingesta import FuenteReproduccion, FuenteSerial, Ingesta
+
+
+def medir_reproduccion(frecuencia_hz, segundos=2.0, refresco=0.1):
+    """Consume como lo haría la interfaz (un snapshot por refresco)"""
+    rng = np.random.default_rng(42)
+    grabacion = np.column_stack([rng.normal(3000, 500, 50_000), rng.normal(35, 10, 50_000)])
+    ingesta = Ingesta(FuenteReproduccion(grabacion, frecuencia_hz), capacidad=8192)
+    cursor, recibidas, peor_lectura = None, 0, 0.0
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        inicio = time.perf_counter()
+        nuevas, cursor, _ = ingesta.leer(cursor)
+        peor_lectura = max(peor_lectura, time.perf_counter() - inicio)
+        recibidas += len(nuevas)
+        time.sleep(refresco)
+    ingesta.detener()
+    metricas = ingesta.metricas()
+    return {"frecuencia_hz": frecuencia_hz, "tasa_efectiva_hz": recibidas / segundos,
+            "perdidas": metricas["perdidas"], "peor_lectura_ms": peor_lectura * 1000}
+
+
+def medir_contrapresion(segundos=1.0):
+    """Un consumidor lento con fuente pausable: el productor espera en vez de perder"""
+    grabacion = np.tile([[3000.0, 35.0]], (1000, 1))
+    ingesta = Ingesta(FuenteReproduccion(grabacion, 10_000), capacidad=1024)
+    cursor, recibidas = None, 0
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        nuevas, cursor, _ = ingesta.leer(cursor)
+        recibidas += len(nuevas)
+        time.sleep(0.2)
+    ingesta.detener()
+    metricas = ingesta.metricas()
+    assert metricas["perdidas"] == 0
+    return {"recibidas": recibidas, "esperas_productor": metricas["esperas"]}
+
+
+def medir_pty(n_tramas=20_000):
+    """Escribe tramas en el extremo maestro de un pty y las lee con pyserial"""
+    maestro, esclavo = os.openpty()
+    ingesta = Ingesta(FuenteSerial(os.ttyname(esclavo), timeout=0.01))
+    tramas = b"".join(b"%d,%.1f\n" % (3000 + i % 500, 35.0) for i in range(n_tramas)) + b"basura\n"
+
+    def escribir():
+        for i in range(0, len(tramas), 4096):
+            os.write(maestro, tramas[i:i + 4096])
+
+    inicio = time.perf_counter()
+    threading.Thread(target=escribir, daemon=True).start()
+    cursor, recibidas = None, 0
+    while recibidas < n_tramas and time.perf_counter() - inicio < 10:
+        nuevas, cursor, _ = ingesta.leer(cursor)
+        recibidas += len(nuevas)
+        time.sleep(0.005)
+    duracion = time.perf_counter() - inicio
+    time.sleep(0.05)
+    malformadas = ingesta.metricas()["malformadas"]
+    ingesta.detener()
+    os.close(maestro)
+    os.close(esclavo)
+    assert recibidas == n_tramas, (recibidas, n_tramas)
+    return {"tramas_s": recibidas / duracion, "malformadas": malformadas}
+
+
+if __name__ == "__main__":
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    for frecuencia in (1_000, 5_000, 10_000):
+        r = medir_reproduccion(frecuencia, segundos)
+        print(f"Reproducción {frecuencia:>6} Hz -> {r['tasa_efectiva_hz']:>8,.0f} Hz efectivos | "
+              f"perdidas: {r['perdidas']} | peor snapshot: {r['peor_lectura_ms']:.3f} ms")
+    r = medir_contrapresion()
+    print(f"Contrapresión: {r['recibidas']} recibidas sin pérdidas, {r['esperas_productor']} esperas del productor")
+    r = medir_pty()
+    print(f"Serial (pty): {r['tramas_s']:,.0f} tramas/s | malformadas: {r['malformadas']}")
@@ -0,0 +1,194 @@
+"""Costo de la instrumentación del camino caliente.
+
+Corre a la vez tres copias del mismo ciclo de monitoreo (evaluación por
+tick, armado de alertas y el gráfico en vivo): una instrumentada y dos sin
+instrumentar, intercaladas tick a tick con el orden rotando en cada tick
+(y copias nuevas en cada tramo de ticks), para que el ruido de la máquina
+(otros procesos, frecuencia, cachés) caiga por igual en las tres. El sobrecosto es la mediana, entre bloques de ticks,
+del cociente instrumentada / sin instrumentar; la segunda copia sin
+instrumentar da el ruido de la medición (A/A) y el remuestreo de los
+bloques, el intervalo de confianza de la mediana. Falla si el sobrecosto
+medido no queda bajo el 1% o si el ruido no permite afirmarlo. Comprueba
+además que con MIA_INSTRUMENTACION=0 no queda ninguna envoltura y consulta
+el endpoint de Prometheus servido localmente.
+
+Uso: python -m benchmarks.bench_instrumentacion [ticks] [ticks por bloque]
+"""
+import os
+import subprocess
+import sys
+import time
+import timeit
+import urllib.request
+
+import numpy as np
+
+OBJETIVO = 0.01  # Sobrecosto máximo aceptado
+POR_TRAMO = 1_000  # Ticks de cada juego de copias del ciclo
+
+
+def preparar_ticks(n_ticks):
+    from mantenimiento.sinteticos import GeneradorFlota
+
+    bloque = GeneradorFlota(1, 10.0, inicio=0, fallos_por_dia=200).generar(n_ticks * 10)
+    tiempos, rpm, temperatura = (bloque[c].reshape(n_ticks, 10) for c in ("tiempo", "rpm", "temperatura"))
+    return [(tiempos[i], rpm[i], temperatura[i], "", None, "") for i in range(n_ticks)]
+
+
+def pasos(ticks):
+    """El ciclo de monitoreo sobre `ticks` (evaluación, alertas y gráfico en vivo), un tick por `next`"""
+    from mantenimiento import alertas
+    from mantenimiento.graficos import GraficoEnVivo
+    from mantenimiento.monitoreo import monitorear
+
+    grafico = GraficoEnVivo(["RPM", "Temperatura (°C)"])
+    mensajes = []
+
+    def enviar(mensaje, irregularidades, fallo_principal):
+        mensajes.append(alertas.construir_mensaje(mensaje, "", "", irregularidades, fallo_principal))
+
+    for i, resultado in enumerate(monitorear(ticks, enviar=enviar, vehiculo="Vehículo 1")):
+        grafico.agregar(resultado["tiempos"], {"RPM": resultado["rpm_nuevas"], "Temperatura (°C)": resultado["temp_nuevas"]})
+        if i % 50 == 0:  # La vista dibuja a ~10 Hz, no en cada tick
+            grafico.mostrar(["RPM", "Temperatura (°C)"])
+        yield
+
+
+def _instrumentadas():
+    """(objeto, atributo) de las funciones instrumentadas que recorre la carga"""
+    from mantenimiento import alertas
+    from mantenimiento.graficos import GraficoEnVivo
+
+    return [(alertas, "construir_mensaje"), (GraficoEnVivo, "mostrar")]
+
+
+def _sin_registrador(nombre, muestreo=1):
+    return None
+
+
+def comparar_intercalado(n_ticks, por_bloque):
+    """Segundos por bloque de `por_bloque` ticks de cada copia: instrumentada, sin instrumentar y control.
+
+    Antes de cada tick se ponen las funciones de su copia: las envolturas o
+    las originales (`__wrapped__`) y, para la evaluación que `monitorear`
+    mide desde el ciclo, el registrador o ninguno (se toma en el primer tick).
+    """
+    from mantenimiento import instrumentacion, monitoreo
+
+    ticks = preparar_ticks(n_ticks)
+    envolturas = {(objeto, nombre): getattr(objeto, nombre) for objeto, nombre in _instrumentadas()}
+    modos = ("activa", "inactiva", "control")
+    for _ in pasos(ticks[:200]):  # Calentamiento (importaciones y cachés del gráfico)
+        pass
+    tiempos = {modo: np.empty(n_ticks) for modo in modos}
+    reloj = time.perf_counter
+    try:
+        for i in range(n_ticks):
+            if i % POR_TRAMO == 0:
+                # Copias nuevas por tramo: ninguna conserva una ventaja fija de memoria o de caché
+                copias = {modo: pasos(ticks[i:i + POR_TRAMO]) for modo in modos}
+            for modo in modos[i % 3:] + modos[:i % 3]:
+                activa = modo == "activa"
+                for (objeto, nombre), funcion in envolturas.items():
+                    setattr(objeto, nombre, funcion if activa else funcion.__wrapped__)
+                monitoreo.registrador = instrumentacion.registrador if activa else _sin_registrador
+                inicio = reloj()
+                next(copias[modo])
+                tiempos[modo][i] = reloj() - inicio
+    finally:
+        for (objeto, nombre), funcion in envolturas.items():
+            setattr(objeto, nombre, funcion)
+        monitoreo.registrador = instrumentacion.registrador
+    n = n_ticks // por_bloque * por_bloque
+    return {modo: t[:n].reshape(-1, por_bloque).sum(axis=1) for modo, t in tiempos.items()}
+
+
+def _mediana_con_intervalo(cocientes, remuestreos=2_000, semilla=0):
+    """Mediana - 1 y semiancho del intervalo de confianza del 95% (remuestreo de los bloques)"""
+    rng = np.random.default_rng(semilla)
+    medianas = np.median(rng.choice(cocientes, (remuestreos, len(cocientes))), axis=1)
+    bajo, alto = np.percentile(medianas, [2.5, 97.5])
+    return float(np.median(cocientes)) - 1, float(alto - bajo) / 2
+
+
+def desactivada_sin_envolturas():
+    """Con MIA_INSTRUMENTACION=0 las funciones quedan sin envolver y el ciclo sin registrador (costo cero)"""
+    codigo = ("from benchmarks.bench_instrumentacion import _instrumentadas;"
+              "from mantenimiento.instrumentacion import registrador;"
+              "print(sum(hasattr(getattr(o, n), '__wrapped__') for o, n in _instrumentadas())"
+              " + (registrador('monitoreo.evaluar_vehiculo') is not None))")
+    salida = subprocess.run([sys.executable, "-c", codigo], env=dict(os.environ, MIA_INSTRUMENTACION="0"),
+                            capture_output=True, text=True, check=True).stdout
+    return int(salida) == 0
+
+
+def costo_por_llamada(muestreos=(1,), n=200_000):
+    """Nanosegundos que agregan el decorador (por muestreo) y el contexto a una llamada vacía"""
+    from mantenimiento.instrumentacion import instrumentar, medir
+
+    def vacia():
+        pass
+
+    base = min(timeit.repeat(vacia, number=n, repeat=5)) / n
+    decorador = {}
+    for muestreo in muestreos:
+        decorada = instrumentar(f"bench.vacia_{muestreo}", muestreo)(vacia)
+        decorador[muestreo] = (min(timeit.repeat(decorada, number=n, repeat=5)) / n - base) * 1e9
+
+    def con_contexto():
+        with medir("bench.contexto"):
+            pass
+
+    contexto = min(timeit.repeat(con_contexto, number=n, repeat=5)) / n
+    return decorador, contexto * 1e9
+
+
+def consultar_prometheus():
+    from mantenimiento import instrumentacion
+
+    servidor = instrumentacion.servir_metricas(0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{servidor.server_address[1]}/metrics", timeout=5) as r:
+            texto = r.read().decode()
+    finally:
+        servidor.shutdown()
+    assert 'mia_duracion_segundos{operacion="monitoreo.evaluar_vehiculo",quantile="0.99"}' in texto
+    return len(texto.splitlines())
+
+
+def medir(n_ticks=30_000, por_bloque=100):
+    from mantenimiento import instrumentacion
+
+    tiempos = comparar_intercalado(n_ticks, por_bloque)
+    sobrecosto, intervalo = _mediana_con_intervalo(tiempos["activa"] / tiempos["inactiva"])
+    ruido, _ = _mediana_con_intervalo(tiempos["control"] / tiempos["inactiva"])
+    decorador_ns, contexto_ns = costo_por_llamada()
+    return {
+        "ticks": n_ticks,
+        "bloques": len(tiempos["activa"]),
+        "tick_us": float(np.median(tiempos["inactiva"])) / por_bloque * 1e6,
+        "sobrecosto": sobrecosto,
+        "intervalo": intervalo,
+        "ruido": ruido,
+        "sin_envolturas": desactivada_sin_envolturas(),
+        "decorador_ns": decorador_ns,
+        "contexto_ns": contexto_ns,
+        "lineas_prometheus": consultar_prometheus() if instrumentacion.ACTIVA else None,
+    }
+
+
+if __name__ == "__main__":
+    n_ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    por_bloque = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    r = medir(n_ticks, por_bloque)
+    print(f"{r['ticks']:,} ticks intercalados en {r['bloques']} bloques | {r['tick_us']:.1f} µs por tick sin "
+          f"instrumentar | sobrecosto medido: {r['sobrecosto'] * 100:+.2f}% ± {r['intervalo'] * 100:.2f}% "
+          f"(IC 95%) | ruido A/A: {r['ruido'] * 100:+.2f}%")
+    print(f"Desactivada (MIA_INSTRUMENTACION=0): {'sin envolturas' if r['sin_envolturas'] else 'QUEDAN ENVOLTURAS'}")
+    print("Por llamada: " + ", ".join(f"decorador{f' 1/{m}' if m > 1 else ''} {ns:.0f} ns"
+                                      for m, ns in r["decorador_ns"].items())
+          + f" | contexto {r['contexto_ns']:.0f} ns")
+    if r["lineas_prometheus"] is not None:
+        print(f"Endpoint de Prometheus: {r['lineas_prometheus']} líneas")
+    assert abs(r["ruido"]) + r["intervalo"] < OBJETIVO, "La medición es demasiado ruidosa para confirmar el objetivo"
+    assert r["sobrecosto"] + r["intervalo"] < OBJETIVO, f"Sobrecosto medido sobre {OBJETIVO:.0%}"
@@ -0,0 +1,133 @@
+"""Compara el detector aprendido (`ModeloAnomalias`) con las reglas fijas.
+
+Genera telemetría reproducida de una flota donde cada motor tiene su propia
+línea base (RPM y temperatura de operación distintas) y, en la segunda mitad,
+fallos etiquetados: refrigeración (la temperatura sube sin llegar
+necesariamente a 40 °C), encendido (RPM más ruidosas), bujías (caídas
+intermitentes) y sobrecarga (más RPM y temperatura). El modelo se entrena con
+la primera mitad y ambos métodos se evalúan por ventana sobre la segunda.
+
+Uso: python -m benchmarks.bench_modelo [vehiculos] [muestras_por_vehiculo]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from mantenimiento.analisis import analizar_flota
+from mantenimiento.modelo import ModeloAnomalias, caracteristicas_serie
+
+TAMANO = 10
+FALLOS = ("refrigeracion", "encendido", "bujias", "sobrecarga")
+
+
+def generar_vehiculo(linea_base, n_muestras, rng, fallos=True):
+    """(rpm, temperatura, etiqueta) de un vehículo; la etiqueta es 1 durante un fallo"""
+    rpm_base, ruido, temp_base = linea_base
+    rpm = rpm_base + rng.normal(0, ruido, n_muestras)
+    temperatura = temp_base + rng.normal(0, 0.5, n_muestras)
+    etiqueta = np.zeros(n_muestras, dtype=bool)
+    if fallos:
+        for inicio in rng.choice(n_muestras - 2000, 8, replace=False):
+            largo = int(rng.integers(300, 2000))
+            tramo = slice(inicio, inicio + largo)
+            tipo = FALLOS[rng.integers(len(FALLOS))]
+            if tipo == "refrigeracion":
+                temperatura[tramo] += np.linspace(0, rng.uniform(6, 15), largo)
+            elif tipo == "encendido":
+                rpm[tramo] += rng.normal(0, ruido * rng.uniform(2, 4), largo)
+            elif tipo == "bujias":
+                caidas = rng.random(largo) < 0.15
+                rpm[tramo] -= caidas * rpm_base * rng.uniform(0.2, 0.4)
+            else:
+                rpm[tramo] *= 1.25
+                temperatura[tramo] += 5
+            etiqueta[tramo] = True
+    return rpm, temperatura, etiqueta
+
+
+def generar_flota(n_vehiculos, n_muestras, seed=42):
+    """Por vehículo: historial limpio de entrenamiento y tramo de evaluación con fallos"""
+    rng = np.random.default_rng(seed)
+    flota = {}
+    for v in range(n_vehiculos):
+        linea_base = (rng.uniform(1800, 3200), rng.uniform(30, 150), rng.uniform(22, 32))
+        entrenamiento = generar_vehiculo(linea_base, n_muestras // 2, rng, fallos=False)
+        evaluacion = generar_vehiculo(linea_base, n_muestras // 2, rng, fallos=True)
+        flota[f"Vehículo {v + 1}"] = (entrenamiento, evaluacion)
+    return flota
+
+
+def precision_exhaustividad(prediccion, etiqueta):
+    verdaderos = (prediccion & etiqueta).sum()
+    precision = verdaderos / max(prediccion.sum(), 1)
+    exhaustividad = verdaderos / max(etiqueta.sum(), 1)
+    f1 = 2 * precision * exhaustividad / max(precision + exhaustividad, 1e-12)
+    return float(precision), float(exhaustividad), float(f1)
+
+
+def medir(n_vehiculos=20, n_muestras=100_000, paso_entrenamiento=5):
+    flota = generar_flota(n_vehiculos, n_muestras)
+
+    inicio = time.perf_counter()
+    modelo = ModeloAnomalias.ajustar({
+        nombre: caracteristicas_serie(rpm, temp, TAMANO, paso_entrenamiento)[0]
+        for nombre, ((rpm, temp, _), _) in flota.items()
+    }, TAMANO)
+    entrenamiento_s = time.perf_counter() - inicio
+
+    # Persistencia: se evalúa con el modelo recargado de disco
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "modelo.npz")
+        modelo.guardar(ruta)
+        modelo = ModeloAnomalias.cargar(ruta)
+
+    # Ventanas de evaluación de toda la flota (la etiqueta es la de la última muestra)
+    ventanas, temperaturas, etiquetas, indices = [], [], [], []
+    for nombre, (_, (rpm, temp, etiqueta)) in flota.items():
+        fin = np.arange(TAMANO - 1, len(rpm))
+        indices.append(np.full(len(fin), modelo.indices(nombre)))
+        ventanas.append(np.lib.stride_tricks.sliding_window_view(rpm, TAMANO))
+        temperaturas.append(temp[fin])
+        etiquetas.append(etiqueta[fin])
+    ventanas, temperaturas = np.concatenate(ventanas), np.concatenate(temperaturas)
+    etiquetas, indices = np.concatenate(etiquetas), np.concatenate(indices)
+    n_ventanas = len(etiquetas)
+
+    inicio = time.perf_counter()
+    resultado = analizar_flota(ventanas, temperaturas)
+    reglas_s = time.perf_counter() - inicio
+    reglas = (resultado.irregularidades != 0) | (resultado.fallos != 0)
+
+    inicio = time.perf_counter()
+    x = np.concatenate([caracteristicas_serie(rpm, temp, TAMANO)[0] for _, (rpm, temp, _) in flota.values()])
+    caracteristicas_s = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    aprendido, _ = modelo.anomalas(x, indices)
+    puntaje_s = time.perf_counter() - inicio
+
+    return {
+        "ventanas": n_ventanas,
+        "fraccion_con_fallo": float(etiquetas.mean()),
+        "entrenamiento_s": entrenamiento_s,
+        "reglas": precision_exhaustividad(reglas, etiquetas),
+        "aprendido": precision_exhaustividad(aprendido, etiquetas),
+        "reglas_ventanas_ms": n_ventanas / reglas_s / 1000,
+        "aprendido_ventanas_ms": n_ventanas / (caracteristicas_s + puntaje_s) / 1000,
+        "puntaje_ventanas_ms": n_ventanas / puntaje_s / 1000,
+    }
+
+
+if __name__ == "__main__":
+    n_vehiculos = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_muestras = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    r = medir(n_vehiculos, n_muestras)
+    print(f"Ventanas evaluadas: {r['ventanas']:,} ({r['fraccion_con_fallo'] * 100:.1f}% con fallo) | "
+          f"entrenamiento {r['entrenamiento_s'] * 1000:.0f} ms")
+    print(f"{'':<12}{'precisión':>10}{'exhaust.':>10}{'F1':>8}{'ventanas/ms':>14}")
+    print(f"{'Reglas':<12}{r['reglas'][0]:>10.3f}{r['reglas'][1]:>10.3f}{r['reglas'][2]:>8.3f}"
+          f"{r['reglas_ventanas_ms']:>14,.0f}")
+    print(f"{'Aprendido':<12}{r['aprendido'][0]:>10.3f}{r['aprendido'][1]:>10.3f}{r['aprendido'][2]:>8.3f}"
+          f"{r['aprendido_ventanas_ms']:>14,.0f}  (solo puntaje: {r['puntaje_ventanas_ms']:,.0f})")
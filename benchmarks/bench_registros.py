@@ -0,0 +1,131 @@
+"""Importación masiva de registros de manejo CSV/Parquet con análisis por ventanas.
+
+Escribe un registro sintético de `GeneradorFlota` (100 vehículos a 10 Hz,
+muestras intercaladas, con episodios de fallo) y mide `analizar_registro`
+de punta a punta: lectura por bloques con tipos fijos (float32), análisis de
+irregularidades por ventana y exportación de la tabla por ventana, en GB de
+CSV por minuto (objetivo: más de 1 GB/min en un núcleo). Cada importación
+corre en un proceso nuevo para informar su memoria pico (RSS). Comprueba
+además que el resultado no depende del tamaño de los bloques (arrastre de
+ventanas y de huecos entre bloques, con pasos menores, iguales y mayores que
+la ventana) y que coincide con analizar cada vehículo completo de una vez.
+
+Uso: python -m benchmarks.bench_registros [MB de CSV]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from mantenimiento.analisis import analizar_flota
+from mantenimiento.registros import AnalisisVentanas, LectorRegistro
+from mantenimiento.sinteticos import GeneradorFlota
+
+N_VEHICULOS = 100
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRECUENCIA = 10.0
+
+
+def escribir_registro(ruta, megabytes, formato="csv"):
+    """Registro sintético de unos `megabytes` (en CSV); devuelve las filas escritas"""
+    import pyarrow as pa
+    from pyarrow import csv, parquet
+
+    generador = GeneradorFlota(N_VEHICULOS, FRECUENCIA, inicio=1_760_000_000, fallos_por_dia=50)
+    nombres = pa.array([f"Vehículo {v + 1}" for v in range(N_VEHICULOS)])
+    total = max(N_VEHICULOS, round(megabytes * 2**20 / 42))  # ~42 bytes por fila de CSV
+    escritor = None
+    filas = 0
+    for bloque in generador.bloques(muestras_por_bloque=min(total, 1 << 20)):
+        tabla = pa.table({
+            "tiempo": bloque["tiempo"],
+            "vehiculo": nombres.take(pa.array(bloque["vehiculo"])),
+            "rpm": bloque["rpm"].round(1),  # Como los registra un equipo de adquisición
+            "temperatura": bloque["temperatura"].round(2),
+        })
+        if escritor is None:
+            escritor = parquet.ParquetWriter(ruta, tabla.schema) if formato == "parquet" else csv.CSVWriter(ruta, tabla.schema)
+        escritor.write_table(tabla)
+        filas += len(tabla)
+        if filas >= total:
+            break
+    escritor.close()
+    return filas
+
+
+def importar(ruta, destino):
+    """(segundos, resumen, memoria pico del proceso en MB) de `analizar_registro` en un proceso nuevo"""
+    codigo = ("import json, resource, sys, time\n"
+              "from mantenimiento.registros import analizar_registro\n"
+              "inicio = time.perf_counter()\n"
+              "resumen = analizar_registro(sys.argv[1], sys.argv[2])\n"
+              "resumen['segundos'] = time.perf_counter() - inicio\n"
+              "resumen['memoria_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024\n"
+              "print(json.dumps(resumen))")
+    salida = subprocess.run([sys.executable, "-c", codigo, ruta, destino], cwd=RAIZ, capture_output=True, text=True,
+                            check=True).stdout
+    resumen = json.loads(salida)
+    return resumen.pop("segundos"), resumen, resumen.pop("memoria_mb")
+
+
+def verificar_arrastre(ruta):
+    """Mismas ventanas con bloques grandes y con bloques que cortan ventanas (o huecos entre
+    ventanas, con `paso` mayor que el tamaño), e iguales a la referencia, para varios pasos"""
+    bloques = list(LectorRegistro(ruta).bloques())
+    propias = np.concatenate([b["vehiculo"] for b in bloques]) == 0
+    rpm = np.concatenate([b["rpm"] for b in bloques])[propias]
+    temperatura = np.concatenate([b["temperatura"] for b in bloques])[propias]
+    for paso in (None, 7, 13, 20):
+        resultados = []
+        for filas_por_bloque in (1 << 20, 9_973, 1_499):
+            analisis = AnalisisVentanas(paso=paso)
+            partes = [analisis.agregar(b) for b in LectorRegistro(ruta, filas_por_bloque=filas_por_bloque).bloques()]
+            r = {c: np.concatenate([p[c] for p in partes]) for c in partes[0]}
+            orden = np.lexsort((r["inicio"], r["vehiculo"]))
+            resultados.append({c: v[orden] for c, v in r.items()})
+        if not all(np.array_equal(resultados[0][c], otro[c], equal_nan=True)
+                   for otro in resultados[1:] for c in resultados[0]):
+            return False
+
+        # Referencia: un vehículo completo en una sola matriz de ventanas
+        ventanas = np.lib.stride_tricks.sliding_window_view(rpm, 10)[::paso or 10]
+        referencia = analizar_flota(np.ascontiguousarray(ventanas), temperatura[9:][::paso or 10])
+        seleccion = resultados[0]["vehiculo"] == 0
+        if not np.array_equal(referencia.fallos, resultados[0]["fallos"][seleccion]):
+            return False
+    return True
+
+
+def medir(megabytes=256):
+    with tempfile.TemporaryDirectory() as directorio:
+        csv = os.path.join(directorio, "registro.csv")
+        parquet = os.path.join(directorio, "registro.parquet")
+        filas = escribir_registro(csv, megabytes)
+        escribir_registro(parquet, megabytes, "parquet")
+        gb = os.path.getsize(csv) / 1e9
+        casos = {}
+        for nombre, fuente, destino in (("CSV -> Parquet", csv, "ventanas.parquet"),
+                                        ("CSV -> CSV", csv, "ventanas.csv"),
+                                        ("Parquet -> Parquet", parquet, "ventanas.parquet")):
+            segundos, resumen, memoria = importar(fuente, os.path.join(directorio, destino))
+            casos[nombre] = {"segundos": segundos, "gb_por_minuto": gb / segundos * 60,
+                             "filas_por_segundo": resumen["filas"] / segundos, "memoria_mb": memoria,
+                             "ventanas": resumen["ventanas"]}
+        pequeno = os.path.join(directorio, "pequeno.csv")
+        escribir_registro(pequeno, 8)
+        return {"gb": gb, "filas": filas, "casos": casos, "por_fallo": resumen["por_fallo"],
+                "arrastre": verificar_arrastre(pequeno)}
+
+
+if __name__ == "__main__":
+    r = medir(float(sys.argv[1]) if len(sys.argv) > 1 else 256)
+    print(f"Registro: {r['gb'] * 1000:,.0f} MB de CSV, {r['filas']:,} filas, {N_VEHICULOS} vehículos intercalados")
+    for nombre, caso in r["casos"].items():
+        print(f"  {nombre:<19} {caso['segundos']:6.2f} s | {caso['gb_por_minuto']:5.2f} GB/min de CSV equivalente | "
+              f"{caso['filas_por_segundo'] / 1e6:5.2f} M filas/s | {caso['ventanas']:,} ventanas | "
+              f"pico {caso['memoria_mb']:.0f} MB RSS")
+    print("Ventanas por fallo principal: " + ", ".join(f"{nombre} {n:,}" for nombre, n in r["por_fallo"].items()))
+    print(f"Independiente del tamaño de bloque e igual a la referencia: {'sí' if r['arrastre'] else 'NO'}")
@@ -0,0 +1,109 @@
+"""Mide cómo escala el motor de reglas compilado con el tamaño de la tabla.
+
+Agrega a la tabla por omisión reglas sintéticas (1 a 3 condiciones sobre
+variables al azar) y evalúa un lote de ventanas con cada tamaño: el costo por
+muestra crece con las reglas solo dentro de operaciones vectorizadas. También
+comprueba que el camino vectorizado coincide con el escalar y la recarga en
+caliente: un cambio en el archivo se aplica sin reiniciar y una tabla
+inválida deja vigente la anterior.
+
+Uso: python -m benchmarks.bench_reglas [muestras]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from mantenimiento import configuracion, reglas
+from mantenimiento.analisis import variables_flota
+from mantenimiento.reglas import VARIABLES, MotorReglas, tomllib
+
+TAMANOS = (8, 32, 128, 512)
+
+
+def tabla_ampliada(n_reglas, seed=42):
+    """Tabla por omisión más reglas sintéticas hasta llegar a `n_reglas`"""
+    with open(configuracion.RUTA_REGLAS, "rb") as f:
+        tabla = tomllib.load(f)
+    rng = np.random.default_rng(seed)
+    escalas = {"variacion": 30, "media": 6000, "min_ultimas": 6000, "max_ultimas": 6000,
+               "std_diferencias": 300, "rpm_actual": 6000, "temperatura": 60,
+               "subarmonicos": 1, "orden_1": 1, "orden_dominante": 4}
+    for k in range(n_reglas - len(tabla["regla"])):
+        si = [f"{v} {rng.choice(['>', '<', '>=', '<='])} {rng.uniform(0, escalas[v]):.1f}"
+              for v in rng.choice(VARIABLES, int(rng.integers(1, 4)), replace=False)]
+        tabla["regla"].append({"nombre": f"sintetica_{k}", "si": si,
+                               "fallos": list(rng.choice(tabla["fallos"], 2, replace=False))})
+    return tabla
+
+
+def verificar_equivalencia(motor, variables, n=2000):
+    """El camino vectorizado y el escalar deben coincidir muestra a muestra"""
+    irregularidades, fallos, principal = motor.evaluar({k: v[:n] for k, v in variables.items()})
+    for i in range(n):
+        fila = {k: float(v[i]) for k, v in variables.items()}
+        esperado = motor.evaluar_uno(fila)
+        obtenido = (motor.describir_irregularidades(int(irregularidades[i]), fila),
+                    motor.nombres_fallos(int(fallos[i])), motor.nombre_fallo(int(principal[i])))
+        assert obtenido == esperado, (i, obtenido, esperado)
+
+
+def verificar_recarga():
+    """Edita una copia de la tabla y comprueba que `motor_reglas` la recarga"""
+    with open(configuracion.RUTA_REGLAS, encoding="utf-8") as f:
+        texto = f.read()
+    intervalo, reglas.INTERVALO_RECARGA = reglas.INTERVALO_RECARGA, 0.0
+    try:
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "reglas.toml")
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write(texto)
+            variables = dict.fromkeys(VARIABLES, float("nan"))
+            variables["variacion"] = 10.0
+            assert not reglas.motor_reglas(ruta).evaluar_uno(variables)[0]
+
+            inicio = time.perf_counter()
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write(texto.replace('si = "variacion > 15"', 'si = "variacion > 5"'))
+            os.utime(ruta, ns=(time.time_ns(), time.time_ns() + 1))
+            assert reglas.motor_reglas(ruta).evaluar_uno(variables)[0], "no se aplicó el cambio"
+            recarga_s = time.perf_counter() - inicio
+
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write(texto.replace('si = "variacion > 15"', 'si = "vibracion > 5"'))
+            os.utime(ruta, ns=(time.time_ns(), time.time_ns() + 2))
+            assert reglas.motor_reglas(ruta).evaluar_uno(variables)[0], "se perdió la tabla vigente"
+            assert reglas.error_reglas(ruta) is not None
+    finally:
+        reglas.INTERVALO_RECARGA = intervalo
+    return recarga_s
+
+
+def medir(n_muestras=200_000, repeticiones=5):
+    rng = np.random.default_rng(7)
+    rpm = rng.normal(3000, 600, (n_muestras, 10))
+    variables = variables_flota(rpm, rng.normal(35, 10, n_muestras))
+
+    resultados = {"por_tamano": {}}
+    for n_reglas in TAMANOS:
+        motor = MotorReglas(tabla_ampliada(n_reglas))
+        verificar_equivalencia(motor, variables)
+        mejor = float("inf")
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            motor.evaluar(variables)
+            mejor = min(mejor, time.perf_counter() - inicio)
+        resultados["por_tamano"][n_reglas] = mejor / n_muestras * 1e9
+    resultados["recarga_ms"] = verificar_recarga() * 1000
+    return resultados
+
+
+if __name__ == "__main__":
+    n_muestras = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    r = medir(n_muestras)
+    base = r["por_tamano"][TAMANOS[0]]
+    for n_reglas, ns in r["por_tamano"].items():
+        print(f"{n_reglas:>4} reglas: {ns:8.1f} ns/muestra ({ns / base:4.1f}x con {n_reglas // TAMANOS[0]}x reglas)")
+    print(f"Recarga en caliente: {r['recarga_ms']:.1f} ms")
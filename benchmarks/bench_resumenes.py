@@ -0,0 +1,57 @@
+"""Estadísticas por rango con resúmenes precalculados contra el recorrido completo.
+
+Comprueba en rangos aleatorios (con extremos a mitad de minuto) que ambos
+caminos coinciden y mide cómo escala cada uno con la longitud del historial.
+
+Uso: python -m benchmarks.bench_resumenes [muestras_por_dia]
+"""
+import math
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_almacen import INICIO, llenar
+from mantenimiento.almacen import AlmacenTelemetria, SEGUNDOS_POR_DIA
+
+
+def verificar(almacen, dias, consultas=50, seed=7):
+    rng = np.random.default_rng(seed)
+    for _ in range(consultas):
+        t_inicio, t_fin = np.sort(INICIO + rng.uniform(0, dias * SEGUNDOS_POR_DIA, 2))
+        vehiculo = None if rng.random() < 0.5 else int(rng.integers(0, 4))
+        rapido = almacen.estadisticas(t_inicio, t_fin, vehiculo)
+        crudo = almacen.estadisticas_crudas(t_inicio, t_fin, vehiculo)
+        for variable in ("rpm", "temperatura"):
+            a, b = rapido[variable], crudo[variable]
+            assert a["n"] == b["n"] and a["min"] == b["min"] and a["max"] == b["max"], (a, b)
+            if b["n"] > 1:
+                assert math.isclose(a["media"], b["media"], rel_tol=1e-12), (a, b)
+                assert math.isclose(a["std"], b["std"], rel_tol=1e-9), (a, b)
+
+
+def medir(muestras_por_dia=200_000, historiales=(1, 7, 28)):
+    resultados = {}
+    for dias in historiales:
+        with tempfile.TemporaryDirectory() as directorio:
+            almacen = AlmacenTelemetria(directorio)
+            llenar(almacen, dias, muestras_por_dia)
+            verificar(almacen, dias)
+            # Rango tipo Histórico: todo el historial más una fracción de minuto
+            t_inicio, t_fin = INICIO + 30.5, INICIO + dias * SEGUNDOS_POR_DIA - 17.25
+            tiempos = {}
+            for nombre, funcion in (("resumenes", almacen.estadisticas), ("crudo", almacen.estadisticas_crudas)):
+                inicio = time.perf_counter()
+                funcion(t_inicio, t_fin)
+                tiempos[nombre] = (time.perf_counter() - inicio) * 1000
+            resultados[dias] = {"muestras": dias * muestras_por_dia, "resumenes_ms": tiempos["resumenes"],
+                                "crudo_ms": tiempos["crudo"]}
+    return resultados
+
+
+if __name__ == "__main__":
+    muestras_por_dia = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    for dias, r in medir(muestras_por_dia).items():
+        print(f"{dias:>3} días ({r['muestras']:>10,} muestras) | resúmenes: {r['resumenes_ms']:>7.2f} ms | "
+              f"recorrido completo: {r['crudo_ms']:>8.1f} ms")
@@ -0,0 +1,70 @@
+"""Latencia de muestra a pantalla con la sesión de monitoreo en segundo plano.
+
+Reproduce telemetría a 1 kHz por la ingesta, la monitorea en una
+`SesionMonitoreo` y simula la vista: cada INTERVALO_REFRESCO lee los
+resultados nuevos, los agrega al gráfico y serializa la figura como lo hace
+`st.plotly_chart`. La latencia la mide la propia sesión (la que muestra
+MIA.py), desde la recepción de la muestra más antigua de cada tick en la
+ingesta hasta que su figura queda serializada.
+
+Uso: python -m benchmarks.bench_sesion [segundos] [frecuencia_hz]
+"""
+import sys
+import time
+
+import numpy as np
+import plotly.io as pio
+
+from mantenimiento.fuentes import ticks_ingesta
+from mantenimiento.graficos import GraficoEnVivo
+from mantenimiento.ingesta import FuenteReproduccion, Ingesta
+from mantenimiento.monitoreo import monitorear
+from mantenimiento.sesion import SesionMonitoreo
+
+INTERVALO_REFRESCO = 0.1  # El mismo que usa MIA.py
+LIMITE_LATENCIA = 0.2
+
+
+def medir(segundos=5.0, frecuencia_hz=1000.0, refresco=INTERVALO_REFRESCO):
+    rng = np.random.default_rng(42)
+    grabacion = np.column_stack([rng.normal(3000, 500, 50_000), rng.normal(35, 10, 50_000)])
+    grafico = GraficoEnVivo(["RPM", "Temperatura (°C)"])
+    pio.to_json(grafico.mostrar(["RPM"]), validate=False)  # Calentar la serialización de plotly
+    ingesta = Ingesta(FuenteReproduccion(grabacion, frecuencia_hz))
+    sesion = SesionMonitoreo(tiempos_de_ingesta=True)
+    sesion.iniciar(monitorear(ticks_ingesta(ingesta), sesion.umbrales), al_cerrar=ingesta.detener)
+
+    cursor, dibujo, muestras = 0, [], 0
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        time.sleep(refresco)
+        inicio = time.perf_counter()
+        nuevos, cursor, _ = sesion.leer(cursor)
+        for r in nuevos:
+            grafico.agregar(r["tiempos"], {"RPM": r["rpm_nuevas"], "Temperatura (°C)": r["temp_nuevas"]})
+            muestras += len(r["tiempos"])
+        pio.to_json(grafico.mostrar(["RPM", "Temperatura (°C)"]), validate=False)
+        sesion.registrar_mostrados(nuevos)
+        dibujo.append(time.perf_counter() - inicio)
+    sesion.cerrar()
+
+    latencias = np.array(sesion.latencias)
+    return {
+        "muestras_s": muestras / segundos,
+        "ticks": sesion.total,
+        "dibujo_medio_ms": float(np.mean(dibujo)) * 1000,
+        "latencia_p50_ms": float(np.percentile(latencias, 50)) * 1000,
+        "latencia_p95_ms": float(np.percentile(latencias, 95)) * 1000,
+        "latencia_max_ms": float(latencias.max()) * 1000,
+    }
+
+
+if __name__ == "__main__":
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    frecuencia_hz = float(sys.argv[2]) if len(sys.argv) > 2 else 1000.0
+    r = medir(segundos, frecuencia_hz)
+    print(f"Muestras mostradas:   {r['muestras_s']:>10,.0f} /s en {r['ticks']} ticks")
+    print(f"Dibujo por refresco:  {r['dibujo_medio_ms']:>10.1f} ms")
+    print(f"Latencia p50/p95/máx: {r['latencia_p50_ms']:.0f} / {r['latencia_p95_ms']:.0f} / "
+          f"{r['latencia_max_ms']:.0f} ms (límite {LIMITE_LATENCIA * 1000:.0f} ms)")
+    assert r["latencia_p95_ms"] < LIMITE_LATENCIA * 1000, "La latencia de muestra a pantalla excede el límite"
@@ -0,0 +1,86 @@
+"""Rendimiento y reproducibilidad del generador de flota sintética.
+
+Mide las filas por segundo con distintas formas de flota (pocos vehículos a
+alta frecuencia, muchos a 1 Hz), la memoria pico de una corrida larga (no
+debe crecer con la duración), el costo de pasar los bloques a DataFrame y
+de escribirlos en el almacén, y comprueba que la serie de un vehículo no
+cambia con el tamaño de bloque ni con el resto de la flota.
+
+Uso: python -m benchmarks.bench_sinteticos [horas]
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from mantenimiento.almacen import AlmacenTelemetria
+from mantenimiento.sinteticos import PATRONES, SIN_PATRON, GeneradorFlota
+
+FLOTAS = ((10, 100.0), (100, 10.0), (1000, 1.0))  # (vehículos, Hz)
+
+
+def filas_por_segundo(iterador):
+    inicio = time.perf_counter()
+    filas = sum(len(bloque["rpm"]) for bloque in iterador)  # Columnas o DataFrame
+    return filas, filas / (time.perf_counter() - inicio)
+
+
+def memoria_pico(horas):
+    """Pico de memoria (MB) generando `horas` y el triple: debe ser el mismo"""
+    picos = []
+    for duracion in (horas * 3600, horas * 3 * 3600):
+        tracemalloc.start()
+        for _ in GeneradorFlota(100, 10.0, inicio=0).bloques(duracion):
+            pass
+        picos.append(tracemalloc.get_traced_memory()[1] / 1e6)
+        tracemalloc.stop()
+    return picos
+
+
+def verificar_reproducibilidad(segundos=7200):
+    """El vehículo 7 sale igual solo o en una flota, con bloques chicos o grandes"""
+    def serie(generador, muestras_por_bloque):
+        partes = [b for b in generador.bloques(segundos, muestras_por_bloque)]
+        return {c: np.concatenate([b[c][b["vehiculo"] == 7] for b in partes]) for c in ("rpm", "temperatura", "fallo")}
+
+    solo = serie(GeneradorFlota([7], 10.0, inicio=0, fallos_por_dia=24), 1000)
+    flota = serie(GeneradorFlota(range(50), 10.0, inicio=0, fallos_por_dia=24), 1 << 20)
+    for columna in solo:
+        assert np.array_equal(solo[columna], flota[columna]), columna
+    return {PATRONES[c]: int((flota["fallo"] == c).sum()) for c in np.unique(flota["fallo"]) if c != SIN_PATRON}
+
+
+def medir(horas=1.0):
+    resultados = {"flotas": {}}
+    for n_vehiculos, frecuencia in FLOTAS:
+        filas, tasa = filas_por_segundo(GeneradorFlota(n_vehiculos, frecuencia, inicio=0).bloques(horas * 3600))
+        resultados["flotas"][n_vehiculos, frecuencia] = (filas, tasa)
+    resultados["memoria_mb"] = memoria_pico(horas)
+    resultados["patrones"] = verificar_reproducibilidad()
+
+    try:
+        import pandas  # Que la importación no cuente en la medición
+
+        resultados["dataframes"] = filas_por_segundo(GeneradorFlota(100, 10.0, inicio=0).dataframes(horas * 3600))[1]
+    except ImportError:
+        resultados["dataframes"] = None
+    with tempfile.TemporaryDirectory() as directorio:
+        inicio = time.perf_counter()
+        filas = GeneradorFlota(100, 10.0, inicio=1_760_000_000.0).escribir(AlmacenTelemetria(directorio), horas * 3600)
+        resultados["almacen"] = filas / (time.perf_counter() - inicio)
+    return resultados
+
+
+if __name__ == "__main__":
+    horas = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    r = medir(horas)
+    for (n_vehiculos, frecuencia), (filas, tasa) in r["flotas"].items():
+        print(f"{n_vehiculos:>5} vehículos a {frecuencia:>5.0f} Hz: {filas:>12,} filas, {tasa / 1e6:6.1f} M filas/s")
+    print(f"Memoria pico: {r['memoria_mb'][0]:.0f} MB ({horas:g} h) | {r['memoria_mb'][1]:.0f} MB ({horas * 3:g} h)")
+    if r["dataframes"] is not None:
+        print(f"Como DataFrames: {r['dataframes'] / 1e6:.1f} M filas/s")
+    print(f"Escritura al almacén: {r['almacen'] / 1e6:.1f} M filas/s")
+    print("Reproducible por vehículo; episodios del vehículo 7 (muestras): "
+          + ", ".join(f"{nombre} {n:,}" for nombre, n in r["patrones"].items()))
@@ -0,0 +1,134 @@
+"""Volumen de alertas con el supresor frente a las banderas de una sola vez.
+
+Reproduce varias horas de telemetría de una flota con temperaturas que
+oscilan alrededor del umbral (la condición entra y sale muchas veces),
+episodios largos de sobrecalentamiento y caídas de RPM. Compara las alertas
+que saldrían a Telegram con:
+
+- banderas: el comportamiento anterior (`alerta_*_enviada` por ejecución),
+  que se reinician cada vez que el ciclo se vuelve a ejecutar;
+- supresor: `SupresorAlertas` con histéresis, enfriamiento y escalamiento.
+
+También mide el costo por evaluación con miles de claves activas y
+comprueba que el estado persistido evita repetir alertas tras un reinicio.
+
+Uso: python -m benchmarks.bench_supresion [vehiculos] [horas]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from mantenimiento.monitoreo import UMBRALES_POR_DEFECTO, EstadoVehiculo, evaluar_vehiculo
+from mantenimiento.supresion import SupresorAlertas
+
+PERIODO = 5.0  # Segundos entre ticks
+REINICIO = 60.0  # Cada cuánto se reiniciaba el ciclo (recargas de la interfaz)
+
+
+def generar_flota(n_vehiculos, n_ticks, seed=42):
+    """(rpm por tick: vehículos × ticks × 10, temperatura: vehículos × ticks)"""
+    rng = np.random.default_rng(seed)
+    temperatura = rng.uniform(30, 41, (n_vehiculos, 1)) + rng.normal(0, 1.0, (n_vehiculos, n_ticks))
+    rpm = rng.normal(3000, 400, (n_vehiculos, n_ticks, 10))
+    for v in range(n_vehiculos):
+        for _ in range(3):  # Episodios largos
+            inicio = int(rng.integers(0, n_ticks - 200))
+            largo = int(rng.integers(50, 200))
+            if rng.random() < 0.5:
+                temperatura[v, inicio:inicio + largo] += rng.uniform(8, 15)
+            else:
+                rpm[v, inicio:inicio + largo, -1] = rng.uniform(500, 950)
+    return rpm, temperatura
+
+
+def alertas_banderas(rpm, temperatura, umbrales):
+    """Alertas con las banderas de una sola vez, reiniciadas cada REINICIO segundos"""
+    excede = {
+        "temperatura": temperatura > umbrales["temp_max"],
+        "rpm_alta": rpm[:, :, -1] > umbrales["rpm_max"],
+        "rpm_baja": rpm[:, :, -1] < umbrales["rpm_min"],
+    }
+    por_reinicio = int(REINICIO / PERIODO)
+    total = 0
+    for condicion in excede.values():
+        n_vehiculos, n_ticks = condicion.shape
+        # Una alerta por ejecución (tramo entre reinicios) en la que la condición aparece
+        tramos = condicion[:, : n_ticks // por_reinicio * por_reinicio].reshape(n_vehiculos, -1, por_reinicio)
+        total += int(tramos.any(axis=2).sum())
+    return total
+
+
+def alertas_supresor(rpm, temperatura, umbrales, supresor):
+    n_vehiculos, n_ticks = temperatura.shape
+    estados = [EstadoVehiculo(10, f"Vehículo {v + 1}", supresor) for v in range(n_vehiculos)]
+    total = 0
+    for t in range(n_ticks):
+        ahora = t * PERIODO
+        for v, estado in enumerate(estados):
+            total += len(evaluar_vehiculo(estado, rpm[v, t], temperatura[v, t], umbrales, ahora=ahora)["alertas"])
+    return total
+
+
+def costo_por_evaluacion(n_claves, n_evaluaciones=200_000):
+    """Microsegundos por `actualizar` con `n_claves` activas"""
+    supresor = SupresorAlertas(escalamiento=0)
+    for k in range(n_claves):
+        supresor.actualizar(f"Vehículo {k}", "temperatura", True, False, 0.0)
+    vehiculos = [f"Vehículo {k}" for k in np.random.default_rng(0).integers(0, n_claves, 1000)]
+    inicio = time.perf_counter()
+    for i in range(n_evaluaciones):
+        supresor.actualizar(vehiculos[i % 1000], "temperatura", True, False, 1.0)
+    return (time.perf_counter() - inicio) / n_evaluaciones * 1e6
+
+
+def verificar_reinicio():
+    """Un reinicio con el estado persistido no repite la alerta de una condición activa"""
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "alertas.sqlite3")
+        supresor = SupresorAlertas(ruta)
+        assert supresor.actualizar("Vehículo 1", "temperatura", True, False, 0.0) == 1
+        supresor.cerrar()
+        supresor = SupresorAlertas(ruta)
+        assert supresor.actualizar("Vehículo 1", "temperatura", True, False, 10.0) == 0
+        assert supresor.actualizar("Vehículo 1", "temperatura", True, False, supresor.escalamiento) == 2
+        supresor.cerrar()
+
+
+def medir(n_vehiculos=100, horas=2.0):
+    n_ticks = int(horas * 3600 / PERIODO)
+    rpm, temperatura = generar_flota(n_vehiculos, n_ticks)
+    umbrales = dict(UMBRALES_POR_DEFECTO)
+
+    with tempfile.TemporaryDirectory() as directorio:
+        supresor = SupresorAlertas(os.path.join(directorio, "alertas.sqlite3"))
+        inicio = time.perf_counter()
+        supresor_total = alertas_supresor(rpm, temperatura, umbrales, supresor)
+        segundos = time.perf_counter() - inicio
+        metricas = supresor.metricas()
+        supresor.cerrar()
+    verificar_reinicio()
+
+    return {
+        "evaluaciones": n_vehiculos * n_ticks,
+        "banderas": alertas_banderas(rpm, temperatura, umbrales),
+        "supresor": supresor_total,
+        "escaladas": metricas["escaladas"],
+        "suprimidas": metricas["suprimidas"],
+        "evaluaciones_s": n_vehiculos * n_ticks / segundos,
+        "costo_us": {n: costo_por_evaluacion(n) for n in (10, 1_000, 10_000)},
+    }
+
+
+if __name__ == "__main__":
+    n_vehiculos = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    horas = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    r = medir(n_vehiculos, horas)
+    print(f"Evaluaciones: {r['evaluaciones']:,} ({r['evaluaciones_s']:,.0f}/s con persistencia)")
+    print(f"Alertas con banderas por ejecución: {r['banderas']:,}")
+    print(f"Alertas con supresor:               {r['supresor']:,} "
+          f"({r['supresor'] / max(r['banderas'], 1) * 100:.0f}%; {r['escaladas']} escaladas, "
+          f"{r['suprimidas']} reactivaciones suprimidas)")
+    print("Costo por evaluación: " + " | ".join(f"{n:,} claves {us:.2f} µs" for n, us in r["costo_us"].items()))
@@ -0,0 +1,282 @@
+"""Suite de rendimiento con resultados en JSON y detección de regresiones.
+
+Cada caso prepara sus datos para varios tamaños y cronometra una operación
+del tablero: el análisis de irregularidades, la predicción de fallos, armar
+y encolar alertas de Telegram (con la red simulada), los textos de las
+alertas de un tick de flota, construir los gráficos, las estadísticas de
+la pestaña de análisis histórico e importar un registro CSV. Por tamaño se
+toma el mejor de varias repeticiones (con `timeit`, ajustando las vueltas
+para que cada una dure lo suficiente).
+
+    python -m benchmarks.suite --salida base.json
+    python -m benchmarks.suite --comparar base.json --tolerancia 0.15
+
+Con `--comparar` termina con código 1 si algún caso es más lento que la base
+por encima de la tolerancia (fracción; `--tolerancia-caso nombre=0.5` la
+cambia para un caso). `--filtro` elige casos por expresión regular.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime, timezone
+
+import numpy as np
+
+CASOS = {}  # nombre -> (preparar, tamaños)
+
+
+def caso(nombre, tamanos):
+    """Registra un caso; `preparar(n)` es un generador que entrega la función a cronometrar"""
+    def registrar(preparar):
+        CASOS[nombre] = (contextlib.contextmanager(preparar), tamanos)
+        return preparar
+    return registrar
+
+
+def _rpm(n, seed=42):
+    rng = np.random.default_rng(seed)
+    rpm = rng.normal(3000, 500, n)
+    rpm[::97] += 3000
+    return rpm
+
+
+# ---- Casos ----
+@caso("analizar_irregularidades_rpm", (10, 1_000, 100_000))
+def _analizar(n):
+    from mantenimiento.analisis import analizar_irregularidades_rpm
+
+    rpm = _rpm(n)
+    yield lambda: analizar_irregularidades_rpm(rpm)
+
+
+@caso("predecir_fallo", (10, 1_000, 100_000))
+def _predecir(n):
+    from mantenimiento.analisis import predecir_fallo
+
+    rpm = _rpm(n)
+    yield lambda: predecir_fallo(45.0, rpm[-1], rpm)
+
+
+class _RespuestaFalsa:
+    status_code = 200
+
+
+@caso("enviar_alerta_telegram", (1, 100, 1_000))
+def _enviar_alerta(n):
+    """Lo que hace `enviar_alerta_telegram` de MIA.py con `n` alertas, más agruparlas y enviarlas sin red"""
+    from mantenimiento.alertas import SEPARADOR_LOTE, DespachadorTelegram, construir_mensaje
+    from mantenimiento.analisis import predecir_fallo
+    from mantenimiento.reloj import obtener_fecha_hora_mty
+
+    despachador = DespachadorTelegram("token", "chat", capacidad_cola=n)
+    despachador.detener()  # Sin hilo de envío: la cola se vacía aquí mismo, sin esperas
+    despachador._sesion.post = lambda *args, **kwargs: _RespuestaFalsa()
+    rpm = _rpm(10)
+    _, irregularidades, fallo_principal = predecir_fallo(55.0, 6000.0, rpm)
+
+    def enviar():
+        for i in range(n):
+            _, fecha_formateada, hora_actual = obtener_fecha_hora_mty()
+            despachador.enviar(construir_mensaje(f"🚨 ALERTA {i}: Temperatura crítica 55.0°C", fecha_formateada,
+                                                 hora_actual, irregularidades, fallo_principal))
+        lote = [despachador._cola.get_nowait() for _ in range(n)]
+        for textos, encoladas in despachador._dividir(lote):
+            despachador._enviar_con_reintentos(SEPARADOR_LOTE.join(textos), encoladas)
+
+    yield enviar
+
+
+@caso("mensajes_alerta_flota", (10, 1_000, 10_000))
+def _mensajes_alerta_flota(n):
+    """Textos completos de las alertas de un tick de flota en el que alertan `n` vehículos"""
+    from benchmarks.bench_formato import flota_actual, resultados_flota
+
+    resultados = resultados_flota(n)
+    yield lambda: flota_actual(resultados)
+
+
+@caso("grafico_en_vivo", (1_000, 100_000, 1_000_000))
+def _grafico_en_vivo(n):
+    """Un tick del gráfico de tendencias con `n` muestras acumuladas: agregar, actualizar y serializar"""
+    from mantenimiento.graficos import GraficoEnVivo
+
+    variables = ["RPM", "Temperatura (°C)"]
+    grafico = GraficoEnVivo(variables, "Tendencias")
+    rng = np.random.default_rng(42)
+    grafico.agregar(np.arange(n, dtype=np.float64), {"RPM": _rpm(n), "Temperatura (°C)": rng.normal(35, 10, n)})
+    siguiente = [n]
+
+    def tick():
+        x = siguiente[0] + np.arange(10, dtype=np.float64)
+        siguiente[0] += 10
+        grafico.agregar(x, {"RPM": rng.normal(3000, 500, 10), "Temperatura (°C)": rng.normal(35, 10, 10)})
+        grafico.mostrar(variables).to_json()
+
+    yield tick
+
+
+@caso("grafico_correlacion", (24, 1_440, 10_080))
+def _grafico_correlacion(n):
+    """El diagrama de dispersión de la pestaña de análisis histórico con `n` promedios"""
+    import pandas as pd
+    import plotly.express as px
+
+    rng = np.random.default_rng(42)
+    datos = pd.DataFrame({"Hora": np.arange(n) % 24, "RPM": np.abs(_rpm(n)), "Temperatura (°C)": rng.normal(35, 10, n)})
+
+    def dibujar():
+        px.scatter(datos, x="RPM", y="Temperatura (°C)", color="Hora", title="Relación RPM vs Temperatura",
+                   size="RPM", hover_data=["Hora"]).to_json()
+
+    yield dibujar
+
+
+@caso("estadisticas_historico", (100_000, 1_000_000, 10_000_000))
+def _estadisticas_historico(n):
+    """Estadísticas y serie por intervalo de la pestaña de análisis histórico sobre `n` filas"""
+    from mantenimiento.almacen import SEGUNDOS_POR_DIA, AlmacenTelemetria
+    from mantenimiento.sinteticos import GeneradorFlota
+
+    dias, vehiculos, inicio = 7, 10, 1_760_000_000.0
+    with tempfile.TemporaryDirectory() as directorio:
+        almacen = AlmacenTelemetria(directorio)
+        GeneradorFlota(vehiculos, n / vehiculos / (dias * SEGUNDOS_POR_DIA), inicio=inicio).escribir(
+            almacen, dias * SEGUNDOS_POR_DIA)
+        t_inicio, t_fin = inicio + 1.5 * SEGUNDOS_POR_DIA, inicio + 5.5 * SEGUNDOS_POR_DIA
+
+        def consultar():
+            almacen.estadisticas(t_inicio, t_fin, "Vehículo 3")
+            almacen.serie(t_inicio, t_fin, "Vehículo 3")
+
+        yield consultar
+
+
+# ---- Ejecución ----
+@caso("analizar_registro_csv", (10_000, 1_000_000, 4_000_000))
+def _analizar_registro_csv(n):
+    """Importar un registro CSV de `n` filas de 100 vehículos y exportar sus resultados por ventana"""
+    from benchmarks.bench_registros import escribir_registro
+    from mantenimiento.registros import analizar_registro
+
+    with tempfile.TemporaryDirectory() as directorio:
+        registro = os.path.join(directorio, "registro.csv")
+        escribir_registro(registro, n * 42 / 2**20)  # ~42 bytes por fila
+        yield lambda: analizar_registro(registro, os.path.join(directorio, "ventanas.parquet"))
+
+
+def cronometrar(funcion, repeticiones=5):
+    """(mejor, mediana) en segundos por llamada"""
+    temporizador = timeit.Timer(funcion)
+    vueltas, _ = temporizador.autorange()
+    tiempos = np.array(temporizador.repeat(repeticiones, vueltas)) / vueltas
+    return float(tiempos.min()), float(np.median(tiempos))
+
+
+def _entorno():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": commit,
+            "python": platform.python_version(), "numpy": np.__version__, "plataforma": platform.platform(),
+            "procesador": platform.processor() or platform.machine()}
+
+
+def ejecutar(filtro=None, repeticiones=5, salida=sys.stdout):
+    """Corre los casos que coinciden con `filtro`; devuelve {"entorno", "resultados"}"""
+    resultados = {}
+    for nombre, (preparar, tamanos) in CASOS.items():
+        if filtro and not re.search(filtro, nombre):
+            continue
+        for n in tamanos:
+            clave = f"{nombre}[{n}]"
+            try:
+                with preparar(n) as funcion:
+                    mejor, mediana = cronometrar(funcion, repeticiones)
+            except ImportError as e:  # Dependencia opcional ausente (p. ej. plotly)
+                print(f"{clave:<45} omitido ({e.name} no instalado)", file=salida)
+                break
+            resultados[clave] = {"caso": nombre, "tamano": n, "mejor_s": mejor, "mediana_s": mediana}
+            print(f"{clave:<45} {_formato(mejor):>10} (mediana {_formato(mediana)})", file=salida, flush=True)
+    return {"entorno": _entorno(), "resultados": resultados}
+
+
+def comparar(actual, base, tolerancia=0.2, por_caso=None):
+    """Filas (clave, base, actual, cociente, regresión) de los casos presentes en ambos"""
+    por_caso = por_caso or {}
+    filas = []
+    for clave, r in actual["resultados"].items():
+        if clave not in base["resultados"]:
+            continue
+        anterior = base["resultados"][clave]["mejor_s"]
+        cociente = r["mejor_s"] / anterior
+        filas.append((clave, anterior, r["mejor_s"], cociente, cociente > 1 + por_caso.get(r["caso"], tolerancia)))
+    return filas
+
+
+def _formato(segundos):
+    for unidad, escala in (("s", 1), ("ms", 1e3), ("µs", 1e6)):
+        if segundos * escala >= 1:
+            return f"{segundos * escala:.3g} {unidad}"
+    return f"{segundos * 1e9:.3g} ns"
+
+
+def _argumentos(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--salida", help="Guardar los resultados en este JSON")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior que sirve de base")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="Lentitud admitida frente a la base (fracción, 0.2 = 20%%)")
+    parser.add_argument("--tolerancia-caso", action="append", default=[], metavar="CASO=FRACCION")
+    parser.add_argument("--filtro", help="Expresión regular sobre los nombres de los casos")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--listar", action="store_true", help="Mostrar los casos y sus tamaños")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+    if args.listar:
+        for nombre, (_, tamanos) in CASOS.items():
+            print(f"{nombre}: {', '.join(f'{n:,}' for n in tamanos)}")
+        return 0
+    por_caso = {}
+    for texto in args.tolerancia_caso:
+        nombre, _, fraccion = texto.partition("=")
+        por_caso[nombre] = float(fraccion)
+
+    inicio = time.perf_counter()
+    actual = ejecutar(args.filtro, args.repeticiones)
+    print(f"{len(actual['resultados'])} mediciones en {time.perf_counter() - inicio:.0f} s")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(actual, f, ensure_ascii=False, indent=2)
+
+    if not args.comparar:
+        return 0
+    with open(args.comparar, encoding="utf-8") as f:
+        base = json.load(f)
+    filas = comparar(actual, base, args.tolerancia, por_caso)
+    print(f"\nFrente a {args.comparar} (commit {base['entorno'].get('commit')}):")
+    for clave, anterior, ahora, cociente, regresion in filas:
+        print(f"{clave:<45} {_formato(anterior):>10} -> {_formato(ahora):>10} {cociente:6.2f}x"
+              + ("  REGRESIÓN" if regresion else ""))
+    regresiones = [fila[0] for fila in filas if fila[4]]
+    if regresiones:
+        print(f"{len(regresiones)} regresiones: {', '.join(regresiones)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
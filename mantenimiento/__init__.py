@@ -0,0 +1,62 @@
+"""Núcleo de detección de fallos del tablero de mantenimiento predictivo.
+
+Los nombres públicos se importan de su submódulo al primer uso, así que
+`import mantenimiento` no carga numpy, pyserial ni requests hasta que se
+necesitan (arranque rápido en equipos pequeños; ver benchmarks/bench_importacion.py).
+"""
+
+import importlib
+
+_EXPORTS = {
+    "SIN_FALLO": "analisis",
+    "ResultadoFlota": "analisis",
+    "analizar_flota": "analisis",
+    "analizar_irregularidades_rpm": "analisis",
+    "decodificar_flota": "analisis",
+    "decodificar_vehiculo": "analisis",
+    "predecir_fallo": "analisis",
+    "MotorReglas": "reglas",
+    "error_reglas": "reglas",
+    "motor_reglas": "reglas",
+    "EstadisticasMoviles": "estadisticas",
+    "DespachadorTelegram": "alertas",
+    "construir_mensaje": "alertas",
+    "BufferCircular": "ingesta",
+    "FuenteReproduccion": "ingesta",
+    "FuenteSerial": "ingesta",
+    "Ingesta": "ingesta",
+    "AlmacenTelemetria": "almacen",
+    "MonitorFlota": "flota",
+    "monitorear_flota": "flota",
+    "SesionMonitoreo": "sesion",
+    "SupresorAlertas": "supresion",
+    "AnalizadorEspectral": "espectral",
+    "AnalisisVentanas": "registros",
+    "EscritorResultados": "registros",
+    "LectorRegistro": "registros",
+    "analizar_registro": "registros",
+    "exportar_almacen": "registros",
+    "GeneradorFlota": "sinteticos",
+    "UMBRALES_POR_DEFECTO": "monitoreo",
+    "EstadoVehiculo": "monitoreo",
+    "evaluar_vehiculo": "monitoreo",
+    "mensaje_alerta": "monitoreo",
+    "mensajes_alerta": "monitoreo",
+    "ModeloAnomalias": "modelo",
+    "entrenar_desde_almacen": "modelo",
+    "monitorear": "monitoreo",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(nombre):
+    if nombre not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(f".{_EXPORTS[nombre]}", __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
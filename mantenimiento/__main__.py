@@ -0,0 +1,143 @@
+"""Monitoreo sin interfaz: `python -m mantenimiento --fuente serial --puerto /dev/ttyUSB0`
+
+Con `--importar registro.csv --resultados ventanas.parquet` analiza por bloques un registro de
+manejo CSV/Parquet (y lo guarda en `--almacen`, si se indica) en lugar de monitorear.
+"""
+
+import argparse
+import math
+import sys
+import time
+
+from . import configuracion
+from .monitoreo import UMBRALES_POR_DEFECTO, monitorear
+from .reloj import obtener_fecha_hora_mty
+
+
+def _argumentos(argv):
+    parser = argparse.ArgumentParser(prog="python -m mantenimiento", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuente", choices=("sinteticos", "serial"), default="sinteticos")
+    parser.add_argument("--puerto", default="/dev/ttyUSB0", help="Puerto o URL de pyserial")
+    parser.add_argument("--baudios", type=int, default=115200)
+    parser.add_argument("--almacen", default=None,
+                        help=f"Persistir la telemetría serial o importada (p. ej. {configuracion.RUTA_ALMACEN})")
+    parser.add_argument("--vehiculo", default="Vehículo 1")
+    parser.add_argument("--modelo", default=None,
+                        help=f"Modelo de anomalías entrenado (p. ej. {configuracion.RUTA_MODELO})")
+    parser.add_argument("--espectral", type=float, default=None, metavar="HZ",
+                        help="Análisis espectral de las RPM muestreadas a HZ (órdenes del motor; cientos de Hz)")
+    parser.add_argument("--importar", default=None, metavar="REGISTRO",
+                        help="Analizar un registro de manejo CSV o Parquet en lugar de monitorear")
+    parser.add_argument("--resultados", default=None, metavar="SALIDA",
+                        help="Exportar los resultados por ventana del registro (.csv o .parquet)")
+    parser.add_argument("--telegram", action="store_true", help="Enviar las alertas por Telegram")
+    parser.add_argument("--estado-alertas", default=None,
+                        help=f"Persistir el estado de las alertas entre ejecuciones (p. ej. {configuracion.RUTA_ALERTAS})")
+    parser.add_argument("--metricas-puerto", type=int, default=configuracion.PUERTO_METRICAS,
+                        help="Servir las métricas de latencia en formato Prometheus en http://127.0.0.1:PUERTO/metrics")
+    parser.add_argument("--intervalo", type=float, default=0.0, help="Pausa entre ticks en segundos")
+    for nombre, valor in UMBRALES_POR_DEFECTO.items():
+        parser.add_argument(f"--{nombre.replace('_', '-')}", dest=nombre, type=float, default=valor)
+    return parser.parse_args(argv)
+
+
+def importar(args):
+    """Importa y analiza `args.importar`; imprime el resumen"""
+    from .registros import analizar_registro
+
+    almacen = None
+    if args.almacen:
+        from .almacen import AlmacenTelemetria
+
+        almacen = AlmacenTelemetria(args.almacen)
+    inicio = time.perf_counter()
+    resumen = analizar_registro(args.importar, args.resultados, almacen=almacen, vehiculo=args.vehiculo)
+    segundos = time.perf_counter() - inicio
+    print(f"{resumen['filas']:,} filas de {len(resumen['vehiculos'])} vehículos en {segundos:.1f} s | "
+          f"{resumen['ventanas']:,} ventanas" + (f" -> {args.resultados}" if args.resultados else ""))
+    for fallo, n in sorted(resumen["por_fallo"].items(), key=lambda item: -item[1]):
+        print(f"  {fallo:<28} {n:>12,} ventanas")
+    return 0
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+    if args.importar:
+        return importar(args)
+    umbrales = {nombre: getattr(args, nombre) for nombre in UMBRALES_POR_DEFECTO}
+
+    ingesta = None
+    if args.fuente == "serial":
+        from .fuentes import ticks_ingesta
+        from .ingesta import FuenteSerial, Ingesta
+
+        almacen = None
+        if args.almacen:
+            from .almacen import AlmacenTelemetria
+
+            almacen = AlmacenTelemetria(args.almacen)
+        ingesta = Ingesta(FuenteSerial(args.puerto, args.baudios), almacen=almacen, vehiculo=args.vehiculo)
+        ticks = ticks_ingesta(ingesta)
+    else:
+        from .fuentes import generar_datos_sinteticos, ticks_sinteticos
+
+        ticks = ticks_sinteticos(generar_datos_sinteticos())
+
+    modelo = None
+    if args.modelo:
+        from .modelo import ModeloAnomalias
+
+        modelo = ModeloAnomalias.cargar(args.modelo)
+
+    if args.metricas_puerto:
+        from .instrumentacion import servir_metricas
+
+        servir_metricas(args.metricas_puerto)
+
+    supresor = None
+    if args.estado_alertas:
+        from .supresion import SupresorAlertas
+
+        supresor = SupresorAlertas(args.estado_alertas)
+
+    despachador = enviar = None
+    if args.telegram:
+        from .alertas import DespachadorTelegram, construir_mensaje
+
+        despachador = DespachadorTelegram(configuracion.TELEGRAM_TOKEN, configuracion.TELEGRAM_CHAT_ID)
+
+        def enviar(mensaje, irregularidades, fallo_principal):
+            _, fecha_formateada, hora_actual = obtener_fecha_hora_mty()
+            if not despachador.enviar(construir_mensaje(mensaje, fecha_formateada, hora_actual,
+                                                        irregularidades, fallo_principal)):
+                print("Cola de alertas llena: alerta descartada", file=sys.stderr)
+
+    try:
+        for resultado in monitorear(ticks, umbrales, enviar, args.vehiculo, modelo=modelo, supresor=supresor,
+                                    frecuencia_espectral=args.espectral):
+            print(f"{resultado['hora']} | {resultado['estado']:<11} | Temperatura: {resultado['temperatura']:.1f}°C | "
+                  f"RPM: {resultado['rpm']:.0f} | Fallo probable: {resultado['fallo_principal']}"
+                  + (f" | Anomalía: {resultado['puntaje_anomalia']:.2f}" if resultado["puntaje_anomalia"] is not None else "")
+                  + (f" | Subarmónicos: {resultado['espectro']['subarmonicos']:.0%}"
+                     if resultado["espectro"] is not None and not math.isnan(resultado["espectro"]["subarmonicos"]) else ""),
+                  flush=True)
+            for tipo in resultado["alertas"]:
+                print(f"  ALERTA {tipo} (nivel {resultado['niveles_alerta'][tipo]})", flush=True)
+            if args.intervalo:
+                time.sleep(args.intervalo)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if ingesta is not None:
+            ingesta.detener()
+        if supresor is not None:
+            supresor.cerrar()
+        if despachador is not None:
+            despachador.esperar_vacia(timeout=10)
+            despachador.detener()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import functools
+import queue
+import threading
+import time
+from collections import deque
+
+from .analisis import SIN_FALLO_TEXTO
+from .instrumentacion import instrumentar
+
+# Límite de caracteres de un mensaje de Telegram
+LIMITE_MENSAJE = 4096
+SEPARADOR_LOTE = "\n\n➖➖➖➖➖\n\n"
+
+
+@functools.lru_cache(maxsize=8)
+def _encabezado(fecha_formateada, hora_actual):
+    return f"🕒 {fecha_formateada}\n⏰ Hora: {hora_actual}\n\n"
+
+
+@functools.lru_cache(maxsize=256)
+def _analisis(irregularidades, fallo_probable):
+    """Secciones de irregularidades, fallo y recomendación (se repiten mucho entre alertas)"""
+    partes = []
+
+    # Añadir análisis de irregularidades si existe
+    if irregularidades:
+        partes.append("\n\n🔍 **Irregularidades detectadas:**")
+        partes.extend(f"\n• {irregularidad}" for irregularidad in irregularidades)
+
+    # Añadir fallo probable si existe
+    hay_fallo = bool(fallo_probable) and fallo_probable != SIN_FALLO_TEXTO
+    if hay_fallo:
+        partes.append(f"\n\n⚠️ **Fallo más probable:** {fallo_probable}")
+
+    # Añadir recomendación
+    if irregularidades or hay_fallo:
+        partes.append("\n\n🔧 **Recomendación:** Verificar sistema inmediatamente")
+
+    return "".join(partes)
+
+
+@instrumentar("alertas.construir_mensaje")
+def construir_mensaje(mensaje, fecha_formateada, hora_actual, irregularidades=None, fallo_probable=None):
+    """Construye el texto completo de una alerta con el análisis de fallos.
+
+    El encabezado cambia a lo sumo una vez por segundo y el análisis se repite
+    entre alertas, así que ambos salen de cachés y solo se concatena el mensaje.
+    """
+    return (_encabezado(fecha_formateada, hora_actual) + mensaje
+            + _analisis(tuple(irregularidades) if irregularidades else (), fallo_probable))
+
+
+class CubetaTokens:
+    """Limitador de tasa tipo token bucket (`tasa` tokens por segundo)"""
+
+    def __init__(self, tasa, capacidad=1):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.tokens = float(capacidad)
+        self.ultimo = time.monotonic()
+
+    def _rellenar(self):
+        ahora = time.monotonic()
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultimo) * self.tasa)
+        self.ultimo = ahora
+
+    def esperar(self, detener=None):
+        """Bloquea hasta obtener un token; devuelve False si se pidió detener"""
+        while True:
+            self._rellenar()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            espera = (1 - self.tokens) / self.tasa
+            if detener is not None:
+                if detener.wait(espera):
+                    return False
+            else:
+                time.sleep(espera)
+
+
+class DespachadorTelegram:
+    """Envía alertas a Telegram desde un hilo en segundo plano.
+
+    `enviar` nunca bloquea: encola el texto en una cola acotada y, si está
+    llena, descarta la alerta y lo cuenta. El hilo agrupa ráfagas en un solo
+    mensaje, respeta el límite por chat con una cubeta de tokens y reintenta
+    con espera exponencial. `url_base` permite apuntar a un servidor local.
+    Al detenerlo, las alertas encoladas que no se llegaron a enviar cuentan
+    como fallidas: encoladas = enviadas + fallidas.
+    """
+
+    def __init__(self, token, chat_id, url_base="https://api.telegram.org",
+                 capacidad_cola=100, ventana_agrupacion=0.5, mensajes_por_segundo=1.0,
+                 reintentos=3, espera_base=0.5, timeout=5.0):
+        import requests  # Diferido: el núcleo se importa sin la pila HTTP
+
+        self._requests = requests
+        self.url = f"{url_base.rstrip('/')}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.ventana_agrupacion = ventana_agrupacion
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.timeout = timeout
+        self.cubeta = CubetaTokens(mensajes_por_segundo)
+
+        self._cola = queue.Queue(maxsize=capacidad_cola)
+        self._sesion = requests.Session()
+        self._detener = threading.Event()
+        self._lock = threading.Lock()
+        self._latencias_envio = deque(maxlen=256)
+        self._latencias_alerta = deque(maxlen=256)
+        self._contadores = {"encoladas": 0, "enviadas": 0, "mensajes": 0, "descartadas": 0,
+                            "fallidas": 0, "reintentos": 0}
+        self.ultimo_error = None
+
+        self._hilo = threading.Thread(target=self._ejecutar, name="despachador-telegram", daemon=True)
+        self._hilo.start()
+
+    # ---- API para el ciclo de monitoreo ----
+    def enviar(self, texto):
+        """Encola una alerta sin bloquear; devuelve False si se descartó"""
+        try:
+            self._cola.put_nowait((texto, time.monotonic()))
+        except queue.Full:
+            self._contar("descartadas")
+            return False
+        self._contar("encoladas")
+        return True
+
+    def metricas(self):
+        """Profundidad de cola, latencias (s) y contadores"""
+        with self._lock:
+            envio = list(self._latencias_envio)
+            alerta = list(self._latencias_alerta)
+            resultado = dict(self._contadores)
+        resultado["profundidad_cola"] = self._cola.qsize()
+        resultado["latencia_envio_media"] = sum(envio) / len(envio) if envio else None
+        resultado["latencia_envio_max"] = max(envio) if envio else None
+        resultado["latencia_alerta_media"] = sum(alerta) / len(alerta) if alerta else None
+        resultado["ultimo_error"] = self.ultimo_error
+        return resultado
+
+    def esperar_vacia(self, timeout=None):
+        """Espera a que la cola se vacíe (útil en scripts y pruebas)"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while self._cola.unfinished_tasks:
+            if limite is not None and time.monotonic() > limite:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def detener(self, timeout=2.0):
+        self._detener.set()
+        self._hilo.join(timeout)
+        self._sesion.close()
+
+    # ---- Hilo de envío ----
+    def _contar(self, clave, n=1):
+        with self._lock:
+            self._contadores[clave] += n
+
+    def _ejecutar(self):
+        while not self._detener.is_set():
+            try:
+                primero = self._cola.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            lote = [primero]
+
+            # Agrupar la ráfaga que llegue dentro de la ventana
+            limite = time.monotonic() + self.ventana_agrupacion
+            while (restante := limite - time.monotonic()) > 0:
+                try:
+                    lote.append(self._cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            grupos = self._dividir(lote)
+            for i, (textos, encoladas) in enumerate(grupos):
+                if self._detener.is_set() or not self.cubeta.esperar(self._detener):
+                    self._contar("fallidas", sum(len(e) for _, e in grupos[i:]))  # Resto del lote sin enviar
+                    break
+                self._enviar_con_reintentos(SEPARADOR_LOTE.join(textos), encoladas)
+            for _ in lote:
+                self._cola.task_done()
+
+        # Lo que quedó en la cola al detener tampoco se envía
+        while True:
+            try:
+                self._cola.get_nowait()
+            except queue.Empty:
+                break
+            self._contar("fallidas")
+            self._cola.task_done()
+
+    @staticmethod
+    def _dividir(lote):
+        """Agrupa las alertas en mensajes que respeten LIMITE_MENSAJE"""
+        grupos, textos, encoladas, longitud = [], [], [], 0
+        for texto, encolada in lote:
+            texto = texto[:LIMITE_MENSAJE]
+            extra = len(texto) + (len(SEPARADOR_LOTE) if textos else 0)
+            if textos and longitud + extra > LIMITE_MENSAJE:
+                grupos.append((textos, encoladas))
+                textos, encoladas, longitud = [], [], 0
+                extra = len(texto)
+            textos.append(texto)
+            encoladas.append(encolada)
+            longitud += extra
+        if textos:
+            grupos.append((textos, encoladas))
+        return grupos
+
+    @instrumentar("alertas.envio_telegram")
+    def _enviar_con_reintentos(self, texto, encoladas):
+        payload = {"chat_id": self.chat_id, "text": texto, "parse_mode": "Markdown"}
+        for intento in range(self.reintentos + 1):
+            espera = self.espera_base * 2 ** intento
+            inicio = time.monotonic()
+            try:
+                response = self._sesion.post(self.url, json=payload, timeout=self.timeout)
+            except self._requests.RequestException as e:
+                self.ultimo_error = f"Error de conexión: {e}"
+            else:
+                fin = time.monotonic()
+                if response.status_code == 200:
+                    with self._lock:
+                        self._latencias_envio.append(fin - inicio)
+                        self._latencias_alerta.extend(fin - t for t in encoladas)
+                        self._contadores["enviadas"] += len(encoladas)
+                        self._contadores["mensajes"] += 1
+                    return True
+                self.ultimo_error = f"Error al enviar mensaje a Telegram: {response.text}"
+                if response.status_code == 429:
+                    try:
+                        espera = float(response.json()["parameters"]["retry_after"])
+                    except (ValueError, KeyError, TypeError):
+                        pass
+                elif response.status_code < 500:
+                    break  # Error del cliente: reintentar no ayuda
+            if intento < self.reintentos:
+                self._contar("reintentos")
+                if self._detener.wait(espera):
+                    break
+        self._contar("fallidas", len(encoladas))
+        return False
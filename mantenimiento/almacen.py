@@ -0,0 +1,241 @@
+import json
+import math
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .resumenes import IndiceResumenes
+
+# Columnas del almacén y su tipo en disco
+ESQUEMA = {
+    "tiempo": np.dtype("<f8"),  # Segundos desde época (UTC)
+    "vehiculo": np.dtype("<i4"),
+    "rpm": np.dtype("<f4"),
+    "temperatura": np.dtype("<f4"),
+}
+SEGUNDOS_POR_DIA = 86400
+
+
+class AlmacenTelemetria:
+    """Almacén columnar de telemetría, solo de anexado, particionado por día.
+
+    Cada partición es un directorio `AAAA-MM-DD` con un archivo binario por
+    columna (ver ESQUEMA). Las lecturas usan `np.memmap`, así que las
+    consultas por rango de tiempo o por vehículo recorren el disco por bloques
+    sin cargar todo en memoria ni pasar por pandas.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self._ruta_vehiculos = os.path.join(directorio, "vehiculos.json")
+        try:
+            with open(self._ruta_vehiculos) as f:
+                self.vehiculos = json.load(f)
+        except FileNotFoundError:
+            self.vehiculos = {}
+        self.resumenes = IndiceResumenes(self)
+
+    # ---- Vehículos ----
+    def id_vehiculo(self, nombre):
+        """Identificador entero del vehículo (se registra si es nuevo)"""
+        if nombre not in self.vehiculos:
+            self.vehiculos[nombre] = len(self.vehiculos)
+            temporal = self._ruta_vehiculos + ".tmp"
+            with open(temporal, "w") as f:
+                json.dump(self.vehiculos, f, ensure_ascii=False)
+            os.replace(temporal, self._ruta_vehiculos)
+        return self.vehiculos[nombre]
+
+    def nombre_vehiculo(self, id_vehiculo):
+        for nombre, i in self.vehiculos.items():
+            if i == id_vehiculo:
+                return nombre
+        return str(id_vehiculo)
+
+    # ---- Escritura ----
+    def agregar(self, tiempo, vehiculo, rpm, temperatura):
+        """Anexa muestras; `vehiculo` puede ser un nombre o un id (escalar o arreglo)"""
+        tiempo = np.atleast_1d(np.asarray(tiempo, dtype=ESQUEMA["tiempo"]))
+        if isinstance(vehiculo, str):
+            vehiculo = self.id_vehiculo(vehiculo)
+        columnas = {
+            "tiempo": tiempo,
+            "vehiculo": np.broadcast_to(np.asarray(vehiculo, dtype=ESQUEMA["vehiculo"]), tiempo.shape),
+            "rpm": np.broadcast_to(np.asarray(rpm, dtype=ESQUEMA["rpm"]), tiempo.shape),
+            "temperatura": np.broadcast_to(np.asarray(temperatura, dtype=ESQUEMA["temperatura"]), tiempo.shape),
+        }
+        dias = np.floor(tiempo / SEGUNDOS_POR_DIA).astype(np.int64)
+        for dia in np.unique(dias):
+            seleccion = dias == dia
+            ruta = self._ruta_particion(int(dia))
+            bloque = {c: v[seleccion] for c, v in columnas.items()}
+            self._anexar(ruta, bloque)
+            self.resumenes.actualizar(ruta, int(dia) * SEGUNDOS_POR_DIA, bloque)
+        return len(tiempo)
+
+    def _anexar(self, ruta, columnas):
+        os.makedirs(ruta, exist_ok=True)
+        filas = self._filas(ruta)
+        if filas:
+            # Si llegan muestras fuera de orden la partición deja de admitir búsqueda binaria
+            ultimo = self._columna(ruta, "tiempo", filas)[-1]
+            if columnas["tiempo"][0] < ultimo or np.any(np.diff(columnas["tiempo"]) < 0):
+                self._marcar_desordenada(ruta)
+        elif np.any(np.diff(columnas["tiempo"]) < 0):
+            self._marcar_desordenada(ruta)
+        for columna, dtype in ESQUEMA.items():
+            ruta_columna = os.path.join(ruta, f"{columna}.bin")
+            # Recortar una escritura parcial previa para mantener las columnas alineadas
+            if os.path.exists(ruta_columna) and os.path.getsize(ruta_columna) != filas * dtype.itemsize:
+                os.truncate(ruta_columna, filas * dtype.itemsize)
+            with open(ruta_columna, "ab") as f:
+                np.ascontiguousarray(columnas[columna], dtype=dtype).tofile(f)
+
+    def _marcar_desordenada(self, ruta):
+        open(os.path.join(ruta, "desordenada"), "w").close()
+
+    # ---- Lectura ----
+    def _ruta_particion(self, dia):
+        nombre = datetime.fromtimestamp(dia * SEGUNDOS_POR_DIA, timezone.utc).strftime("%Y-%m-%d")
+        return os.path.join(self.directorio, nombre)
+
+    def inicio_particion(self, ruta):
+        """Instante (s) en que empieza el día de una partición"""
+        fecha = datetime.strptime(os.path.basename(ruta), "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        return fecha.timestamp()
+
+    def _filas(self, ruta):
+        """Filas completas de una partición (la columna más corta manda)"""
+        filas = []
+        for columna, dtype in ESQUEMA.items():
+            ruta_columna = os.path.join(ruta, f"{columna}.bin")
+            filas.append(os.path.getsize(ruta_columna) // dtype.itemsize if os.path.exists(ruta_columna) else 0)
+        return min(filas)
+
+    def _columna(self, ruta, columna, filas):
+        return np.memmap(os.path.join(ruta, f"{columna}.bin"), dtype=ESQUEMA[columna], mode="r", shape=(filas,))
+
+    def particiones(self, t_inicio=None, t_fin=None):
+        """Rutas de las particiones que se solapan con [t_inicio, t_fin)"""
+        dia_inicio = -math.inf if t_inicio is None else math.floor(t_inicio / SEGUNDOS_POR_DIA)
+        dia_fin = math.inf if t_fin is None else math.floor(t_fin / SEGUNDOS_POR_DIA)
+        rutas = []
+        for nombre in sorted(os.listdir(self.directorio)):
+            ruta = os.path.join(self.directorio, nombre)
+            if not os.path.isdir(ruta):
+                continue
+            try:
+                fecha = datetime.strptime(nombre, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            except ValueError:
+                continue
+            dia = fecha.timestamp() // SEGUNDOS_POR_DIA
+            if dia_inicio <= dia <= dia_fin:
+                rutas.append(ruta)
+        return rutas
+
+    def consultar(self, t_inicio=None, t_fin=None, vehiculo=None, columnas=tuple(ESQUEMA), bloque=1 << 20):
+        """Itera bloques {columna: arreglo} del rango [t_inicio, t_fin) con memoria acotada"""
+        if isinstance(vehiculo, str):
+            if vehiculo not in self.vehiculos:
+                return
+            vehiculo = self.vehiculos[vehiculo]
+        for ruta in self.particiones(t_inicio, t_fin):
+            filas = self._filas(ruta)
+            if not filas:
+                continue
+            tiempo = self._columna(ruta, "tiempo", filas)
+            if os.path.exists(os.path.join(ruta, "desordenada")):
+                inicio, fin = 0, filas
+            else:
+                inicio = 0 if t_inicio is None else int(np.searchsorted(tiempo, t_inicio, "left"))
+                fin = filas if t_fin is None else int(np.searchsorted(tiempo, t_fin, "left"))
+            datos = {c: self._columna(ruta, c, filas) for c in set(columnas) | {"tiempo", "vehiculo"}}
+            for a in range(inicio, fin, bloque):
+                b = min(a + bloque, fin)
+                seleccion = np.ones(b - a, dtype=bool)
+                if t_inicio is not None:
+                    seleccion &= datos["tiempo"][a:b] >= t_inicio
+                if t_fin is not None:
+                    seleccion &= datos["tiempo"][a:b] < t_fin
+                if vehiculo is not None:
+                    seleccion &= datos["vehiculo"][a:b] == vehiculo
+                if seleccion.any():
+                    yield {c: np.asarray(datos[c][a:b][seleccion]) for c in columnas}
+
+    def contar(self, t_inicio=None, t_fin=None, vehiculo=None):
+        return sum(len(b["tiempo"]) for b in self.consultar(t_inicio, t_fin, vehiculo, ("tiempo",)))
+
+    def rango_tiempo(self):
+        """(primer, último) instante almacenado o None si está vacío"""
+        rutas = [r for r in self.particiones() if self._filas(r)]
+        if not rutas:
+            return None
+        return self._extremo(rutas[0], ultimo=False), self._extremo(rutas[-1], ultimo=True)
+
+    def _extremo(self, ruta, ultimo):
+        """Primer o último instante de una partición; solo se recorre si llegó desordenada"""
+        tiempo = self._columna(ruta, "tiempo", self._filas(ruta))
+        if os.path.exists(os.path.join(ruta, "desordenada")):
+            return float(tiempo.max() if ultimo else tiempo.min())
+        return float(tiempo[-1] if ultimo else tiempo[0])
+
+    def estadisticas(self, t_inicio=None, t_fin=None, vehiculo=None):
+        """Conteo, máximo, mínimo, media y desviación de RPM y temperatura en un rango.
+
+        Se responde con los resúmenes precalculados (ver IndiceResumenes), sin
+        recorrer las muestras salvo los minutos incompletos de los extremos.
+        La desviación es muestral (ddof=1), como `DataFrame.std`.
+        """
+        if isinstance(vehiculo, str):
+            vehiculo = self.vehiculos.get(vehiculo, -2)  # Un id inexistente da un resultado vacío
+        return self.resumenes.estadisticas(t_inicio, t_fin, vehiculo)
+
+    def serie(self, t_inicio, t_fin, vehiculo=None, max_puntos=5000):
+        """Serie resumida (inicio de cubeta, filas de resumen) para gráficos; ver IndiceResumenes.serie"""
+        if isinstance(vehiculo, str):
+            vehiculo = self.vehiculos.get(vehiculo, -2)
+        return self.resumenes.serie(t_inicio, t_fin, vehiculo, max_puntos)
+
+    def estadisticas_crudas(self, t_inicio=None, t_fin=None, vehiculo=None):
+        """Igual que `estadisticas` pero recorriendo todas las muestras del rango.
+
+        Se combinan bloque a bloque (fórmula de Chan) para que la memoria no
+        dependa del tamaño del rango. La desviación es muestral (ddof=1), como
+        `DataFrame.std`.
+        """
+        acumulados = {c: [0, 0.0, 0.0, math.inf, -math.inf] for c in ("rpm", "temperatura")}
+        for bloque in self.consultar(t_inicio, t_fin, vehiculo, ("rpm", "temperatura")):
+            for columna, acc in acumulados.items():
+                valores = bloque[columna].astype(np.float64)
+                n_b, media_b = len(valores), valores.mean()
+                m2_b = ((valores - media_b) ** 2).sum()
+                n, media, m2 = acc[0], acc[1], acc[2]
+                total = n + n_b
+                delta = media_b - media
+                acc[0] = total
+                acc[1] = media + delta * n_b / total
+                acc[2] = m2 + m2_b + delta ** 2 * n * n_b / total
+                acc[3] = min(acc[3], float(valores.min()))
+                acc[4] = max(acc[4], float(valores.max()))
+        resultado = {}
+        for columna, (n, media, m2, minimo, maximo) in acumulados.items():
+            resultado[columna] = {
+                "n": n, "media": media if n else math.nan, "min": minimo if n else math.nan,
+                "max": maximo if n else math.nan, "std": math.sqrt(m2 / (n - 1)) if n > 1 else math.nan,
+            }
+        return resultado
+
+    def muestra(self, t_inicio=None, t_fin=None, vehiculo=None, n=5000):
+        """Submuestra equiespaciada de a lo sumo ~n filas (para gráficos)"""
+        total = self.contar(t_inicio, t_fin, vehiculo)
+        paso = max(1, math.ceil(total / n))
+        partes = {c: [] for c in ESQUEMA}
+        desfase = 0
+        for bloque in self.consultar(t_inicio, t_fin, vehiculo):
+            largo = len(bloque["tiempo"])
+            for c in ESQUEMA:
+                partes[c].append(bloque[c][desfase::paso])
+            desfase = (desfase - largo) % paso
+        return {c: np.concatenate(v) if v else np.empty(0, ESQUEMA[c]) for c, v in partes.items()}
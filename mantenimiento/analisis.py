@@ -0,0 +1,182 @@
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from .espectral import CARACTERISTICAS as ESPECTRALES
+from .estadisticas import EstadisticasMoviles
+from .instrumentacion import instrumentar
+from .reglas import SIN_FALLO, SIN_FALLO_TEXTO, motor_reglas
+
+
+def _variables_historial(datos_rpm, espectro=None):
+    """Variables de las reglas a partir de una secuencia de RPM o un `EstadisticasMoviles`.
+
+    `espectro` son las características del análisis espectral del vehículo
+    ({nombre: float}, ver `AnalizadorEspectral.caracteristicas_de`); sin él
+    valen NaN y ninguna condición sobre ellas se cumple.
+    """
+    if isinstance(datos_rpm, EstadisticasMoviles):
+        media = datos_rpm.media
+        variacion = datos_rpm.std / media * 100 if media else math.nan
+        ultimas = datos_rpm.ultimas(3)
+        std_diferencias = datos_rpm.std_diferencias if len(datos_rpm) > 5 else math.nan
+    else:
+        # Calcular estadísticas
+        media = float(np.mean(datos_rpm))
+        variacion = float(np.std(datos_rpm)) / media * 100 if media else math.nan  # Variación porcentual
+        ultimas = [float(rpm) for rpm in datos_rpm[-3:]]  # Últimas 3 mediciones
+        std_diferencias = float(np.std(np.diff(datos_rpm[-5:]))) if len(datos_rpm) > 5 else math.nan
+    variables = {
+        "variacion": variacion,
+        "media": media,
+        "min_ultimas": min(ultimas, default=math.nan),
+        "max_ultimas": max(ultimas, default=math.nan),
+        "std_diferencias": std_diferencias,
+        "rpm_actual": math.nan,
+        "temperatura": math.nan,
+    }
+    for nombre in ESPECTRALES:
+        variables[nombre] = espectro[nombre] if espectro is not None else math.nan
+    return variables
+
+
+@instrumentar("analisis.irregularidades_rpm")
+def analizar_irregularidades_rpm(datos_rpm, motor=None, espectro=None):
+    """Analiza irregularidades en las RPM y sugiere fallos probables
+
+    `datos_rpm` puede ser una secuencia de RPM o un `EstadisticasMoviles`, en
+    cuyo caso se usan sus estadísticas incrementales sin recalcular la ventana.
+    Las reglas salen de `motor` (un `MotorReglas`; por omisión la tabla de
+    `configuracion.RUTA_REGLAS`). Solo se evalúan las reglas de la ventana:
+    las que dependen de la temperatura o la RPM actual no se cumplen.
+    `espectro` son las características espectrales del vehículo, si las hay.
+    """
+    motor = motor or motor_reglas()
+    irregularidades, fallos_probables, _ = motor.evaluar_uno(_variables_historial(datos_rpm, espectro))
+    return irregularidades, fallos_probables
+
+
+def predecir_fallo(temp_actual, rpm_actual, historial_rpm, motor=None, espectro=None):
+    """Predice el fallo más probable basado en los datos actuales
+
+    Los fallos probables van en orden de prioridad y el principal es el
+    primero (o `SIN_FALLO_TEXTO`). `espectro` son las características del
+    análisis espectral del vehículo, si las hay.
+    """
+    motor = motor or motor_reglas()
+    variables = _variables_historial(historial_rpm, espectro)
+    variables["temperatura"] = float(temp_actual)
+    variables["rpm_actual"] = float(rpm_actual)
+    return motor.evaluar_uno(variables)
+
+
+# ---- Motor vectorizado para flotas ----
+class ResultadoFlota(NamedTuple):
+    """Resultado del análisis de una flota (un elemento por vehículo)"""
+    irregularidades: np.ndarray  # máscara de bits (bit k = k-ésima regla con texto)
+    fallos: np.ndarray  # máscara de bits sobre motor.fallos
+    fallo_principal: np.ndarray  # código en motor.fallos o SIN_FALLO
+    variables: dict  # nombre -> arreglo con las variables de las reglas
+    motor: object  # MotorReglas con el que se evaluó
+
+
+def variables_flota(rpm, temperatura, rpm_actual=None, espectro=None):
+    """Variables de las reglas para una matriz de ventanas (vehículos × ventana)"""
+    rpm = np.asarray(rpm, dtype=np.float64)
+    if rpm.ndim != 2:
+        raise ValueError("rpm debe ser una matriz (vehículos × ventana)")
+    n_vehiculos, ventana = rpm.shape
+    if rpm_actual is None:
+        rpm_actual = rpm[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        media = rpm.mean(axis=1)
+        variacion = rpm.std(axis=1) / media * 100
+    ultimas = rpm[:, -3:]
+    if ventana > 5:
+        std_diferencias = np.diff(rpm[:, -5:], axis=1).std(axis=1)
+    else:
+        std_diferencias = np.full(n_vehiculos, np.nan)
+    variables = {
+        "variacion": variacion,
+        "media": media,
+        "min_ultimas": ultimas.min(axis=1),
+        "max_ultimas": ultimas.max(axis=1),
+        "std_diferencias": std_diferencias,
+        "rpm_actual": np.broadcast_to(np.asarray(rpm_actual, dtype=np.float64), (n_vehiculos,)),
+        "temperatura": np.broadcast_to(np.asarray(temperatura, dtype=np.float64), (n_vehiculos,)),
+    }
+    for nombre in ESPECTRALES:
+        valores = espectro[nombre] if espectro is not None else np.nan
+        variables[nombre] = np.broadcast_to(np.asarray(valores, dtype=np.float64), (n_vehiculos,))
+    return variables
+
+
+@instrumentar("analisis.flota")
+def analizar_flota(rpm, temperatura, rpm_actual=None, motor=None, espectro=None):
+    """Analiza en una sola pasada la ventana de RPM de muchos vehículos.
+
+    `rpm` es una matriz (vehículos × ventana) y `temperatura` un vector con la
+    temperatura actual de cada vehículo. Si no se indica `rpm_actual` se usa la
+    última medición de cada ventana, igual que en el monitoreo en vivo.
+    `espectro` son las características de un `AnalizadorEspectral` de la
+    misma flota (un arreglo por característica, en el orden de las filas).
+    Equivale a llamar a `predecir_fallo` por vehículo con el mismo `motor`.
+    """
+    motor = motor or motor_reglas()
+    variables = variables_flota(rpm, temperatura, rpm_actual, espectro)
+    irregularidades, fallos, fallo_principal = motor.evaluar(variables)
+    return ResultadoFlota(irregularidades, fallos, fallo_principal, variables, motor)
+
+
+def decodificar_vehiculo(resultado, i):
+    """Convierte el resultado de un vehículo al formato de `predecir_fallo`"""
+    motor = resultado.motor
+    variables = {nombre: float(valores[i]) for nombre, valores in resultado.variables.items()}
+    return (motor.describir_irregularidades(int(resultado.irregularidades[i]), variables),
+            motor.nombres_fallos(int(resultado.fallos[i])),
+            motor.nombre_fallo(int(resultado.fallo_principal[i])))
+
+
+class _FilaVariables:
+    """Variables de un vehículo para `str.format_map`, leídas de las columnas solo si el texto las usa"""
+
+    __slots__ = ("columnas", "i")
+
+    def __init__(self, columnas):
+        self.columnas = columnas
+        self.i = 0
+
+    def __getitem__(self, nombre):
+        return self.columnas[nombre][self.i]
+
+
+def decodificar_flota(resultado):
+    """`decodificar_vehiculo` para todos los vehículos del resultado, en una lista.
+
+    Solo se recorren los vehículos con algún bit encendido; los nombres de
+    fallos se resuelven una vez por máscara distinta y cada texto de
+    irregularidad se formatea solo con las variables que usa.
+    """
+    motor = resultado.motor
+    decodificados = [([], [], SIN_FALLO_TEXTO) for _ in range(len(resultado.irregularidades))]
+    con_bits = np.flatnonzero(resultado.irregularidades | resultado.fallos)
+    if not len(con_bits):
+        return decodificados
+    fila = _FilaVariables({nombre: np.asarray(valores).tolist() for nombre, valores in resultado.variables.items()})
+    textos, nombres = {}, {}
+    for i, bits, mascara, principal in zip(con_bits.tolist(), resultado.irregularidades[con_bits].tolist(),
+                                           resultado.fallos[con_bits].tolist(),
+                                           resultado.fallo_principal[con_bits].tolist()):
+        irregularidades = []
+        if bits:
+            plantillas = textos.get(bits)
+            if plantillas is None:
+                plantillas = textos[bits] = [texto.format_map for k, texto in enumerate(motor.textos) if bits >> k & 1]
+            fila.i = i
+            irregularidades = [formatear(fila) for formatear in plantillas]
+        fallos = nombres.get(mascara)
+        if fallos is None:
+            fallos = nombres[mascara] = (motor.nombres_fallos(mascara), motor.nombre_fallo(principal))
+        decodificados[i] = (irregularidades, list(fallos[0]), fallos[1])
+    return decodificados
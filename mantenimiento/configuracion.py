@@ -0,0 +1,24 @@
+import os
+
+# ---- Configuración de Telegram (se puede sobrescribir con variables de entorno) ----
+TELEGRAM_TOKEN = os.environ.get("TELEGRAM_TOKEN", "7991651835:AAE6ZPekhcddQs8yBc6Q0HzwBWaymfE-23c")
+TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "6583159864")
+
+# ---- Almacén de telemetría ----
+RUTA_ALMACEN = os.environ.get("MIA_ALMACEN", "datos/telemetria")
+
+# ---- Modelo de anomalías entrenado ----
+RUTA_MODELO = os.environ.get("MIA_MODELO", "datos/modelo_anomalias.npz")
+
+# ---- Tabla de reglas de fallos (se recarga al modificarla) ----
+RUTA_REGLAS = os.environ.get("MIA_REGLAS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "reglas.toml"))
+
+# ---- Muestreo de las RPM por el puerto serial (Hz; 0 = sin análisis espectral) ----
+FRECUENCIA_SERIAL = float(os.environ.get("MIA_FRECUENCIA_SERIAL", "0"))
+
+# ---- Estado de las alertas (deduplicación y escalamiento, sobrevive a reinicios) ----
+RUTA_ALERTAS = os.environ.get("MIA_ALERTAS", "datos/alertas.sqlite3")
+
+# ---- Instrumentación (MIA_INSTRUMENTACION=0 la quita al importar; puerto 0 = sin servidor de métricas) ----
+INSTRUMENTACION = os.environ.get("MIA_INSTRUMENTACION", "1") != "0"
+PUERTO_METRICAS = int(os.environ.get("MIA_METRICAS_PUERTO", "0"))
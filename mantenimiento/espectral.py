@@ -0,0 +1,157 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .instrumentacion import instrumentar
+
+# Características de seguimiento de órdenes que entrega el análisis (variables de las reglas)
+CARACTERISTICAS = ("subarmonicos", "orden_1", "orden_dominante")
+# Órdenes semienteros: un cilindro que falla una vez por ciclo (dos vueltas en
+# un motor de cuatro tiempos) deja potencia en ellos; el giro sano, en los enteros
+ORDENES_SUBARMONICOS = (0.5, 1.5, 2.5, 3.5)
+ORDEN_MINIMO = 0.25  # Por debajo, la potencia es la deriva del ciclo de manejo y no cuenta en el total
+
+
+class AnalizadorEspectral:
+    """Espectro de Welch de las RPM de muchos vehículos, actualizado por bloques.
+
+    Las muestras de todos los vehículos llegan juntas (vehículos × k) a
+    `frecuencia` Hz. Cada `paso` muestras se cierra un segmento solapado de
+    `muestras_segmento` por vehículo: se le quita la media, se le aplica una
+    ventana de Hann y su periodograma entra a un anillo con los últimos
+    `segmentos`, cuyo promedio es el espectro de Welch. Los segmentos que se
+    cierran en un bloque, de todos los vehículos, van en una sola FFT real y
+    ninguna muestra se transforma dos veces en el mismo segmento.
+
+    Las características son de seguimiento de órdenes: cada segmento se mide
+    con su propia frecuencia de giro (RPM media / 60), así que el orden 1 es
+    una vez por vuelta aunque la velocidad cambie entre segmentos. Por
+    segmento se guarda la potencia en los órdenes semienteros
+    (`ORDENES_SUBARMONICOS`), en el orden 1 y la total desde `ORDEN_MINIMO`;
+    las fracciones salen de sumarlas sobre el anillo.
+    """
+
+    def __init__(self, vehiculos, frecuencia=1000.0, muestras_segmento=512, solapamiento=0.5, segmentos=8):
+        if not 0 <= solapamiento < 1:
+            raise ValueError("El solapamiento debe estar en [0, 1)")
+        try:
+            from scipy import fft  # Diferido: importar el módulo no carga scipy
+        except ImportError:  # Sin scipy, la FFT de numpy (bastante más lenta en float32)
+            fft = np.fft
+        self._fft = fft
+        self.n_vehiculos = vehiculos
+        self.frecuencia = float(frecuencia)
+        self.muestras_segmento = muestras_segmento
+        self.paso = max(1, round(muestras_segmento * (1 - solapamiento)))
+        self.segmentos = segmentos
+        self.frecuencias = np.fft.rfftfreq(muestras_segmento, 1 / self.frecuencia)
+        # Hann periódica y densidad de un lado, como scipy.signal.welch
+        self.ventana = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(muestras_segmento) / muestras_segmento)).astype(np.float32)
+        escala = np.full(len(self.frecuencias), 2 / (self.frecuencia * float((self.ventana ** 2).sum())), np.float32)
+        escala[0] /= 2
+        if muestras_segmento % 2 == 0:
+            escala[-1] /= 2
+        self._escala = escala
+
+        self._pendientes = np.empty((vehiculos, 0), dtype=np.float32)  # Muestras de segmentos aún abiertos
+        self._periodogramas = np.zeros((segmentos, vehiculos, len(self.frecuencias)), dtype=np.float32)
+        # Por segmento y vehículo: RPM media y potencia total, semientera y en el orden 1
+        self._giro = np.zeros((segmentos, vehiculos))
+        self._bandas = np.zeros((3, segmentos, vehiculos))
+        self.cerrados = 0  # Segmentos cerrados desde el inicio (por vehículo)
+        self._caracteristicas = (None, None)  # (cerrados, características): solo cambian al cerrar segmentos
+
+    @instrumentar("espectral.agregar")
+    def agregar(self, rpm):
+        """Incorpora un bloque de muestras (vehículos × k); devuelve los segmentos que cerró"""
+        rpm = np.asarray(rpm, dtype=np.float32).reshape(self.n_vehiculos, -1)
+        datos = np.concatenate([self._pendientes, rpm], axis=1)
+        n = (datos.shape[1] - self.muestras_segmento) // self.paso + 1 if datos.shape[1] >= self.muestras_segmento else 0
+        if n:
+            # Solo los últimos `segmentos` quedan en el anillo: no hace falta transformar los anteriores
+            primero = max(0, n - self.segmentos)
+            segmentos = sliding_window_view(datos, self.muestras_segmento, axis=1)[:, primero * self.paso:n * self.paso:self.paso]
+            self._procesar(segmentos, self.cerrados + primero)
+            self.cerrados += n
+            datos = datos[:, n * self.paso:]
+        self._pendientes = np.ascontiguousarray(datos)
+        return n
+
+    def _procesar(self, segmentos, indice):
+        """Periodogramas y potencias por orden de segmentos (vehículos × s × muestras)"""
+        medias = segmentos.mean(axis=2, dtype=np.float32)
+        x = segmentos - medias[..., None]
+        x *= self.ventana
+        espectro = self._fft.rfft(x, axis=2)
+        potencia = espectro.real ** 2
+        potencia += espectro.imag ** 2
+        potencia *= self._escala
+
+        # Potencia por orden con la frecuencia de giro de cada segmento (± un bin alrededor del orden)
+        giro = medias.astype(np.float64) / 60
+        df = self.frecuencias[1]
+        n_bins = len(self.frecuencias)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inicio_total = np.ceil(ORDEN_MINIMO * giro / df)
+        acumulada = np.cumsum(potencia, axis=2, dtype=np.float64)
+        total = acumulada[..., -1] - _tomar(acumulada, np.clip(inicio_total - 1, -1, n_bins - 1))
+
+        def banda(orden):
+            centro = np.rint(orden * giro / df)
+            fuera = ~(centro + 1 < n_bins)  # Por encima de Nyquist (o giro inválido): sin aporte
+            centro = np.where(fuera, 1, centro)
+            valor = _tomar(acumulada, centro + 1) - _tomar(acumulada, centro - 2)
+            return np.where(fuera, 0.0, valor)
+
+        semienteros = sum(banda(orden) for orden in ORDENES_SUBARMONICOS)
+        casillas = (indice + np.arange(segmentos.shape[1])) % self.segmentos
+        self._periodogramas[casillas] = potencia.transpose(1, 0, 2)
+        self._giro[casillas] = giro.T
+        self._bandas[:, casillas] = np.stack([total, semienteros, banda(1.0)]).transpose(0, 2, 1)
+
+    # ---- Lectura ----
+    @property
+    def llenos(self):
+        """Segmentos vigentes en el anillo"""
+        return min(self.cerrados, self.segmentos)
+
+    def densidad(self):
+        """Espectro de Welch actual (vehículos × frecuencias), en RPM²/Hz"""
+        if not self.llenos:
+            return np.full((self.n_vehiculos, len(self.frecuencias)), np.nan)
+        return self._periodogramas[:self.llenos].mean(axis=0)
+
+    @instrumentar("espectral.caracteristicas")
+    def caracteristicas(self):
+        """{característica: arreglo por vehículo}; NaN mientras no haya segmentos o si el motor está detenido"""
+        cerrados, resultado = self._caracteristicas
+        if cerrados == self.cerrados:
+            return resultado
+        n = self.llenos
+        if not n:
+            return {nombre: np.full(self.n_vehiculos, np.nan) for nombre in CARACTERISTICAS}
+        total, semienteros, orden_1 = self._bandas[:, :n].sum(axis=1)
+        giro = self._giro[:n].mean(axis=0)
+        densidad = self.densidad()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ordenes = self.frecuencias / giro[:, None]
+            densidad[~(ordenes >= ORDEN_MINIMO)] = -1  # Fuera del pico dominante
+            dominante = np.take_along_axis(ordenes, densidad.argmax(axis=1)[:, None], axis=1)[:, 0]
+            validos = (giro > 0) & (total > 0)
+            resultado = {
+                "subarmonicos": np.where(validos, semienteros / total, np.nan),
+                "orden_1": np.where(validos, orden_1 / total, np.nan),
+                "orden_dominante": np.where(validos, dominante, np.nan),
+            }
+        self._caracteristicas = (self.cerrados, resultado)
+        return resultado
+
+    def caracteristicas_de(self, i):
+        """Características de un vehículo como floats (para `predecir_fallo`)"""
+        return {nombre: float(valores[i]) for nombre, valores in self.caracteristicas().items()}
+
+
+def _tomar(acumulada, indices):
+    """acumulada[..., indices] por elemento; el índice -1 vale 0 (suma vacía)"""
+    indices = np.clip(indices, -1, acumulada.shape[-1] - 1).astype(np.int64)
+    valores = np.take_along_axis(acumulada, np.maximum(indices, 0)[..., None], axis=-1)[..., 0]
+    return np.where(indices < 0, 0.0, valores)
@@ -0,0 +1,110 @@
+import math
+
+import numpy as np
+
+
+class _VentanaWelford:
+    """Media y suma de cuadrados de una ventana deslizante (actualización de Welford)"""
+
+    # Cada cuántas salidas se recalcula desde el buffer para acotar el error acumulado
+    RECALCULO = 4096
+
+    def __init__(self, tamano):
+        if tamano < 1:
+            raise ValueError("El tamaño de la ventana debe ser al menos 1")
+        self.tamano = tamano
+        self.buffer = np.zeros(tamano, dtype=np.float64)
+        self.inicio = 0
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self._salidas = 0
+
+    def agregar(self, x):
+        if self.n < self.tamano:
+            self.buffer[(self.inicio + self.n) % self.tamano] = x
+            self.n += 1
+            delta = x - self.media
+            self.media += delta / self.n
+            self.m2 += delta * (x - self.media)
+            return
+        # Ventana llena: sale el valor más antiguo y entra el nuevo
+        y = float(self.buffer[self.inicio])
+        self.buffer[self.inicio] = x
+        self.inicio = (self.inicio + 1) % self.tamano
+        media_anterior = self.media
+        self.media += (x - y) / self.n
+        self.m2 += (x - y) * (x - self.media + y - media_anterior)
+        self._salidas += 1
+        if self._salidas >= self.RECALCULO:
+            self._recalcular()
+
+    def _recalcular(self):
+        valores = self.buffer[: self.n]
+        self.media = float(valores.mean())
+        self.m2 = float(((valores - self.media) ** 2).sum())
+        self._salidas = 0
+
+    @property
+    def varianza(self):
+        return max(self.m2, 0.0) / self.n if self.n else math.nan
+
+    def ultimo(self, k=1):
+        """Valor k-ésimo desde el final (k=1 es el más reciente)"""
+        return float(self.buffer[(self.inicio + self.n - k) % self.tamano])
+
+
+class EstadisticasMoviles:
+    """Estadísticas de las últimas `tamano` RPM actualizadas en tiempo constante.
+
+    Mantiene la media, la varianza, la variación porcentual y la desviación de
+    las diferencias entre las últimas 5 mediciones sin recorrer la ventana.
+    Se puede pasar directamente a `analizar_irregularidades_rpm` y
+    `predecir_fallo` en lugar de la lista de historial.
+    """
+
+    def __init__(self, tamano=10, ventana_patron=5):
+        self.tamano = tamano
+        self.ventana_patron = ventana_patron
+        self._valores = _VentanaWelford(tamano)
+        self._diferencias = _VentanaWelford(ventana_patron - 1)
+
+    def agregar(self, rpm):
+        rpm = float(rpm)
+        if len(self):
+            self._diferencias.agregar(rpm - self._valores.ultimo())
+        self._valores.agregar(rpm)
+
+    def __len__(self):
+        return self._valores.n
+
+    @property
+    def media(self):
+        return self._valores.media if len(self) else math.nan
+
+    @property
+    def varianza(self):
+        return self._valores.varianza
+
+    @property
+    def std(self):
+        return math.sqrt(self.varianza)
+
+    @property
+    def variacion(self):
+        """Coeficiente de variación en porcentaje"""
+        return self.std / self.media * 100
+
+    @property
+    def std_diferencias(self):
+        """Desviación de las diferencias entre las últimas `ventana_patron` mediciones"""
+        return math.sqrt(self._diferencias.varianza)
+
+    def ultimas(self, k):
+        """Últimas k mediciones (de la más antigua a la más reciente)"""
+        k = min(k, len(self))
+        return [self._valores.ultimo(j) for j in range(k, 0, -1)]
+
+    def valores(self):
+        """Copia ordenada de la ventana completa"""
+        return np.roll(self._valores.buffer[: len(self)], -self._valores.inicio)
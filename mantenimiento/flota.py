@@ -0,0 +1,326 @@
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .analisis import analizar_flota, decodificar_flota
+from .espectral import CARACTERISTICAS as ESPECTRALES
+from .espectral import AnalizadorEspectral
+from .instrumentacion import instrumentar
+from .monitoreo import ADVERTENCIA, CRITICO, NORMAL, PLANTILLAS_ALERTA, UMBRALES_POR_DEFECTO, mensajes_alerta
+from .reglas import motor_reglas
+from .reloj import obtener_fecha_hora_mty
+from .supresion import SupresorAlertas
+
+TIPOS_ALERTA = tuple(PLANTILLAS_ALERTA)
+NIVELES = (NORMAL, ADVERTENCIA, CRITICO)
+
+
+def _matriz(valores):
+    """Los valores de cada vehículo en un arreglo si todos tienen la misma forma; si no, la lista.
+
+    Un arreglo se serializa hacia los procesos mucho más rápido que miles de
+    arreglos pequeños.
+    """
+    if isinstance(valores, np.ndarray):
+        return valores
+    try:
+        return np.array(valores, dtype=np.float64)
+    except ValueError:  # Cantidades distintas por vehículo
+        return valores
+
+
+def _temperaturas(valores):
+    """(actual, máxima) de cada vehículo a partir de su temperatura o sus temperaturas del tick"""
+    valores = _matriz(valores)
+    if isinstance(valores, np.ndarray) and valores.ndim == 1:
+        return valores, valores
+    if isinstance(valores, np.ndarray) and valores.ndim == 2 and valores.shape[1]:
+        return valores[:, -1], valores.max(axis=1)
+    filas = [np.atleast_1d(np.asarray(v, dtype=np.float64)) for v in valores]
+    return np.array([f[-1] for f in filas]), np.array([f.max() for f in filas])
+
+
+class _Particion:
+    """Estado de los vehículos de un trabajador en matrices, para evaluarlos en una pasada.
+
+    Equivale a un `EstadoVehiculo` con `evaluar_vehiculo` por vehículo: el
+    historial de RPM es una fila por vehículo (alineada a la derecha) y la
+    predicción sale de `analizar_flota`. En Python solo quedan el supresor,
+    que se consulta para las claves que exceden su umbral o siguen activas,
+    y los textos de los vehículos con irregularidades.
+
+    Con `frecuencia_espectral` las RPM también alimentan un
+    `AnalizadorEspectral` de toda la partición, que solo avanza en los ticks
+    que traen a todos sus vehículos con la misma cantidad de muestras; si un
+    tick no los trae (o llega un vehículo nuevo) la serie se corta y el
+    espectro vuelve a empezar.
+    """
+
+    def __init__(self, ventana, supresor, frecuencia_espectral=None):
+        self.ventana = ventana
+        self.supresor = supresor
+        self.frecuencia_espectral = frecuencia_espectral
+        self.espectro = None
+        self.filas = {}  # vehiculo -> fila
+        self.historial = np.zeros((0, ventana))
+        self.muestras = np.zeros(0, dtype=np.int64)
+        self.activas = np.zeros((0, len(TIPOS_ALERTA)), dtype=bool)  # Copia de las claves activas del supresor
+
+    def _agregar_vehiculos(self, vehiculos):
+        for vehiculo in vehiculos:
+            self.filas[vehiculo] = len(self.filas)
+        self.historial = np.concatenate([self.historial, np.zeros((len(vehiculos), self.ventana))])
+        self.muestras = np.concatenate([self.muestras, np.zeros(len(vehiculos), dtype=np.int64)])
+        # Las alertas persistidas pueden seguir activas de una ejecución anterior
+        activas = [[self.supresor.estado(v, tipo).activa for tipo in TIPOS_ALERTA] for v in vehiculos]
+        self.activas = np.concatenate([self.activas, np.array(activas, dtype=bool).reshape(-1, len(TIPOS_ALERTA))])
+
+    def _caracteristicas(self, filas, grupos):
+        """Características espectrales por fila, o None si este tick corta la serie de algún vehículo"""
+        if len(grupos) != 1 or len(filas) != len(self.filas):
+            self.espectro = None
+            return None
+        if self.espectro is None or self.espectro.n_vehiculos != len(self.filas):
+            self.espectro = AnalizadorEspectral(len(self.filas), self.frecuencia_espectral)
+        nuevas = grupos[0][1]
+        por_fila = np.empty_like(nuevas)
+        por_fila[filas] = nuevas
+        self.espectro.agregar(por_fila)
+        return self.espectro.caracteristicas()
+
+    def evaluar(self, vehiculos, rpm, temperaturas, umbrales, notificar=True):
+        """Resultados de `evaluar_vehiculo` para cada vehículo.
+
+        `rpm` son las RPM nuevas de cada vehículo (una matriz si todos traen
+        la misma cantidad) y `temperaturas` su temperatura o sus temperaturas
+        del tick, en el orden de `vehiculos`.
+        """
+        n = len(vehiculos)
+        if not n:
+            return {}
+        nuevos = [vehiculo for vehiculo in vehiculos if vehiculo not in self.filas]
+        if nuevos:
+            self._agregar_vehiculos(nuevos)
+        filas = np.fromiter((self.filas[v] for v in vehiculos), dtype=np.int64, count=n)
+
+        # Historial y extremos del tick, agrupando los vehículos por cantidad de muestras nuevas
+        rpm = _matriz(rpm)
+        if isinstance(rpm, np.ndarray):
+            largos = np.full(n, rpm.shape[1], dtype=np.int64)
+            grupos = [(np.arange(n), rpm)]
+        else:
+            largos = np.fromiter(map(len, rpm), dtype=np.int64, count=n)
+            grupos = [(grupo, np.array([rpm[i] for i in grupo], dtype=np.float64).reshape(len(grupo), -1))
+                      for grupo in (np.flatnonzero(largos == k) for k in np.unique(largos))]
+        rpm_actual, rpm_max, rpm_min = np.empty(n), np.empty(n), np.empty(n)
+        for grupo, nuevas in grupos:
+            k = nuevas.shape[1]
+            f = filas[grupo]
+            if k >= self.ventana:
+                self.historial[f] = nuevas[:, -self.ventana:]
+            else:
+                self.historial[f] = np.concatenate([self.historial[f][:, k:], nuevas], axis=1)
+            rpm_actual[grupo], rpm_max[grupo], rpm_min[grupo] = nuevas[:, -1], nuevas.max(axis=1), nuevas.min(axis=1)
+        self.muestras[filas] += largos
+        temp_actual, temp_max = _temperaturas(temperaturas)
+        espectro = self._caracteristicas(filas, grupos) if self.frecuencia_espectral else None
+
+        # Predicción: una matriz por largo de ventana (todas llenas salvo en los primeros ticks)
+        motor = motor_reglas()
+        irregularidades = np.zeros(n, dtype=np.int64)
+        decodificados = [None] * n
+        llenas = np.minimum(self.muestras[filas], self.ventana)
+        for m in np.unique(llenas):
+            grupo = np.flatnonzero(llenas == m)
+            resultado = analizar_flota(self.historial[filas[grupo], -m:], temp_actual[grupo], motor=motor,
+                                       espectro=None if espectro is None else
+                                       {nombre: valores[filas[grupo]] for nombre, valores in espectro.items()})
+            irregularidades[grupo] = resultado.irregularidades
+            if len(grupo) == n:
+                decodificados = decodificar_flota(resultado)
+            else:
+                for i, decodificado in zip(grupo.tolist(), decodificar_flota(resultado)):
+                    decodificados[i] = decodificado
+
+        # Alertas: (algún valor del tick excede el umbral, todo el tick volvió más allá de la histéresis)
+        excede = np.column_stack([temp_max > umbrales["temp_max"], rpm_max > umbrales["rpm_max"],
+                                  rpm_min < umbrales["rpm_min"]])
+        despejada = np.column_stack([temp_max <= umbrales["temp_max"] - umbrales["hist_temp"],
+                                     rpm_max <= umbrales["rpm_max"] - umbrales["hist_rpm_alta"],
+                                     rpm_min >= umbrales["rpm_min"] + umbrales["hist_rpm_baja"]])
+        advertencia = (temp_max > umbrales["temp_min"]) | (irregularidades != 0)
+        estado = np.where(excede.any(axis=1), 2, advertencia.astype(np.int64))  # Índice en NIVELES
+
+        alertas = {}
+        ahora = time.time()
+        # Una clave inactiva que no excede no cambia de estado: solo se consultan las demás
+        ii, jj = np.nonzero(excede | self.activas[filas])
+        for i, j, fila, excede_ij, despejada_ij in zip(ii.tolist(), jj.tolist(), filas[ii].tolist(),
+                                                        excede[ii, jj].tolist(), despejada[ii, jj].tolist()):
+            vehiculo, tipo = vehiculos[i], TIPOS_ALERTA[j]
+            nivel = self.supresor.actualizar(vehiculo, tipo, excede_ij, despejada_ij, ahora, notificar)
+            self.activas[fila, j] = self.supresor.estado(vehiculo, tipo).activa
+            if nivel:
+                alertas.setdefault(i, {})[tipo] = nivel
+
+        resultados = {}
+        por_vehiculo = [None] * n
+        if espectro is not None:
+            por_vehiculo = [dict(zip(ESPECTRALES, valores))
+                            for valores in zip(*(espectro[nombre][filas].tolist() for nombre in ESPECTRALES))]
+        extremos = zip(temp_max.tolist(), rpm_max.tolist(), rpm_min.tolist())
+        for i, (vehiculo, rpm, temperatura, (t_max, r_max, r_min), nivel, muestras) in enumerate(zip(
+                vehiculos, rpm_actual.tolist(), temp_actual.tolist(), extremos, estado.tolist(),
+                self.muestras[filas].tolist())):
+            textos, probables, principal = decodificados[i]
+            niveles = alertas.get(i, {})
+            resultados[vehiculo] = {
+                "rpm": rpm,
+                "temperatura": temperatura,
+                "extremos": {"temperatura": t_max, "rpm_alta": r_max, "rpm_baja": r_min},
+                "irregularidades": textos,
+                "fallos_probables": probables,
+                "fallo_principal": principal,
+                "puntaje_anomalia": None,
+                "espectro": por_vehiculo[i],
+                "estado": NIVELES[nivel],
+                "alertas": list(niveles),
+                "niveles_alerta": niveles,
+                "muestras": muestras,
+            }
+        return resultados
+
+
+def _trabajador(conexion, ventana, ruta_alertas, frecuencia_espectral):
+    """Proceso que conserva el estado de los vehículos de su partición"""
+    # Cada proceso abre el archivo de alertas y solo escribe las claves de sus vehículos
+    supresor = SupresorAlertas(ruta_alertas)
+    particion = _Particion(ventana, supresor, frecuencia_espectral)
+    while True:
+        mensaje = conexion.recv()
+        if mensaje is None:
+            break
+        conexion.send(particion.evaluar(*mensaje))
+    supresor.cerrar()
+    conexion.close()
+
+
+class MonitorFlota:
+    """Evalúa muchos vehículos en paralelo con un conjunto fijo de trabajadores.
+
+    Cada vehículo se asigna siempre al mismo trabajador (por hash de su
+    nombre), que guarda su estado entre ticks y evalúa su partición como una
+    matriz (ver `_Particion`). Con `modo="procesos"` cada trabajador es un
+    proceso y el análisis escala con los núcleos; con `modo="hilos"` el
+    estado vive en este proceso y el GIL limita la escala. Con `ruta_alertas`
+    el estado de las alertas persiste en ese archivo SQLite (ver
+    SupresorAlertas). Con `frecuencia_espectral` (Hz de muestreo de las RPM)
+    se agrega el análisis espectral de cada vehículo a la predicción.
+    """
+
+    def __init__(self, trabajadores=None, modo="procesos", ventana=10, umbrales=None, ruta_alertas=None,
+                 frecuencia_espectral=None):
+        if modo not in ("procesos", "hilos"):
+            raise ValueError("modo debe ser 'procesos' o 'hilos'")
+        self.trabajadores = trabajadores or os.cpu_count() or 1
+        self.modo = modo
+        self.ventana = ventana
+        self.umbrales = dict(UMBRALES_POR_DEFECTO, **(umbrales or {}))
+        self.ultimo = {}  # vehiculo -> último resultado
+        if modo == "procesos":
+            contexto = multiprocessing.get_context("spawn")
+            self._conexiones, self._procesos = [], []
+            for _ in range(self.trabajadores):
+                local, remota = contexto.Pipe()
+                proceso = contexto.Process(target=_trabajador, args=(remota, ventana, ruta_alertas, frecuencia_espectral),
+                                          daemon=True)
+                proceso.start()
+                self._conexiones.append(local)
+                self._procesos.append(proceso)
+        else:
+            self._supresor = SupresorAlertas(ruta_alertas)
+            self._particiones = [_Particion(ventana, self._supresor, frecuencia_espectral)
+                                 for _ in range(self.trabajadores)]
+            self._pool = ThreadPoolExecutor(self.trabajadores, thread_name_prefix="flota")
+
+    def _particion(self, vehiculo):
+        return zlib.crc32(str(vehiculo).encode()) % self.trabajadores
+
+    @instrumentar("flota.actualizar")
+    def actualizar(self, lote, notificar=True):
+        """Evalúa un tick: `lote` mapea vehiculo -> (rpm nuevas, temperatura actual).
+
+        Con `notificar=False` las alertas no se envían y el supresor no las
+        consume (ver SupresorAlertas.actualizar).
+        """
+        # Por partición: (vehículos, RPM nuevas, temperaturas) en el mismo orden
+        particiones = [([], [], []) for _ in range(self.trabajadores)]
+        for vehiculo, (rpm, temperatura) in lote.items():
+            if len(rpm):
+                vehiculos, rpm_nuevas, temperaturas = particiones[self._particion(vehiculo)]
+                vehiculos.append(vehiculo)
+                rpm_nuevas.append(rpm)
+                temperaturas.append(temperatura)
+        resultados = {}
+        if self.modo == "procesos":
+            for conexion, (vehiculos, rpm_nuevas, temperaturas) in zip(self._conexiones, particiones):
+                conexion.send((vehiculos, _matriz(rpm_nuevas), _matriz(temperaturas), self.umbrales, notificar))
+            for conexion in self._conexiones:
+                resultados.update(conexion.recv())
+        else:
+            for parcial in self._pool.map(
+                lambda i: self._particiones[i].evaluar(*particiones[i], self.umbrales, notificar),
+                range(self.trabajadores),
+            ):
+                resultados.update(parcial)
+        self.ultimo.update(resultados)
+        return resultados
+
+    def resumen(self):
+        """Filas para la tabla de la flota (una por vehículo)"""
+        return [
+            {
+                "Vehículo": vehiculo,
+                "RPM": round(r["rpm"]),
+                "Temperatura (°C)": round(r["temperatura"], 1),
+                "Estado": r["estado"],
+                "Irregularidades": len(r["irregularidades"]),
+                "Fallo probable": r["fallo_principal"],
+                "Muestras": r["muestras"],
+            }
+            for vehiculo, r in sorted(self.ultimo.items())
+        ]
+
+    def cerrar(self):
+        if self.modo == "procesos":
+            for conexion, proceso in zip(self._conexiones, self._procesos):
+                try:
+                    conexion.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                proceso.join(timeout=1)
+                conexion.close()
+        else:
+            self._pool.shutdown()
+            self._supresor.cerrar()
+
+
+def monitorear_flota(monitor, lotes, enviar=None, notificar=None):
+    """Ciclo sin interfaz de la flota: evalúa cada lote y envía sus alertas.
+
+    `enviar` recibe (mensaje, irregularidades, fallo_principal) y `notificar`
+    indica en cada tick si está activo, como en `monitoreo.monitorear`.
+    Genera por tick los resultados nuevos y la tabla de resumen de toda la
+    flota.
+    """
+    for lote in lotes:
+        resultados = monitor.actualizar(lote, notificar is None or notificar())
+        if enviar is not None:
+            for mensaje, irregularidades, fallo_principal in mensajes_alerta(
+                    resultados, monitor.umbrales, obtener_fecha_hora_mty()[2]):
+                enviar(mensaje, irregularidades, fallo_principal)
+        yield {"resultados": resultados, "resumen": monitor.resumen()}
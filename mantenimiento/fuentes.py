@@ -0,0 +1,62 @@
+import time
+
+import numpy as np
+
+from .ingesta import COL_RPM, COL_TEMP, COL_TIEMPO
+from .reloj import hora_de_muestra
+
+# Cada tick es (tiempos, rpm nuevas, temperaturas nuevas, etiqueta de hora, progreso o None, texto de estado)
+
+
+def generar_datos_sinteticos():
+    """Datos sintéticos de 24 horas con irregularidades (DataFrame de pandas)"""
+    import pandas as pd
+
+    np.random.seed(42)
+    horas = np.arange(0, 24)
+    # Datos más realistas con posibles irregularidades
+    rpm = np.random.normal(3000, 500, 24)  # Aumentada la desviación estándar para mayor variación
+    # Añadir algunas irregularidades
+    rpm[5:8] += np.random.normal(1000, 200, 3)  # Pico de RPM más alto
+    rpm[15:18] -= np.random.normal(800, 150, 3)  # Caída de RPM más pronunciada
+
+    datos = pd.DataFrame({
+        "Hora": horas,
+        "RPM": rpm,
+        "Temperatura (°C)": np.random.normal(35, 10, 24)  # Temperaturas más bajas para ajustar a 40°C
+    })
+    return datos
+
+
+def ticks_sinteticos(datos):
+    """Recorre los datos sintéticos fila por fila (un tick por fila)"""
+    horas, rpm, temperatura = datos["Hora"].values, datos["RPM"].values, datos["Temperatura (°C)"].values
+    for i in range(len(datos)):
+        yield (horas[i:i+1], rpm[i:i+1], temperatura[i:i+1], f"{horas[i]}:00",
+               (i + 1) / len(datos), f"Procesando datos: {i + 1}/{len(datos)}")
+
+
+def ticks_ingesta(ingesta, espera=0.01):
+    """Entrega en cada tick las muestras llegadas desde el tick anterior"""
+    cursor = None
+    while True:
+        nuevas, cursor, perdidas = ingesta.leer(cursor)
+        if not len(nuevas):
+            if not ingesta.activa:
+                return
+            time.sleep(espera)
+            continue
+        metricas = ingesta.metricas()
+        yield (nuevas[:, COL_TIEMPO], nuevas[:, COL_RPM], nuevas[:, COL_TEMP], hora_de_muestra(nuevas[-1, COL_TIEMPO]),
+               None, f"Muestras: {metricas['total']} | Nuevas: {len(nuevas)} | Perdidas: {metricas['perdidas']} | "
+               f"Malformadas: {metricas['malformadas']}")
+
+
+def ticks_flota(n_vehiculos, n_ticks, muestras_por_tick=10, seed=42):
+    """Genera en cada tick 10 lecturas de RPM y la temperatura de cada vehículo"""
+    rng = np.random.default_rng(seed)
+    for _ in range(n_ticks):
+        rpm = rng.normal(3000, 500, (n_vehiculos, muestras_por_tick))
+        rpm[rng.random(n_vehiculos) < 0.05] += 3000  # Algunos vehículos con picos de RPM
+        temperatura = rng.normal(35, 10, n_vehiculos)
+        yield {f"Vehículo {v + 1}": (rpm[v], temperatura[v]) for v in range(n_vehiculos)}
@@ -0,0 +1,129 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from .instrumentacion import instrumentar
+
+
+class DiezmadorMinMax:
+    """Diezmado min/max incremental con un presupuesto fijo de puntos.
+
+    Agrupa las muestras en cubetas de tamaño creciente y guarda el mínimo y el
+    máximo de cada una. Cuando se supera el presupuesto, fusiona cubetas
+    vecinas de dos en dos y duplica su tamaño, así el costo por muestra es
+    O(1) amortizado y la serie dibujada nunca pasa de `presupuesto` puntos,
+    conservando los picos que interesan en el monitoreo.
+    """
+
+    def __init__(self, presupuesto=2000):
+        if presupuesto < 4:
+            raise ValueError("El presupuesto debe ser de al menos 4 puntos")
+        self.max_cubetas = presupuesto // 2 - 1  # Reserva una cubeta para la parcial
+        self.tamano = 1
+        self.n = 0
+        self._cubetas = np.empty((self.max_cubetas + 1, 4))  # x_min, y_min, x_max, y_max
+        self._n_cubetas = 0
+        self._parcial_x = []
+        self._parcial_y = []
+
+    def __len__(self):
+        return self.n
+
+    def agregar(self, x, y):
+        x = np.asarray(x, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+        self.n += len(x)
+        # Completar la cubeta parcial
+        if self._parcial_x:
+            faltan = self.tamano - len(self._parcial_x)
+            self._parcial_x.extend(x[:faltan])
+            self._parcial_y.extend(y[:faltan])
+            x, y = x[faltan:], y[faltan:]
+            if len(self._parcial_x) == self.tamano:
+                self._cerrar(np.array(self._parcial_x)[None], np.array(self._parcial_y)[None])
+                self._parcial_x, self._parcial_y = [], []
+        # Cubetas completas en bloque
+        while len(x) >= self.tamano:
+            completas = min(len(x) // self.tamano, self.max_cubetas + 1 - self._n_cubetas)
+            k = completas * self.tamano
+            self._cerrar(x[:k].reshape(completas, self.tamano), y[:k].reshape(completas, self.tamano))
+            x, y = x[k:], y[k:]
+        self._parcial_x.extend(x)
+        self._parcial_y.extend(y)
+
+    def _cerrar(self, bx, by):
+        filas = np.arange(len(by))
+        i_min, i_max = by.argmin(axis=1), by.argmax(axis=1)
+        nuevas = np.column_stack([bx[filas, i_min], by[filas, i_min], bx[filas, i_max], by[filas, i_max]])
+        self._cubetas[self._n_cubetas:self._n_cubetas + len(nuevas)] = nuevas
+        self._n_cubetas += len(nuevas)
+        if self._n_cubetas > self.max_cubetas:
+            self._compactar()
+
+    def _compactar(self):
+        """Fusiona cubetas vecinas de dos en dos"""
+        pares = self._n_cubetas // 2
+        c = self._cubetas[:2 * pares].reshape(pares, 2, 4)
+        usa_min = c[:, 1, 1] < c[:, 0, 1]
+        usa_max = c[:, 1, 3] > c[:, 0, 3]
+        fusion = np.where(usa_min[:, None], c[:, 1, :2], c[:, 0, :2])
+        fusion = np.column_stack([fusion, np.where(usa_max[:, None], c[:, 1, 2:], c[:, 0, 2:])])
+        sobrante = self._cubetas[2 * pares:self._n_cubetas].copy()
+        self._cubetas[:pares] = fusion
+        self._cubetas[pares:pares + len(sobrante)] = sobrante
+        self._n_cubetas = pares + len(sobrante)
+        # La cubeta impar sobrante queda con medio tamaño; se acepta el pequeño desbalance
+        self.tamano *= 2
+
+    def puntos(self):
+        """Serie diezmada (x, y) ordenada por x"""
+        c = self._cubetas[:self._n_cubetas]
+        primero_min = c[:, 0] <= c[:, 2]
+        x = np.where(primero_min[:, None], c[:, [0, 2]], c[:, [2, 0]]).ravel()
+        y = np.where(primero_min[:, None], c[:, [1, 3]], c[:, [3, 1]]).ravel()
+        # Si el mínimo y el máximo son la misma muestra se dibuja una sola vez
+        distintos = np.ones(len(x), dtype=bool)
+        distintos[1::2] = c[:, 0] != c[:, 2]
+        x, y = x[distintos], y[distintos]
+        if self._parcial_x:
+            px_, py_ = np.array(self._parcial_x), np.array(self._parcial_y)
+            i_min, i_max = sorted((int(py_.argmin()), int(py_.argmax())))
+            indices = [i_min] if i_min == i_max else [i_min, i_max]
+            x = np.concatenate([x, px_[indices]])
+            y = np.concatenate([y, py_[indices]])
+        return x, y
+
+
+class GraficoEnVivo:
+    """Gráfico de líneas persistente que solo recibe las muestras nuevas.
+
+    Mantiene una figura `go.Figure` y un diezmador por variable; en cada tick
+    se agregan los puntos nuevos y se actualizan los trazos en sitio, de modo
+    que el costo de dibujar queda acotado por `presupuesto` sin importar
+    cuánto dure el monitoreo.
+    """
+
+    def __init__(self, variables, titulo="", presupuesto=2000, convertir_x=None):
+        self.variables = list(variables)
+        self.convertir_x = convertir_x
+        self.diezmadores = {v: DiezmadorMinMax(presupuesto) for v in self.variables}
+        self.figura = go.Figure(
+            data=[go.Scatter(x=[], y=[], mode="lines", name=v) for v in self.variables],
+            layout=go.Layout(title=titulo, xaxis_title="Hora", yaxis_title="value", legend_title="variable"),
+        )
+
+    def agregar(self, x, valores):
+        """Agrega un bloque de muestras; `valores` mapea variable -> arreglo"""
+        for variable, diezmador in self.diezmadores.items():
+            diezmador.agregar(x, valores[variable])
+
+    @instrumentar("graficos.en_vivo")
+    def mostrar(self, variables):
+        """Actualiza los trazos y devuelve la figura con las variables pedidas"""
+        with self.figura.batch_update():
+            for trazo in self.figura.data:
+                trazo.visible = trazo.name in variables
+                if trazo.visible:
+                    x, y = self.diezmadores[trazo.name].puntos()
+                    trazo.x = self.convertir_x(x) if self.convertir_x else x
+                    trazo.y = y
+        return self.figura
@@ -0,0 +1,233 @@
+import threading
+import time
+
+import numpy as np
+
+# Columnas de cada muestra en el buffer
+COL_TIEMPO, COL_RPM, COL_TEMP = 0, 1, 2
+COLUMNAS = ("Tiempo", "RPM", "Temperatura (°C)")
+
+
+class BufferCircular:
+    """Buffer circular preasignado de muestras (tiempo, RPM, temperatura).
+
+    Un hilo productor escribe con `escribir` y el consumidor lee sin bloquear
+    con `leer(cursor)`, que devuelve solo las muestras nuevas. Si el
+    consumidor se atrasa más que la capacidad, las muestras más antiguas se
+    sobrescriben y se cuentan como perdidas; con `bloquear=True` el productor
+    espera en su lugar (contrapresión para fuentes que pueden pausar).
+    """
+
+    def __init__(self, capacidad=65536):
+        self.capacidad = capacidad
+        self._datos = np.zeros((capacidad, len(COLUMNAS)), dtype=np.float64)
+        self._total = 0  # Muestras escritas desde el inicio (secuencia)
+        self._leido = 0  # Posición del consumidor principal
+        self._cond = threading.Condition()
+        self.perdidas = 0
+        self.esperas = 0
+
+    @property
+    def total(self):
+        return self._total
+
+    def escribir(self, filas, bloquear=False, timeout=None):
+        """Añade un bloque (k × 3); devuelve cuántas filas se escribieron"""
+        filas = np.asarray(filas, dtype=np.float64).reshape(-1, len(COLUMNAS))
+        if len(filas) > self.capacidad:
+            filas = filas[-self.capacidad:]
+        k = len(filas)
+        if not k:
+            return 0
+        with self._cond:
+            if bloquear and self._total - self._leido + k > self.capacidad:
+                self.esperas += 1
+                if not self._cond.wait_for(lambda: self._total - self._leido + k <= self.capacidad, timeout):
+                    return 0
+            inicio = self._total % self.capacidad
+            primera = min(k, self.capacidad - inicio)
+            self._datos[inicio:inicio + primera] = filas[:primera]
+            self._datos[:k - primera] = filas[primera:]
+            self._total += k
+            self._cond.notify_all()
+        return k
+
+    def leer(self, cursor=None):
+        """Devuelve (muestras nuevas desde `cursor`, nuevo cursor, perdidas)"""
+        with self._cond:
+            total = self._total
+            if cursor is None:
+                cursor = self._leido
+            perdidas = max(0, total - self.capacidad - cursor)
+            cursor += perdidas
+            bloque = self._copiar(cursor, total)
+            if perdidas:
+                self.perdidas += perdidas
+            self._leido = max(self._leido, total)
+            self._cond.notify_all()
+        return bloque, total, perdidas
+
+    def ultimas(self, n):
+        """Copia de las últimas n muestras sin mover el cursor del consumidor"""
+        with self._cond:
+            total = self._total
+            return self._copiar(max(0, total - min(n, self.capacidad)), total)
+
+    def _copiar(self, desde, hasta):
+        indices = np.arange(desde, hasta) % self.capacidad
+        return self._datos[indices]
+
+    def metricas(self):
+        with self._cond:
+            return {"total": self._total, "pendientes": self._total - self._leido,
+                    "perdidas": self.perdidas, "esperas": self.esperas}
+
+
+def parsear_tramas(datos, resto=b"", reloj=time.time):
+    """Convierte tramas de texto `rpm,temperatura` o `tiempo,rpm,temperatura`.
+
+    Devuelve (filas k × 3, resto incompleto, tramas malformadas). Las tramas
+    sin marca de tiempo reciben la hora de llegada.
+    """
+    lineas = (resto + datos).split(b"\n")
+    resto = lineas.pop()
+    filas = []
+    malformadas = 0
+    ahora = reloj()
+    for linea in lineas:
+        campos = linea.strip().split(b",")
+        try:
+            valores = [float(c) for c in campos]
+        except ValueError:
+            malformadas += 1
+            continue
+        if len(valores) == 2:
+            filas.append((ahora, valores[0], valores[1]))
+        elif len(valores) == 3:
+            filas.append(tuple(valores))
+        elif campos != [b""]:
+            malformadas += 1
+    return np.array(filas, dtype=np.float64).reshape(-1, len(COLUMNAS)), resto, malformadas
+
+
+class FuenteSerial:
+    """Lee tramas de un puerto serial o de una URL de pyserial (socket://, loop://, pty)"""
+
+    bloquea = False  # El puerto no puede pausarse: si el buffer se llena se pierden muestras
+
+    def __init__(self, puerto, baudios=115200, timeout=0.05):
+        import serial
+
+        self.puerto = serial.serial_for_url(puerto, baudrate=baudios, timeout=timeout)
+        self._resto = b""
+        self.malformadas = 0
+
+    def leer(self):
+        datos = self.puerto.read(max(1, self.puerto.in_waiting))
+        if not datos:
+            return None
+        filas, self._resto, malformadas = parsear_tramas(datos, self._resto)
+        self.malformadas += malformadas
+        return filas
+
+    def cerrar(self):
+        self.puerto.close()
+
+
+class FuenteReproduccion:
+    """Reproduce datos grabados (n × 2 de RPM y temperatura) a una frecuencia fija.
+
+    Pensada para pruebas de carga: entrega a 1–10 kHz en bloques según el
+    tiempo transcurrido, con marcas de tiempo espaciadas 1/frecuencia.
+    """
+
+    bloquea = True
+
+    def __init__(self, datos, frecuencia_hz=1000.0, repetir=True, bloque_max=4096):
+        self.datos = np.asarray(datos, dtype=np.float64).reshape(-1, 2)
+        self.frecuencia_hz = frecuencia_hz
+        self.repetir = repetir
+        self.bloque_max = bloque_max
+        self._posicion = 0
+        self._entregadas = 0
+        self._inicio = None
+        self.malformadas = 0
+
+    def leer(self):
+        ahora = time.perf_counter()
+        if self._inicio is None:
+            self._inicio = ahora
+        debidas = int((ahora - self._inicio) * self.frecuencia_hz) - self._entregadas
+        if debidas <= 0:
+            time.sleep(min(0.001, 1 / self.frecuencia_hz))
+            return None
+        n = len(self.datos)
+        if not self.repetir:
+            debidas = min(debidas, n - self._posicion)
+            if debidas <= 0:
+                raise EOFError("Fin de la reproducción")
+        k = min(debidas, self.bloque_max)
+        indices = (self._posicion + np.arange(k)) % n
+        filas = np.empty((k, len(COLUMNAS)))
+        filas[:, COL_TIEMPO] = time.time() + (np.arange(k) - k + 1) / self.frecuencia_hz
+        filas[:, COL_RPM:] = self.datos[indices]
+        self._posicion = (self._posicion + k) % n if self.repetir else self._posicion + k
+        self._entregadas += k
+        return filas
+
+    def cerrar(self):
+        pass
+
+
+class Ingesta:
+    """Hilo dedicado que lleva las muestras de una fuente al buffer circular.
+
+    Si se indica un `almacen` (AlmacenTelemetria), cada bloque también se
+    persiste en disco a nombre de `vehiculo`.
+    """
+
+    def __init__(self, fuente, capacidad=65536, almacen=None, vehiculo="Vehículo 1"):
+        self.fuente = fuente
+        self.buffer = BufferCircular(capacidad)
+        self.almacen = almacen
+        self.vehiculo = vehiculo
+        self.error = None
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._ejecutar, name="ingesta", daemon=True)
+        self._hilo.start()
+
+    def _ejecutar(self):
+        try:
+            while not self._detener.is_set():
+                filas = self.fuente.leer()
+                if filas is not None and len(filas):
+                    if self.almacen is not None:
+                        self.almacen.agregar(filas[:, COL_TIEMPO], self.vehiculo, filas[:, COL_RPM], filas[:, COL_TEMP])
+                    while not self.buffer.escribir(filas, bloquear=self.fuente.bloquea, timeout=0.1):
+                        if self._detener.is_set():
+                            return
+        except EOFError:
+            pass
+        except Exception as e:  # Se informa en la interfaz en lugar de matar el proceso
+            self.error = e
+        finally:
+            self.fuente.cerrar()
+
+    @property
+    def activa(self):
+        return self._hilo.is_alive()
+
+    def leer(self, cursor=None):
+        return self.buffer.leer(cursor)
+
+    def ultimas(self, n):
+        return self.buffer.ultimas(n)
+
+    def metricas(self):
+        resultado = self.buffer.metricas()
+        resultado["malformadas"] = self.fuente.malformadas
+        return resultado
+
+    def detener(self, timeout=1.0):
+        self._detener.set()
+        self._hilo.join(timeout)
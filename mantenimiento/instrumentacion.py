@@ -0,0 +1,205 @@
+import functools
+import itertools
+import threading
+import time
+
+import numpy as np
+
+from . import configuracion
+
+# Se decide al importar: desactivada, `instrumentar` devuelve la función original y
+# `medir` un contexto vacío compartido, así que no queda costo en el camino caliente
+ACTIVA = configuracion.INSTRUMENTACION
+CAPACIDAD = 2048  # Duraciones recientes por operación (potencia de 2)
+CUANTILES = (0.5, 0.95, 0.99)
+
+
+class Serie:
+    """Duraciones recientes de una operación en un buffer circular.
+
+    `registrar` no toma locks: el índice sale de un `itertools.count` (atómico
+    con el GIL) y cada muestra ocupa su propia casilla. El total acumulado de
+    segundos puede perder alguna suma si dos hilos registran a la vez.
+
+    Con `muestreo` > 1 solo se mide una de cada `muestreo` llamadas; los
+    cuantiles salen de las medidas y el total, la suma, la tasa y la
+    ocupación se escalan para estimar los de todas las llamadas.
+    """
+
+    def __init__(self, nombre, capacidad=CAPACIDAD, muestreo=1):
+        self.nombre = nombre
+        self.muestreo = muestreo
+        self.inicios = [0.0] * capacidad
+        self.duraciones = [0.0] * capacidad
+        self.total = 0
+        self.suma = 0.0
+        self._contador = itertools.count()
+        self._mascara = capacidad - 1
+
+    def registrar(self, inicio, fin):
+        i = next(self._contador)
+        j = i & self._mascara
+        self.inicios[j] = inicio
+        self.duraciones[j] = fin - inicio
+        self.total = i + 1
+        self.suma += fin - inicio
+
+    def resumen(self, ahora=None):
+        """Cuantiles de la ventana reciente, llamadas por segundo y fracción del tiempo ocupada"""
+        total, suma = self.total * self.muestreo, self.suma * self.muestreo
+        n = min(self.total, len(self.duraciones))
+        if not n:
+            return {"total": total, "suma": suma, "n": 0}
+        duraciones = np.array(self.duraciones[:n])
+        inicios = np.array(self.inicios[:n])
+        ahora = time.perf_counter() if ahora is None else ahora
+        lapso = max(ahora - float(inicios.min()), 1e-9)
+        resultado = {"total": total, "suma": suma, "n": n, "max": float(duraciones.max()),
+                     "tasa": n * self.muestreo / lapso, "ocupacion": float(duraciones.sum()) * self.muestreo / lapso}
+        for q, valor in zip(CUANTILES, np.quantile(duraciones, CUANTILES)):
+            resultado[f"p{round(q * 100)}"] = float(valor)
+        return resultado
+
+
+_series = {}
+_lock = threading.Lock()
+
+
+def serie(nombre, muestreo=1):
+    """La serie de `nombre` (se crea al primer uso)"""
+    s = _series.get(nombre)
+    if s is None:
+        with _lock:
+            s = _series.setdefault(nombre, Serie(nombre, muestreo=muestreo))
+    return s
+
+
+def instrumentar(nombre, muestreo=1):
+    """Decorador que registra la duración de las llamadas en la serie `nombre`.
+
+    Para funciones que corren en cada tick y duran decenas de µs, leer el
+    reloj dos veces ya pesa más del 1%: con `muestreo` = N se mide solo una
+    de cada N llamadas (ver `Serie`). Aun así la envoltura agrega una llamada
+    con *args/**kwargs en cada una; en un ciclo caliente conviene medir
+    desde el ciclo con `registrador`.
+    """
+    def decorar(funcion):
+        if not ACTIVA:
+            return funcion
+        registrar = serie(nombre, muestreo).registrar
+        reloj = time.perf_counter
+
+        if muestreo > 1:
+            llamadas = itertools.count()
+
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                if next(llamadas) % muestreo:
+                    return funcion(*args, **kwargs)
+                inicio = reloj()
+                try:
+                    return funcion(*args, **kwargs)
+                finally:
+                    registrar(inicio, reloj())
+            return envoltura
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            inicio = reloj()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                registrar(inicio, reloj())
+        return envoltura
+    return decorar
+
+
+class _Medicion:
+    __slots__ = ("registrar", "inicio")
+
+    def __init__(self, registrar):
+        self.registrar = registrar
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        self.registrar(self.inicio, time.perf_counter())
+
+
+class _SinMedicion:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        pass
+
+
+_SIN_MEDICION = _SinMedicion()
+
+
+def registrador(nombre, muestreo=1):
+    """`registrar(inicio, fin)` de la serie `nombre` para medir a mano desde un ciclo caliente
+    (None si la instrumentación está desactivada)"""
+    return serie(nombre, muestreo).registrar if ACTIVA else None
+
+
+def medir(nombre):
+    """Contexto que registra la duración del bloque en la serie `nombre`"""
+    return _Medicion(serie(nombre).registrar) if ACTIVA else _SIN_MEDICION
+
+
+def resumen():
+    """{operación: resumen} de todas las series con al menos una llamada"""
+    ahora = time.perf_counter()
+    return {nombre: s.resumen(ahora) for nombre, s in sorted(_series.items()) if s.total}
+
+
+def reiniciar():
+    with _lock:
+        _series.clear()
+
+
+# ---- Exposición en formato de texto de Prometheus ----
+def texto_prometheus():
+    """Las series como un `summary` de Prometheus (cuantiles de la ventana reciente)"""
+    lineas = ["# HELP mia_duracion_segundos Duración de las operaciones del monitoreo.",
+              "# TYPE mia_duracion_segundos summary"]
+    ocupacion = ["# HELP mia_ocupacion Fracción del tiempo reciente que ocupa cada operación.",
+                 "# TYPE mia_ocupacion gauge"]
+    for nombre, r in resumen().items():
+        etiqueta = nombre.replace("\\", "\\\\").replace('"', '\\"')
+        for q in CUANTILES:
+            lineas.append(f'mia_duracion_segundos{{operacion="{etiqueta}",quantile="{q}"}} {r[f"p{round(q * 100)}"]!r}')
+        lineas.append(f'mia_duracion_segundos_sum{{operacion="{etiqueta}"}} {r["suma"]!r}')
+        lineas.append(f'mia_duracion_segundos_count{{operacion="{etiqueta}"}} {r["total"]}')
+        ocupacion.append(f'mia_ocupacion{{operacion="{etiqueta}"}} {r["ocupacion"]!r}')
+    return "\n".join(lineas + ocupacion) + "\n"
+
+
+def servir_metricas(puerto=9108, host="127.0.0.1"):
+    """Sirve `texto_prometheus` en http://host:puerto/metrics desde un hilo; devuelve el servidor"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            cuerpo = texto_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((host, puerto), Manejador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="metricas-prometheus", daemon=True).start()
+    return servidor
@@ -0,0 +1,196 @@
+import json
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Características de cada ventana de RPM (mismas estadísticas que EstadisticasMoviles)
+CARACTERISTICAS = ("rpm_media", "log_rpm_std", "log_std_diferencias", "temperatura")
+VENTANA_PATRON = 5
+
+
+def caracteristicas(rpm, temperatura):
+    """Características de un lote de ventanas.
+
+    `rpm` es una matriz (ventanas × tamaño) y `temperatura` la temperatura de
+    cada ventana (la última medición). Las desviaciones van en escala
+    logarítmica para que su distribución sea más cercana a una normal.
+    """
+    rpm = np.asarray(rpm, dtype=np.float64)
+    x = np.empty((len(rpm), len(CARACTERISTICAS)))
+    x[:, 0] = rpm.mean(axis=1)
+    x[:, 1] = np.log1p(rpm.std(axis=1))
+    x[:, 2] = np.log1p(np.diff(rpm[:, -VENTANA_PATRON:], axis=1).std(axis=1))
+    x[:, 3] = temperatura
+    return x
+
+
+def caracteristicas_serie(rpm, temperatura, tamano=10, paso=1):
+    """Características de las ventanas deslizantes de una serie (una por `paso`).
+
+    Devuelve (características, índice de la última muestra de cada ventana).
+    """
+    rpm = np.asarray(rpm, dtype=np.float64)
+    if len(rpm) < tamano:
+        return np.empty((0, len(CARACTERISTICAS))), np.empty(0, dtype=np.int64)
+    fin = np.arange(tamano - 1, len(rpm), paso)
+    ventanas = sliding_window_view(rpm, tamano)[::paso]
+    return caracteristicas(ventanas, np.asarray(temperatura)[fin]), fin
+
+
+def caracteristicas_estado(historial_rpm, temperatura):
+    """Características de la ventana actual de un `EstadisticasMoviles` (una fila)"""
+    return np.array([[historial_rpm.media, np.log1p(historial_rpm.std),
+                      np.log1p(historial_rpm.std_diferencias), temperatura]])
+
+
+class ModeloAnomalias:
+    """Detector gaussiano con una línea base por vehículo.
+
+    Por cada vehículo guarda la media de las características y el factor de
+    Cholesky de la inversa de su covarianza, así que el puntaje (distancia de
+    Mahalanobis al cuadrado) de un lote de ventanas es una resta y un
+    producto de matrices. El umbral de cada vehículo es el cuantil
+    `cuantil` de los puntajes de su entrenamiento. Los vehículos sin datos
+    suficientes usan el modelo global (última fila de los arreglos).
+    """
+
+    def __init__(self, vehiculos, medias, factores, umbrales, tamano=10, cuantil=0.999):
+        self.vehiculos = list(vehiculos)
+        self.medias = np.asarray(medias, dtype=np.float64)
+        self.factores = np.asarray(factores, dtype=np.float64)
+        self.umbrales = np.asarray(umbrales, dtype=np.float64)
+        self.tamano = tamano
+        self.cuantil = cuantil
+        self._indices = {nombre: i for i, nombre in enumerate(self.vehiculos)}
+
+    # ---- Entrenamiento ----
+    @staticmethod
+    def _ajustar_gaussiana(x, cuantil, recortes=1):
+        """(media, factor, umbral) con un recorte de atípicos antes del ajuste final"""
+        seleccion = x
+        for _ in range(recortes + 1):
+            media = seleccion.mean(axis=0)
+            covarianza = np.cov(seleccion, rowvar=False)
+            # Regularización para ventanas casi constantes
+            covarianza += np.eye(len(media)) * (1e-6 * np.trace(covarianza) / len(media) + 1e-12)
+            factor = np.linalg.cholesky(np.linalg.inv(covarianza))
+            puntajes = (((x - media) @ factor) ** 2).sum(axis=1)
+            umbral = float(np.quantile(puntajes, cuantil))
+            seleccion = x[puntajes <= umbral]
+        umbral = float(np.quantile((((seleccion - media) @ factor) ** 2).sum(axis=1), cuantil))
+        return media, factor, umbral
+
+    @classmethod
+    def ajustar(cls, por_vehiculo, tamano=10, cuantil=0.999, min_ventanas=50):
+        """Ajusta el modelo con `por_vehiculo`: nombre -> características (n × d)"""
+        vehiculos, medias, factores, umbrales = [], [], [], []
+        todas = []
+        for nombre, x in por_vehiculo.items():
+            x = np.asarray(x, dtype=np.float64)
+            todas.append(x)
+            if len(x) < min_ventanas:
+                continue
+            media, factor, umbral = cls._ajustar_gaussiana(x, cuantil)
+            vehiculos.append(nombre)
+            medias.append(media)
+            factores.append(factor)
+            umbrales.append(umbral)
+        todas = np.concatenate(todas) if todas else np.empty((0, len(CARACTERISTICAS)))
+        if len(todas) < min_ventanas:
+            raise ValueError(f"Se necesitan al menos {min_ventanas} ventanas para entrenar")
+        media, factor, umbral = cls._ajustar_gaussiana(todas, cuantil)
+        medias.append(media)
+        factores.append(factor)
+        umbrales.append(umbral)
+        return cls(vehiculos, medias, factores, umbrales, tamano, cuantil)
+
+    # ---- Puntaje ----
+    def indices(self, vehiculos):
+        """Índice del modelo de cada vehículo (-1 = global si no se entrenó)"""
+        if vehiculos is None:
+            return -1
+        if isinstance(vehiculos, str):
+            return self._indices.get(vehiculos, -1)
+        return np.array([self._indices.get(v, -1) for v in vehiculos], dtype=np.int64)
+
+    def puntuar(self, x, indices=-1):
+        """Distancia de Mahalanobis al cuadrado de cada ventana.
+
+        `indices` es un índice de `indices()` para todo el lote o un arreglo
+        con uno por ventana.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if np.ndim(indices) == 0:
+            z = (x - self.medias[indices]) @ self.factores[indices]
+        else:
+            z = np.einsum("nd,nde->ne", x - self.medias[indices], self.factores[indices])
+        return np.einsum("ne,ne->n", z, z)
+
+    def anomalas(self, x, indices=-1):
+        """(máscara de ventanas anómalas, puntajes normalizados por el umbral)"""
+        relativo = self.puntuar(x, indices) / self.umbrales[indices]
+        return relativo > 1.0, relativo
+
+    # ---- Persistencia ----
+    def guardar(self, ruta):
+        """Guarda el modelo en un .npz (sin pickle); la escritura es atómica"""
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        temporal = ruta + ".tmp.npz"
+        np.savez(temporal, medias=self.medias, factores=self.factores, umbrales=self.umbrales,
+                 meta=np.array(json.dumps({"vehiculos": self.vehiculos, "tamano": self.tamano,
+                                           "cuantil": self.cuantil, "caracteristicas": CARACTERISTICAS},
+                                          ensure_ascii=False)))
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta, allow_pickle=False) as datos:
+            meta = json.loads(str(datos["meta"]))
+            if tuple(meta["caracteristicas"]) != CARACTERISTICAS:
+                raise ValueError("El modelo se entrenó con otras características; vuelva a entrenarlo")
+            return cls(meta["vehiculos"], datos["medias"], datos["factores"], datos["umbrales"],
+                       meta["tamano"], meta["cuantil"])
+
+
+def _ventanas_por_vehiculo(almacen, t_inicio, t_fin, vehiculo, tamano, paso):
+    """Itera (id de vehículo, características, tiempo final de cada ventana) por bloque.
+
+    Las ventanas se arman dentro de cada bloque del almacén (memoria acotada)
+    y por vehículo, aunque sus muestras estén intercaladas.
+    """
+    for bloque in almacen.consultar(t_inicio, t_fin, vehiculo, ("tiempo", "vehiculo", "rpm", "temperatura")):
+        for id_vehiculo in np.unique(bloque["vehiculo"]):
+            seleccion = bloque["vehiculo"] == id_vehiculo
+            x, fin = caracteristicas_serie(bloque["rpm"][seleccion], bloque["temperatura"][seleccion], tamano, paso)
+            if len(x):
+                yield int(id_vehiculo), x, bloque["tiempo"][seleccion][fin]
+
+
+def entrenar_desde_almacen(almacen, t_inicio=None, t_fin=None, tamano=10, paso=5, cuantil=0.999,
+                           max_ventanas=200_000):
+    """Ajusta un `ModeloAnomalias` con la telemetría histórica de cada vehículo.
+
+    Se usan a lo sumo `max_ventanas` por vehículo, las más recientes.
+    """
+    partes = {}
+    for id_vehiculo, x, _ in _ventanas_por_vehiculo(almacen, t_inicio, t_fin, None, tamano, paso):
+        partes.setdefault(almacen.nombre_vehiculo(id_vehiculo), []).append(x)
+    por_vehiculo = {nombre: np.concatenate(x)[-max_ventanas:] for nombre, x in partes.items()}
+    return ModeloAnomalias.ajustar(por_vehiculo, tamano, cuantil)
+
+
+def puntuar_almacen(modelo, almacen, t_inicio=None, t_fin=None, vehiculo=None, paso=1):
+    """Puntúa por lotes las ventanas almacenadas de un rango.
+
+    Devuelve (tiempo de la última muestra de cada ventana, id de vehículo,
+    puntaje normalizado por el umbral; > 1 es anómalo).
+    """
+    tiempos, ids, relativos = [], [], []
+    for id_vehiculo, x, fin in _ventanas_por_vehiculo(almacen, t_inicio, t_fin, vehiculo, modelo.tamano, paso):
+        tiempos.append(fin)
+        ids.append(np.full(len(fin), id_vehiculo, dtype=np.int32))
+        relativos.append(modelo.anomalas(x, modelo.indices(almacen.nombre_vehiculo(id_vehiculo)))[1])
+    if not tiempos:
+        return np.empty(0), np.empty(0, dtype=np.int32), np.empty(0)
+    return np.concatenate(tiempos), np.concatenate(ids), np.concatenate(relativos)
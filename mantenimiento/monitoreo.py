@@ -0,0 +1,199 @@
+import functools
+import time
+from collections import ChainMap
+
+import numpy as np
+
+from .analisis import predecir_fallo
+from .espectral import AnalizadorEspectral
+from .estadisticas import EstadisticasMoviles
+from .instrumentacion import registrador
+from .modelo import caracteristicas_estado
+from .supresion import SupresorAlertas
+
+# Los `hist_*` son la histéresis: una alerta activa se despeja solo al volver ese margen del umbral
+UMBRALES_POR_DEFECTO = {"temp_min": 30, "temp_max": 40, "rpm_min": 1000, "rpm_max": 5700,
+                        "hist_temp": 2.0, "hist_rpm_alta": 200, "hist_rpm_baja": 100}
+
+NORMAL, ADVERTENCIA, CRITICO = "normal", "advertencia", "critico"
+
+# `monitorear` mide una de cada tantas evaluaciones (cada una dura decenas de µs)
+MUESTREO_EVALUACION = 8
+
+# Texto de las alertas por tipo, con el umbral que muestra cada una; `valor` es el extremo del
+# tick que cruzó el umbral (con una muestra por tick, el valor actual)
+PLANTILLAS_ALERTA = {
+    "temperatura": ("temp_max", "🚨 ALERTA: Temperatura crítica detectada\n\n{vehiculo}• Valor actual: {valor:.1f}°C\n"
+                                "• Umbral máximo: {umbral}°C\n• Hora de la muestra: {hora}\n• RPM: {rpm:.0f}"),
+    "rpm_alta": ("rpm_max", "🚨 ALERTA: RPM críticas detectadas\n\n{vehiculo}• Valor actual: {valor:.0f} RPM\n"
+                            "• Umbral máximo: {umbral} RPM\n• Hora de la muestra: {hora}\n• Temperatura: {temperatura:.1f}°C"),
+    "rpm_baja": ("rpm_min", "⚠️ ADVERTENCIA: RPM bajas detectadas\n\n{vehiculo}• Valor actual: {valor:.0f} RPM\n"
+                            "• Umbral mínimo: {umbral} RPM\n• Hora de la muestra: {hora}\n• Temperatura: {temperatura:.1f}°C"),
+}
+# Variable de cada alerta en el resultado (sin extremos del tick, se usa la actual)
+VARIABLE_ALERTA = {"temperatura": "temperatura", "rpm_alta": "rpm", "rpm_baja": "rpm"}
+
+
+class EstadoVehiculo:
+    """Estado de monitoreo de un vehículo (historial de RPM y supresor de sus alertas)
+
+    Sin `supresor` las alertas se deduplican solo en memoria. Con `espectro`
+    (un `AnalizadorEspectral` de un vehículo) las RPM también alimentan el
+    análisis espectral y sus características entran a la predicción.
+    """
+
+    def __init__(self, ventana=10, vehiculo=None, supresor=None, espectro=None):
+        self.historial_rpm = EstadisticasMoviles(ventana)
+        self.vehiculo = vehiculo
+        self.supresor = supresor if supresor is not None else SupresorAlertas()
+        self.espectro = espectro
+        self.muestras = 0
+
+
+def evaluar_vehiculo(estado, rpm_nuevas, temp_nuevas, umbrales, modelo=None, indice_modelo=-1, ahora=None,
+                     notificar=True):
+    """Incorpora las RPM nuevas de un vehículo y evalúa `predecir_fallo`.
+
+    Devuelve el resultado del tick con el estado general (normal,
+    advertencia o crítico) y las alertas que corresponde enviar según el
+    supresor del vehículo (deduplicación, histéresis, enfriamiento y
+    escalamiento; `ahora` es el instante de la muestra). Con
+    `notificar=False` no hay a quién enviarlas y el supresor no las consume.
+    `temp_nuevas` son las temperaturas del tick (o solo la actual). Los
+    umbrales se comparan con los extremos del tick, así que un pico que
+    empieza y termina dentro de un tick también alerta; la predicción usa
+    los valores actuales (la última muestra). Con un `modelo`
+    (ModeloAnomalias) también se puntúa la ventana actual contra la línea
+    base del vehículo `indice_modelo`; una ventana anómala cuenta como
+    irregularidad.
+    """
+    for rpm in rpm_nuevas:
+        estado.historial_rpm.agregar(rpm)
+    estado.muestras += len(rpm_nuevas)
+    rpm_actual = float(rpm_nuevas[-1])
+    temperaturas = np.atleast_1d(temp_nuevas)
+    temp_actual = float(temperaturas[-1])
+    # Extremos del tick: un pico entre dos ticks no debe pasar desapercibido
+    rpm_max, rpm_min = float(np.max(rpm_nuevas)), float(np.min(rpm_nuevas))
+    temp_max = float(temperaturas.max())
+    espectro = None
+    if estado.espectro is not None:
+        estado.espectro.agregar(rpm_nuevas)
+        espectro = estado.espectro.caracteristicas_de(0)
+    irregularidades, fallos_probables, fallo_principal = predecir_fallo(temp_actual, rpm_actual, estado.historial_rpm,
+                                                                        espectro=espectro)
+
+    puntaje = None
+    if modelo is not None and len(estado.historial_rpm) >= modelo.tamano:
+        anomala, relativo = modelo.anomalas(caracteristicas_estado(estado.historial_rpm, temp_actual), indice_modelo)
+        puntaje = float(relativo[0])
+        if anomala[0]:
+            irregularidades.append(f"Comportamiento anómalo respecto a la línea base (puntaje {puntaje:.1f})")
+
+    # Determinar el estado general
+    if temp_max > umbrales["temp_max"] or rpm_max > umbrales["rpm_max"] or rpm_min < umbrales["rpm_min"]:
+        nivel = CRITICO
+    elif temp_max > umbrales["temp_min"] or irregularidades:
+        nivel = ADVERTENCIA
+    else:
+        nivel = NORMAL
+
+    # (tipo, algún valor del tick excede el umbral, todo el tick volvió más allá de la histéresis)
+    alertas, niveles = [], {}
+    for tipo, excede, despejada in (
+        ("temperatura", temp_max > umbrales["temp_max"], temp_max <= umbrales["temp_max"] - umbrales["hist_temp"]),
+        ("rpm_alta", rpm_max > umbrales["rpm_max"], rpm_max <= umbrales["rpm_max"] - umbrales["hist_rpm_alta"]),
+        ("rpm_baja", rpm_min < umbrales["rpm_min"], rpm_min >= umbrales["rpm_min"] + umbrales["hist_rpm_baja"]),
+    ):
+        nivel_alerta = estado.supresor.actualizar(estado.vehiculo, tipo, excede, despejada, ahora, notificar)
+        if nivel_alerta:
+            alertas.append(tipo)
+            niveles[tipo] = nivel_alerta
+
+    return {
+        "rpm": rpm_actual,
+        "temperatura": temp_actual,
+        "extremos": {"temperatura": temp_max, "rpm_alta": rpm_max, "rpm_baja": rpm_min},
+        "irregularidades": irregularidades,
+        "fallos_probables": fallos_probables,
+        "fallo_principal": fallo_principal,
+        "puntaje_anomalia": puntaje,
+        "espectro": espectro,
+        "estado": nivel,
+        "alertas": alertas,
+        "niveles_alerta": niveles,
+        "muestras": estado.muestras,
+    }
+
+
+@functools.lru_cache(maxsize=64, typed=True)
+def _plantilla(tipo, umbral):
+    """`format` de la plantilla de `tipo` con el umbral ya sustituido (se compila una vez por valor)"""
+    texto = str(umbral).replace("{", "{{").replace("}", "}}")
+    return PLANTILLAS_ALERTA[tipo][1].replace("{umbral}", texto).format
+
+
+def _renderizar(plantilla, tipo, resultado, hora, vehiculo):
+    extremos = resultado.get("extremos")
+    valor = extremos[tipo] if extremos is not None else resultado[VARIABLE_ALERTA[tipo]]
+    texto = plantilla(vehiculo=f"• Vehículo: {vehiculo}\n" if vehiculo is not None else "", hora=hora,
+                      rpm=resultado["rpm"], temperatura=resultado["temperatura"], valor=valor)
+    nivel = resultado.get("niveles_alerta", {}).get(tipo, 1)
+    return f"🔺 ESCALADA (nivel {nivel}): la condición sigue activa\n{texto}" if nivel > 1 else texto
+
+
+def mensaje_alerta(tipo, resultado, umbrales, hora, vehiculo=None):
+    """Texto de la alerta de un tipo ('temperatura', 'rpm_alta' o 'rpm_baja')"""
+    if tipo not in PLANTILLAS_ALERTA:
+        raise ValueError(f"Tipo de alerta desconocido: {tipo}")
+    return _renderizar(_plantilla(tipo, umbrales[PLANTILLAS_ALERTA[tipo][0]]), tipo, resultado, hora, vehiculo)
+
+
+def mensajes_alerta(resultados, umbrales, hora):
+    """(texto, irregularidades, fallo principal) de las alertas de muchos vehículos en un mismo tick.
+
+    `resultados` es {vehículo: resultado de `evaluar_vehiculo`}. Da lo mismo
+    que `mensaje_alerta` por cada alerta, pero las plantillas se resuelven
+    una sola vez para todo el lote.
+    """
+    plantillas = {tipo: _plantilla(tipo, umbrales[clave]) for tipo, (clave, _) in PLANTILLAS_ALERTA.items()}
+    return [(_renderizar(plantillas[tipo], tipo, r, hora, vehiculo), r["irregularidades"], r["fallo_principal"])
+            for vehiculo, r in resultados.items() for tipo in r["alertas"]]
+
+
+def monitorear(ticks, umbrales=None, enviar=None, vehiculo=None, ventana=10, modelo=None, supresor=None,
+               frecuencia_espectral=None, notificar=None):
+    """Ciclo de monitoreo sin interfaz: evalúa cada tick y envía sus alertas.
+
+    `ticks` es un iterable como los de `mantenimiento.fuentes` y `enviar`
+    recibe (mensaje, irregularidades, fallo_principal). `umbrales` se lee en
+    cada tick, así que puede modificarse en sitio mientras corre. Genera el
+    resultado de cada tick junto con sus muestras, hora y progreso. Con un
+    `modelo` (ModeloAnomalias) se usa la línea base de `vehiculo`; con un
+    `supresor` (SupresorAlertas) el estado de las alertas se comparte y
+    persiste entre ejecuciones. Con `frecuencia_espectral` (Hz de muestreo
+    de las RPM) se agrega el análisis espectral (ver `AnalizadorEspectral`).
+    `notificar` se consulta en cada tick e indica si las alertas llegan a
+    alguien (por omisión, siempre); mientras no, el supresor no las consume
+    y no se llama a `enviar`.
+    """
+    umbrales = ChainMap(umbrales if umbrales is not None else {}, UMBRALES_POR_DEFECTO)
+    espectro = AnalizadorEspectral(1, frecuencia_espectral) if frecuencia_espectral else None
+    estado = EstadoVehiculo(ventana, vehiculo, supresor, espectro)
+    indice_modelo = modelo.indices(vehiculo) if modelo is not None else -1
+    # Medida desde el ciclo: envolver `evaluar_vehiculo` costaba más del 1% del tick aun muestreando
+    registrar = registrador("monitoreo.evaluar_vehiculo", MUESTREO_EVALUACION)
+    for n, (tiempos, rpm_nuevas, temp_nuevas, hora, progreso, texto) in enumerate(ticks):
+        activas = notificar is None or notificar()
+        inicio = time.perf_counter() if registrar is not None and not n % MUESTREO_EVALUACION else None
+        resultado = evaluar_vehiculo(estado, rpm_nuevas, temp_nuevas, umbrales, modelo, indice_modelo,
+                                     notificar=activas)
+        if inicio is not None:
+            registrar(inicio, time.perf_counter())
+        resultado.update(tiempos=tiempos, rpm_nuevas=rpm_nuevas, temp_nuevas=temp_nuevas,
+                         hora=hora, progreso=progreso, texto=texto)
+        if enviar is not None:
+            for tipo in resultado["alertas"]:
+                enviar(mensaje_alerta(tipo, resultado, umbrales, hora, vehiculo),
+                       resultado["irregularidades"], resultado["fallo_principal"])
+        yield resultado
@@ -0,0 +1,498 @@
+import os
+
+import numpy as np
+
+from .almacen import ESQUEMA
+from .analisis import analizar_flota
+from .instrumentacion import instrumentar
+from .reglas import SIN_FALLO_TEXTO, motor_reglas
+
+# Nombres aceptados en el encabezado de un registro (sin distinguir mayúsculas) por columna
+ALIAS = {
+    "tiempo": ("tiempo", "fecha", "timestamp", "time"),
+    "vehiculo": ("vehiculo", "vehículo", "vehicle", "vehiculo_id"),
+    "rpm": ("rpm",),
+    "temperatura": ("temperatura", "temperatura (°c)", "temp", "temperature"),
+}
+OBLIGATORIAS = ("tiempo", "rpm", "temperatura")
+FORMATOS = ("csv", "parquet")
+# Columnas del resultado por ventana, en orden (además de las decodificadas al exportar)
+COLUMNAS_VENTANA = ("vehiculo", "inicio", "fin", "rpm_media", "variacion", "temperatura",
+                    "irregularidades", "fallos", "fallo_principal")
+# Bytes de CSV por bloque de análisis de pyarrow: el lector mantiene varios en vuelo
+# (lectura anticipada), así que este tamaño, y no el del archivo, acota la memoria
+BYTES_POR_LECTURA = 1 << 22
+_UNIDADES_TIEMPO = {"s": 1.0, "ms": 1e3, "us": 1e6, "ns": 1e9}
+
+
+def formato_de(fuente, formato=None):
+    """Formato de un registro ("csv" o "parquet") a partir de su nombre, si no se indica"""
+    if formato is None:
+        nombre = os.fspath(fuente) if isinstance(fuente, (str, os.PathLike)) else getattr(fuente, "name", "")
+        formato = "parquet" if str(nombre).lower().endswith((".parquet", ".pq")) else "csv"
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato!r} (use {' o '.join(FORMATOS)})")
+    return formato
+
+
+def _columnas(encabezado):
+    """{columna: nombre en el encabezado} según ALIAS; falla si faltan obligatorias"""
+    minusculas = {str(nombre).strip().lower(): nombre for nombre in encabezado}
+    columnas = {}
+    for columna, alias in ALIAS.items():
+        for nombre in alias:
+            if nombre in minusculas:
+                columnas[columna] = minusculas[nombre]
+                break
+    faltantes = [c for c in OBLIGATORIAS if c not in columnas]
+    if faltantes:
+        raise ValueError(f"El registro no tiene las columnas {faltantes} (encabezado: {list(encabezado)})")
+    return columnas
+
+
+class LectorRegistro:
+    """Lee un registro de manejo CSV o Parquet por bloques, con memoria acotada.
+
+    Cada bloque tiene a lo sumo `filas_por_bloque` filas y las columnas del
+    almacén con sus tipos (`almacen.ESQUEMA`: tiempo en segundos desde época
+    en float64, RPM y temperatura en float32). Los nombres de columna se
+    reconocen por `ALIAS`; el tiempo puede ser numérico o ISO 8601. Sin
+    columna de vehículo, todas las filas son de `vehiculo`. Los vehículos
+    quedan numerados por orden de aparición (`nombres`).
+
+    Con pyarrow, el CSV se analiza en streaming con varios hilos y los tipos
+    se fijan al abrirlo (no se infieren por bloque); sin pyarrow se usa
+    `pandas.read_csv` por trozos, y Parquet no está disponible.
+    """
+
+    def __init__(self, fuente, formato=None, vehiculo="Vehículo 1", filas_por_bloque=1 << 20):
+        self.fuente = fuente
+        self.formato = formato_de(fuente, formato)
+        self.vehiculo = vehiculo
+        self.filas_por_bloque = filas_por_bloque
+        self.ids = {}  # nombre -> id
+        self.nombres = []
+        self.filas = 0
+
+    def _id(self, nombre):
+        if nombre not in self.ids:
+            self.ids[nombre] = len(self.nombres)
+            self.nombres.append(nombre)
+        return self.ids[nombre]
+
+    def _rebobinar(self):
+        if hasattr(self.fuente, "seek"):
+            self.fuente.seek(0)
+
+    @instrumentar("registros.leer")
+    def _siguiente(self, lote):
+        return next(lote, None)
+
+    def bloques(self):
+        """Itera bloques {columna: arreglo} con los tipos de `ESQUEMA`"""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            if self.formato == "parquet":
+                raise ImportError("Leer registros Parquet requiere pyarrow") from None
+            lotes = self._lotes_pandas()
+        else:
+            lotes = self._lotes_parquet() if self.formato == "parquet" else self._lotes_csv()
+        while (bloque := self._siguiente(lotes)) is not None:
+            self.filas += len(bloque["rpm"])
+            yield bloque
+
+    # ---- pyarrow ----
+    def _lotes_csv(self):
+        import pyarrow as pa
+        from pyarrow import csv
+
+        # Un primer vistazo (un bloque pequeño) da el encabezado y el tipo inferido del tiempo
+        self._rebobinar()
+        vistazo = csv.open_csv(self.fuente, read_options=csv.ReadOptions(block_size=1 << 16))
+        esquema = vistazo.schema
+        vistazo.close()
+        self._rebobinar()
+        columnas = _columnas(esquema.names)
+        tipos = {columnas["rpm"]: pa.float32(), columnas["temperatura"]: pa.float32(),
+                 columnas["tiempo"]: self._tipo_tiempo(esquema.field(columnas["tiempo"]).type)}
+        if "vehiculo" in columnas:
+            tipos[columnas["vehiculo"]] = pa.dictionary(pa.int32(), pa.string())
+        lector = csv.open_csv(self.fuente, read_options=csv.ReadOptions(block_size=BYTES_POR_LECTURA),
+                              convert_options=csv.ConvertOptions(column_types=tipos,
+                                                                 include_columns=list(columnas.values())))
+        for lote in lector:
+            yield from self._partir(self._columnas_arrow(lote, columnas))
+
+    def _lotes_parquet(self):
+        from pyarrow import parquet
+
+        self._rebobinar()
+        archivo = parquet.ParquetFile(self.fuente)
+        columnas = _columnas(archivo.schema_arrow.names)
+        self._tipo_tiempo(archivo.schema_arrow.field(columnas["tiempo"]).type)
+        for lote in archivo.iter_batches(batch_size=self.filas_por_bloque, columns=list(columnas.values())):
+            yield self._columnas_arrow(lote, columnas)
+
+    @staticmethod
+    def _tipo_tiempo(tipo):
+        import pyarrow as pa
+
+        if pa.types.is_timestamp(tipo):
+            return tipo
+        if pa.types.is_integer(tipo) or pa.types.is_floating(tipo) or pa.types.is_null(tipo):
+            return pa.float64()
+        raise ValueError(f"La columna de tiempo debe ser numérica (segundos desde época) o ISO 8601, no {tipo}")
+
+    def _columnas_arrow(self, lote, columnas):
+        import pyarrow as pa
+        from pyarrow import compute
+
+        tiempo = lote.column(columnas["tiempo"])
+        if pa.types.is_timestamp(tiempo.type):
+            segundos = tiempo.cast(pa.int64()).to_numpy(zero_copy_only=False) / _UNIDADES_TIEMPO[tiempo.type.unit]
+        else:
+            segundos = tiempo.cast(pa.float64()).to_numpy(zero_copy_only=False)
+        bloque = {
+            "tiempo": segundos.astype(ESQUEMA["tiempo"], copy=False),
+            "rpm": lote.column(columnas["rpm"]).cast(pa.float32()).to_numpy(zero_copy_only=False),
+            "temperatura": lote.column(columnas["temperatura"]).cast(pa.float32()).to_numpy(zero_copy_only=False),
+        }
+        if "vehiculo" not in columnas:
+            bloque["vehiculo"] = np.full(len(segundos), self._id(self.vehiculo), dtype=ESQUEMA["vehiculo"])
+            return bloque
+        vehiculos = lote.column(columnas["vehiculo"])
+        if not pa.types.is_dictionary(vehiculos.type):  # Parquet sin codificar o numérico
+            vehiculos = compute.dictionary_encode(vehiculos.cast(pa.string()))
+        # Diccionario del lote -> ids globales; las filas sin vehículo son de `vehiculo`
+        mapa = np.array([self._id(nombre) for nombre in vehiculos.dictionary.to_pylist()] + [self._id(self.vehiculo)],
+                        dtype=ESQUEMA["vehiculo"])
+        indices = vehiculos.indices.fill_null(len(vehiculos.dictionary)).to_numpy(zero_copy_only=False)
+        bloque["vehiculo"] = mapa[indices]
+        return bloque
+
+    def _partir(self, bloque):
+        """Parte un lote de pyarrow en bloques de a lo sumo `filas_por_bloque` filas (vistas)"""
+        n = len(bloque["rpm"])
+        for inicio in range(0, n, self.filas_por_bloque):
+            yield {c: v[inicio:inicio + self.filas_por_bloque] for c, v in bloque.items()}
+
+    # ---- pandas ----
+    def _lotes_pandas(self):
+        import pandas as pd
+
+        self._rebobinar()
+        columnas = _columnas(pd.read_csv(self.fuente, nrows=0).columns)
+        self._rebobinar()
+        tipos = {columnas["rpm"]: "float32", columnas["temperatura"]: "float32"}
+        if "vehiculo" in columnas:
+            tipos[columnas["vehiculo"]] = "category"
+        for trozo in pd.read_csv(self.fuente, usecols=list(columnas.values()), dtype=tipos,
+                                 chunksize=self.filas_por_bloque):
+            tiempo = trozo[columnas["tiempo"]]
+            if pd.api.types.is_numeric_dtype(tiempo):
+                segundos = tiempo.to_numpy(dtype=ESQUEMA["tiempo"])
+            else:
+                segundos = ((pd.to_datetime(tiempo, utc=True) - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(1, "s")).to_numpy()
+            bloque = {
+                "tiempo": segundos,
+                "rpm": trozo[columnas["rpm"]].to_numpy(dtype=ESQUEMA["rpm"]),
+                "temperatura": trozo[columnas["temperatura"]].to_numpy(dtype=ESQUEMA["temperatura"]),
+            }
+            if "vehiculo" in columnas:
+                vehiculos = trozo[columnas["vehiculo"]].cat
+                mapa = np.array([self._id(str(nombre)) for nombre in vehiculos.categories] + [self._id(self.vehiculo)],
+                                dtype=ESQUEMA["vehiculo"])
+                bloque["vehiculo"] = mapa[vehiculos.codes.to_numpy()]  # Código -1 (vacío) -> `vehiculo`
+            else:
+                bloque["vehiculo"] = np.full(len(segundos), self._id(self.vehiculo), dtype=ESQUEMA["vehiculo"])
+            yield bloque
+
+
+def _grupos(ids):
+    """(inicio, largo) de cada tramo contiguo de un mismo vehículo"""
+    inicios = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.empty(0, dtype=np.int64)
+    return inicios, np.diff(np.r_[inicios, len(ids)])
+
+
+class AnalisisVentanas:
+    """Análisis de irregularidades por ventanas de un registro que llega por bloques.
+
+    Las muestras de cada vehículo se agrupan en ventanas de `tamano` muestras
+    que empiezan cada `paso` (por omisión, ventanas contiguas como los ticks
+    del monitoreo en vivo), contadas desde la primera muestra del vehículo.
+    Las muestras que no completan una ventana al final de un bloque quedan
+    pendientes y se anteponen a las del mismo vehículo en el siguiente (y,
+    con `paso > tamano`, se recuerda cuántas de sus próximas muestras caen en
+    el hueco entre ventanas), así que el resultado no depende de dónde se
+    corten los bloques. Dentro de un
+    vehículo, las muestras deben venir en orden cronológico.
+
+    Por bloque, las ventanas de todos los vehículos se arman con un
+    ordenamiento estable por vehículo y un solo `take`, y se evalúan con una
+    llamada a `analizar_flota` (temperatura y RPM actual: la última muestra
+    de cada ventana).
+    """
+
+    def __init__(self, tamano=10, paso=None, motor=None):
+        self.tamano = tamano
+        self.paso = paso or tamano
+        self.motor = motor or motor_reglas()
+        self._pendientes = {c: np.empty(0, dtype=ESQUEMA[c]) for c in ESQUEMA}
+        self._saltar = {}  # id de vehículo -> muestras por descartar antes de su siguiente ventana
+        self.ventanas = 0
+
+    @property
+    def pendientes(self):
+        """Muestras a la espera de completar una ventana (de todos los vehículos)"""
+        return len(self._pendientes["rpm"])
+
+    @instrumentar("registros.ventanas")
+    def agregar(self, bloque):
+        """Incorpora un bloque (columnas de `ESQUEMA`); devuelve las ventanas que cerró.
+
+        El resultado mapea cada nombre de `COLUMNAS_VENTANA` a un arreglo con
+        una fila por ventana, ordenadas por vehículo y luego por tiempo.
+        """
+        datos = {c: np.concatenate([self._pendientes[c], np.asarray(bloque[c], dtype=ESQUEMA[c])]) for c in ESQUEMA}
+        ids = datos["vehiculo"]
+        if len(ids) and (ids[1:] < ids[:-1]).any():  # Un solo vehículo o ya agrupados: sin ordenar
+            orden = np.argsort(ids, kind="stable")
+            datos = {c: v[orden] for c, v in datos.items()}
+            ids = datos["vehiculo"]
+
+        # Grupos contiguos por vehículo y ventanas completas de cada uno
+        inicios, largos = _grupos(ids)
+        if self._saltar:
+            # Primeras muestras que caen en el hueco entre la última ventana de un bloque anterior y la siguiente
+            saltar = np.array([self._saltar.pop(i, 0) for i in ids[inicios].tolist()], dtype=np.int64)
+            resto = saltar - largos
+            self._saltar.update(zip(ids[inicios[resto > 0]].tolist(), resto[resto > 0].tolist()))
+            conservar = np.arange(len(ids)) - np.repeat(inicios, largos) >= np.repeat(saltar, largos)
+            datos = {c: v[conservar] for c, v in datos.items()}
+            ids = datos["vehiculo"]
+            inicios, largos = _grupos(ids)
+        por_grupo = np.where(largos >= self.tamano, (largos - self.tamano) // self.paso + 1, 0)
+        n = int(por_grupo.sum())
+        primera = np.repeat(inicios, por_grupo)
+        orden_en_grupo = np.arange(n) - np.repeat(np.cumsum(por_grupo) - por_grupo, por_grupo)
+        comienzo = primera + orden_en_grupo * self.paso
+        final = comienzo + (self.tamano - 1)
+
+        # Lo que no cerró ventana queda pendiente (desde el inicio de la siguiente ventana de su vehículo);
+        # si esa ventana empieza después de la última muestra, se recuerda cuántas descartar
+        siguiente = por_grupo * self.paso
+        posicion = np.arange(len(ids)) - np.repeat(inicios, largos)
+        quedan = posicion >= np.repeat(siguiente, largos)
+        self._pendientes = {c: v[quedan] for c, v in datos.items()}
+        hueco = siguiente - largos
+        self._saltar.update(zip(ids[inicios[hueco > 0]].tolist(), hueco[hueco > 0].tolist()))
+
+        rpm = datos["rpm"][comienzo[:, None] + np.arange(self.tamano)]
+        resultado = analizar_flota(rpm, datos["temperatura"][final], motor=self.motor)
+        self.ventanas += n
+        variables = resultado.variables
+        return {
+            "vehiculo": datos["vehiculo"][comienzo],
+            "inicio": datos["tiempo"][comienzo],
+            "fin": datos["tiempo"][final],
+            "rpm_media": variables["media"].astype(np.float32),
+            "variacion": variables["variacion"].astype(np.float32),
+            "temperatura": datos["temperatura"][final],
+            "irregularidades": resultado.irregularidades,
+            "fallos": resultado.fallos,
+            "fallo_principal": resultado.fallo_principal,
+        }
+
+
+class EscritorResultados:
+    """Exporta por bloques la tabla de resultados por ventana a CSV o Parquet.
+
+    Las máscaras de bits se decodifican a texto con el motor de reglas: el
+    vehículo, las irregularidades (nombres de las reglas, separados por
+    comas), los fallos probables y el fallo principal van como columnas
+    categóricas (un código por fila y los textos una vez por bloque), y las
+    horas de inicio y fin en segundos desde época. Usa pyarrow si está
+    instalado; si no, pandas (solo CSV).
+    """
+
+    def __init__(self, destino, nombres_vehiculos, motor=None, formato=None):
+        self.destino = destino
+        self.formato = formato_de(destino, formato)
+        self.nombres_vehiculos = nombres_vehiculos  # Lista (puede crecer mientras se escribe)
+        self.motor = motor or motor_reglas()
+        self._fallos = np.array(list(self.motor.fallos) + [SIN_FALLO_TEXTO], dtype=object)
+        self._textos = {}  # (clave, máscara) -> texto decodificado
+        self._escritor = None
+        self.filas = 0
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            if self.formato == "parquet":
+                raise ImportError("Exportar a Parquet requiere pyarrow") from None
+            self._arrow = False
+        else:
+            self._arrow = True
+
+    def _categorias(self, clave, mascaras, decodificar):
+        """(códigos por fila, textos) de máscaras de bits, cacheando el texto de cada máscara"""
+        unicas, codigos = np.unique(mascaras, return_inverse=True)
+        textos = []
+        for mascara in unicas.tolist():
+            if (clave, mascara) not in self._textos:
+                self._textos[clave, mascara] = decodificar(mascara)
+            textos.append(self._textos[clave, mascara])
+        return codigos.astype(np.int32), textos
+
+    def _columnas(self, resultados):
+        """{columna: arreglo o (códigos, categorías)} en el orden de exportación"""
+        reglas = self.motor.reglas
+        nombres_irregularidad = [reglas[j]["nombre"] for j in self.motor.irregulares]
+        return {
+            "vehiculo": (resultados["vehiculo"].astype(np.int32), list(self.nombres_vehiculos)),
+            "inicio": resultados["inicio"],
+            "fin": resultados["fin"],
+            "rpm_media": resultados["rpm_media"],
+            "variacion": resultados["variacion"],
+            "temperatura": resultados["temperatura"],
+            "irregularidades": self._categorias("irregularidades", resultados["irregularidades"], lambda bits: ", ".join(
+                nombre for k, nombre in enumerate(nombres_irregularidad) if bits >> k & 1)),
+            "fallos": self._categorias("fallos", resultados["fallos"],
+                                       lambda bits: "; ".join(self.motor.nombres_fallos(bits))),
+            "fallo_principal": (resultados["fallo_principal"].astype(np.int32) % len(self._fallos), list(self._fallos)),
+        }
+
+    @instrumentar("registros.exportar")
+    def escribir(self, resultados):
+        """Anexa un bloque de resultados (la salida de `AnalisisVentanas.agregar`)"""
+        n = len(resultados["vehiculo"])
+        if not n and self._escritor is not None:
+            return 0
+        columnas = self._columnas(resultados)
+        if self._arrow:
+            self._escribir_arrow(columnas)
+        else:
+            self._escribir_pandas(columnas)
+        self.filas += n
+        return n
+
+    def _escribir_arrow(self, columnas):
+        import pyarrow as pa
+
+        tabla = pa.table({nombre: _categorica(*valor, self.formato) if isinstance(valor, tuple) else pa.array(valor)
+                          for nombre, valor in columnas.items()})
+        if self._escritor is None:
+            self._escritor = _escritor_arrow(self.destino, tabla.schema, self.formato)
+        self._escritor.write_table(tabla)
+
+    def _escribir_pandas(self, columnas):
+        import pandas as pd
+
+        tabla = pd.DataFrame({
+            nombre: pd.Categorical.from_codes(valor[0], valor[1]) if isinstance(valor, tuple) else valor
+            for nombre, valor in columnas.items()
+        })
+        tabla.to_csv(self.destino, mode="w" if self._escritor is None else "a", header=self._escritor is None,
+                     index=False)
+        self._escritor = True
+
+    def cerrar(self):
+        if self._arrow and self._escritor is not None:
+            self._escritor.close()
+        elif self._escritor is None:  # Sin ventanas: igual se escribe el encabezado
+            self.escribir({c: np.empty(0, dtype=np.float64 if c in ("inicio", "fin") else np.int64)
+                           for c in COLUMNAS_VENTANA})
+            if self._arrow:
+                self._escritor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def analizar_registro(fuente, destino=None, almacen=None, tamano=10, paso=None, motor=None, formato=None,
+                      formato_destino=None, vehiculo="Vehículo 1", filas_por_bloque=1 << 20):
+    """Importa y analiza un registro de manejo por bloques; devuelve un resumen.
+
+    Lee `fuente` (ruta o archivo binario, CSV o Parquet) con `LectorRegistro`,
+    analiza sus ventanas con `AnalisisVentanas` y, si se indican, anexa las
+    muestras a `almacen` (un `AlmacenTelemetria`) y exporta la tabla por
+    ventana a `destino` con `EscritorResultados`. La memoria queda acotada
+    por `filas_por_bloque` sea cual sea el tamaño del registro.
+
+    El resumen tiene las filas leídas, las ventanas analizadas, las
+    ventanas por fallo principal y los nombres de los vehículos.
+    """
+    motor = motor or motor_reglas()
+    lector = LectorRegistro(fuente, formato, vehiculo, filas_por_bloque)
+    analisis = AnalisisVentanas(tamano, paso, motor)
+    escritor = EscritorResultados(destino, lector.nombres, motor, formato_destino) if destino is not None else None
+    por_fallo = np.zeros(len(motor.fallos) + 1, dtype=np.int64)  # El último: sin fallo
+    try:
+        for bloque in lector.bloques():
+            if almacen is not None:
+                ids = np.array([almacen.id_vehiculo(nombre) for nombre in lector.nombres], dtype=ESQUEMA["vehiculo"])
+                almacen.agregar(bloque["tiempo"], ids[bloque["vehiculo"]], bloque["rpm"], bloque["temperatura"])
+            resultados = analisis.agregar(bloque)
+            por_fallo += np.bincount(resultados["fallo_principal"] % len(por_fallo), minlength=len(por_fallo))
+            if escritor is not None:
+                escritor.escribir(resultados)
+    finally:
+        if escritor is not None:
+            escritor.cerrar()
+    return {
+        "filas": lector.filas,
+        "ventanas": analisis.ventanas,
+        "por_fallo": {nombre: int(n) for nombre, n in zip(list(motor.fallos) + [SIN_FALLO_TEXTO], por_fallo) if n},
+        "vehiculos": list(lector.nombres),
+    }
+
+
+def exportar_almacen(almacen, destino, t_inicio=None, t_fin=None, vehiculo=None, formato=None):
+    """Exporta por bloques la telemetría de un rango del almacén a CSV o Parquet (requiere pyarrow).
+
+    El archivo tiene las columnas de `ESQUEMA` con el nombre de cada
+    vehículo, así que `LectorRegistro` lo vuelve a importar. Devuelve las
+    filas escritas.
+    """
+    import pyarrow as pa
+
+    formato = formato_de(destino, formato)
+    nombres = {i: nombre for nombre, i in almacen.vehiculos.items()}
+    escritor = None
+    filas = 0
+    try:
+        for bloque in almacen.consultar(t_inicio, t_fin, vehiculo):
+            codigos, ids = np.unique(bloque["vehiculo"], return_inverse=True)
+            tabla = pa.table({"tiempo": bloque["tiempo"],
+                              "vehiculo": _categorica(ids.astype(np.int32), [nombres.get(int(i), str(i)) for i in codigos],
+                                                      formato),
+                              "rpm": bloque["rpm"], "temperatura": bloque["temperatura"]})
+            if escritor is None:
+                escritor = _escritor_arrow(destino, tabla.schema, formato)
+            escritor.write_table(tabla)
+            filas += len(bloque["tiempo"])
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return filas
+
+
+def _categorica(codigos, categorias, formato):
+    """Columna de pyarrow a partir de códigos y sus textos (en CSV, ya decodificada)"""
+    import pyarrow as pa
+
+    columna = pa.DictionaryArray.from_arrays(pa.array(codigos), pa.array(categorias, pa.string()))
+    return columna.cast(pa.string()) if formato == "csv" else columna
+
+
+def _escritor_arrow(destino, esquema, formato):
+    if formato == "parquet":
+        from pyarrow import parquet
+
+        return parquet.ParquetWriter(destino, esquema)
+    from pyarrow import csv
+
+    return csv.CSVWriter(destino, esquema)
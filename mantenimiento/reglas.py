@@ -0,0 +1,264 @@
+import operator
+import os
+import string
+import threading
+import time
+
+import numpy as np
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
+from . import configuracion
+from .espectral import CARACTERISTICAS as ESPECTRALES
+
+VARIABLES = ("variacion", "media", "min_ultimas", "max_ultimas", "std_diferencias", "rpm_actual", "temperatura",
+             *ESPECTRALES)
+SIN_FALLO = -1
+SIN_FALLO_TEXTO = "Sin fallos detectados"
+NIVELES_SIMULACION = ("error", "warning")
+
+# Operador -> (función escalar, signo, estricto): a < u equivale a -a > -u
+_OPERADORES = {
+    ">": (operator.gt, 1.0, True),
+    ">=": (operator.ge, 1.0, False),
+    "<": (operator.lt, -1.0, True),
+    "<=": (operator.le, -1.0, False),
+}
+
+# Cada cuántos segundos se revisa si cambió el archivo de reglas
+INTERVALO_RECARGA = 1.0
+
+
+def _condicion(texto):
+    """'variable operador umbral' -> (variable, operador, umbral)"""
+    partes = texto.split()
+    if len(partes) != 3 or partes[1] not in _OPERADORES:
+        raise ValueError(f"Condición inválida: {texto!r} (se espera 'variable operador umbral')")
+    variable, operador_, umbral = partes
+    if variable not in VARIABLES:
+        raise ValueError(f"Variable desconocida en {texto!r}; disponibles: {', '.join(VARIABLES)}")
+    return variable, operador_, float(umbral)
+
+
+def _validar_texto(texto):
+    """ValueError si el texto de una irregularidad no se puede formatear con las variables"""
+    try:
+        campos = {campo for _, campo, _, _ in string.Formatter().parse(texto) if campo is not None}
+    except ValueError as e:
+        raise ValueError(f"Texto inválido {texto!r}: {e}") from None
+    # Solo `{variable}` o `{variable:formato}`: ni posiciones, ni atributos, ni índices
+    desconocidos = sorted(campos - set(VARIABLES))
+    if desconocidos:
+        raise ValueError(f"Variables desconocidas en el texto {texto!r}: {', '.join(desconocidos)}")
+    try:
+        texto.format(**dict.fromkeys(VARIABLES, 0.0))
+    except (ValueError, KeyError, IndexError) as e:  # Especificación inválida o con campos anidados
+        raise ValueError(f"Formato inválido en el texto {texto!r}: {e}") from None
+
+
+class MotorReglas:
+    """Tabla de reglas de fallos compilada a arreglos.
+
+    Cada regla es una conjunción de condiciones sobre `VARIABLES`; si se
+    cumple reporta su irregularidad (las que tienen `texto`) y sus fallos
+    probables. Al compilar, las condiciones de todas las reglas quedan en
+    vectores (fila, umbral) y la relación regla → fallo en una matriz, así
+    que `evaluar` sobre un lote es una comparación, unos AND entre franjas y
+    un producto de matrices, sin ramas de Python por regla ni por muestra.
+    El orden del catálogo `fallos` es la prioridad: el fallo principal es el
+    primero presente.
+    """
+
+    def __init__(self, tabla, origen=None):
+        self.origen = origen
+        self.fallos = tuple(tabla.get("fallos", ()))
+        if len(set(self.fallos)) != len(self.fallos):
+            raise ValueError("El catálogo de fallos tiene nombres repetidos")
+        if len(self.fallos) > 63:
+            raise ValueError("El catálogo admite a lo sumo 63 fallos (máscara de bits int64)")
+        codigos = {nombre: codigo for codigo, nombre in enumerate(self.fallos)}
+
+        self.reglas = []
+        condiciones = []  # (regla, variable, operador, umbral)
+        for j, regla in enumerate(tabla.get("regla", ())):
+            nombre = regla.get("nombre", f"regla {j + 1}")
+            si = regla.get("si", ())
+            si = [si] if isinstance(si, str) else list(si)
+            if not si:
+                raise ValueError(f"La regla {nombre!r} no tiene condiciones")
+            desconocidos = [f for f in regla.get("fallos", ()) if f not in codigos]
+            if desconocidos:
+                raise ValueError(f"La regla {nombre!r} usa fallos fuera del catálogo: {desconocidos}")
+            self.reglas.append({"nombre": nombre, "texto": regla.get("texto"), "fallos": list(regla.get("fallos", ()))})
+            condiciones.extend((j, *_condicion(c)) for c in si)
+
+        # Irregularidades: reglas con texto, una por bit en el orden de la tabla
+        self.irregulares = [j for j, regla in enumerate(self.reglas) if regla["texto"]]
+        if len(self.irregulares) > 63:
+            raise ValueError("La tabla admite a lo sumo 63 irregularidades (máscara de bits int64)")
+        self.textos = [self.reglas[j]["texto"] for j in self.irregulares]
+        for texto in self.textos:
+            _validar_texto(texto)
+
+        # ---- Compilación ----
+        # Toda condición queda como `fila > umbral`: a < u es -a > -u y a >= u es
+        # a > (el flotante anterior a u). Las filas son las variables usadas y sus
+        # negativas. Las reglas se agrupan por número de condiciones; en un grupo
+        # de k condiciones la m-ésima de todas sus reglas es contigua, así que la
+        # regla es un AND de k franjas.
+        n_reglas = len(self.reglas)
+        self._variables = sorted({v for _, v, _, _ in condiciones}, key=VARIABLES.index)
+        por_regla = [[] for _ in range(n_reglas)]
+        for j, variable, op, umbral in condiciones:
+            por_regla[j].append((variable, op, umbral))
+        self._orden = sorted(range(n_reglas), key=lambda j: len(por_regla[j]))
+        self._grupos = []  # (k condiciones, primera regla del grupo, cantidad de reglas)
+        filas, umbrales = [], []
+        for k in sorted({len(c) for c in por_regla}):
+            grupo = [j for j in self._orden if len(por_regla[j]) == k]
+            self._grupos.append((k, self._orden.index(grupo[0]), len(grupo)))
+            for m in range(k):
+                for j in grupo:
+                    variable, op, umbral = por_regla[j][m]
+                    _, signo, estricta = _OPERADORES[op]
+                    filas.append(self._variables.index(variable) + (len(self._variables) if signo < 0 else 0))
+                    umbral = signo * umbral
+                    umbrales.append(umbral if estricta else np.nextafter(umbral, -np.inf))
+        self._filas = np.array(filas, dtype=np.int64)
+        self._umbrales = np.array(umbrales).reshape(-1, 1)
+        self._bloque = int(np.clip((1 << 16) // max(len(filas), 1), 64, 4096))  # Muestras por bloque (caché)
+        # Pesos y matriz de fallos en el orden agrupado
+        bit_irregularidad = {j: k for k, j in enumerate(self.irregulares)}
+        self._pesos_irregularidad = np.array(
+            [1 << bit_irregularidad[j] if j in bit_irregularidad else 0 for j in self._orden], dtype=np.int64)
+        self._fallos_de_regla = np.zeros((len(self.fallos), n_reglas), dtype=np.float32)
+        for posicion, j in enumerate(self._orden):
+            self._fallos_de_regla[[codigos[f] for f in self.reglas[j]["fallos"]], posicion] = 1
+        self._pesos_fallo = np.int64(1) << np.arange(len(self.fallos), dtype=np.int64)
+
+        # Camino escalar (un vehículo por tick): (condiciones, códigos de fallo, texto) por regla
+        self._escalar = [(tuple((v, _OPERADORES[op][0], u) for v, op, u in por_regla[j]),
+                          tuple(codigos[f] for f in regla["fallos"]), regla["texto"])
+                         for j, regla in enumerate(self.reglas)]
+
+        self.simulaciones = {}
+        for escenario in tabla.get("simulacion", ()):
+            if escenario.get("nivel", "error") not in NIVELES_SIMULACION:
+                raise ValueError(f"Nivel inválido en la simulación {escenario.get('nombre')!r}")
+            self.simulaciones[escenario["nombre"]] = dict(escenario, nivel=escenario.get("nivel", "error"))
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, "rb") as f:
+            return cls(tomllib.load(f), ruta)
+
+    # ---- Evaluación ----
+    def evaluar(self, variables):
+        """Evalúa un lote; `variables` mapea nombre -> arreglo (un valor por elemento).
+
+        Devuelve (máscara de bits de irregularidades, máscara de bits de
+        fallos, código del fallo principal o SIN_FALLO) por elemento.
+        """
+        n = len(np.asarray(next(iter(variables.values()))))
+        irregularidades = np.zeros(n, dtype=np.int64)
+        fallos = np.zeros(n, dtype=np.int64)
+        if self.reglas:
+            # Disposición condiciones × muestras, por bloques
+            valores = np.stack([np.asarray(variables[v], dtype=np.float64) for v in self._variables])
+            valores = np.concatenate([valores, -valores])
+            reglas = np.empty((len(self.reglas), min(n, self._bloque)), dtype=bool)
+            for inicio in range(0, n, self._bloque):
+                cumple = valores[self._filas, inicio:inicio + self._bloque] > self._umbrales
+                tramo = reglas[:, :cumple.shape[1]]
+                fila = 0
+                for k, primera, cantidad in self._grupos:
+                    franjas = cumple[fila:fila + k * cantidad].reshape(k, cantidad, -1)
+                    np.logical_and.reduce(franjas, axis=0, out=tramo[primera:primera + cantidad])
+                    fila += k * cantidad
+                irregularidades[inicio:inicio + self._bloque] = self._pesos_irregularidad @ tramo
+                presentes = (self._fallos_de_regla @ tramo.view(np.uint8).astype(np.float32)) > 0
+                fallos[inicio:inicio + self._bloque] = self._pesos_fallo @ presentes
+        # Principal: el bit más bajo encendido (el fallo más prioritario)
+        bit_bajo = fallos & -fallos
+        principal = np.where(fallos != 0, np.log2(np.maximum(bit_bajo, 1)).astype(np.int64), SIN_FALLO)
+        return irregularidades, fallos, principal
+
+    def evaluar_uno(self, variables):
+        """Evalúa un solo elemento con valores escalares.
+
+        Devuelve (irregularidades, fallos probables en orden de prioridad,
+        fallo principal) como textos.
+        """
+        presentes = set()
+        irregularidades = []
+        for condiciones, codigos_fallo, texto in self._escalar:
+            for variable, op, umbral in condiciones:
+                if not op(variables[variable], umbral):
+                    break
+            else:
+                presentes.update(codigos_fallo)
+                if texto:
+                    irregularidades.append(texto.format(**variables))
+        fallos_probables = [self.fallos[c] for c in sorted(presentes)]
+        return irregularidades, fallos_probables, fallos_probables[0] if fallos_probables else SIN_FALLO_TEXTO
+
+    # ---- Decodificación ----
+    def describir_irregularidades(self, bits, variables):
+        return [texto.format(**variables) for k, texto in enumerate(self.textos) if bits >> k & 1]
+
+    def nombres_fallos(self, bits):
+        return [nombre for codigo, nombre in enumerate(self.fallos) if bits >> codigo & 1]
+
+    def nombre_fallo(self, codigo):
+        return self.fallos[codigo] if codigo != SIN_FALLO else SIN_FALLO_TEXTO
+
+
+# ---- Recarga en caliente ----
+_cargados = {}  # ruta -> {"motor", "firma", "revisado", "error"}
+_lock = threading.Lock()
+
+
+def _firma(ruta):
+    estado = os.stat(ruta)
+    return estado.st_mtime_ns, estado.st_size
+
+
+def motor_reglas(ruta=None):
+    """Motor compilado de la tabla `ruta` (por omisión `configuracion.RUTA_REGLAS`).
+
+    Se recompila cuando el archivo cambia; la fecha se revisa a lo sumo cada
+    `INTERVALO_RECARGA` segundos. Si la tabla nueva no compila se sigue
+    usando la anterior y el error queda en `error_reglas`.
+    """
+    ruta = ruta or configuracion.RUTA_REGLAS
+    entrada = _cargados.get(ruta)
+    ahora = time.monotonic()
+    if entrada is not None and ahora - entrada["revisado"] < INTERVALO_RECARGA:
+        return entrada["motor"]
+    with _lock:
+        entrada = _cargados.get(ruta)
+        if entrada is None:
+            firma = _firma(ruta)
+            # Se publica completa: la lectura sin candado de arriba no debe ver una entrada a medias
+            entrada = {"motor": MotorReglas.cargar(ruta), "firma": firma, "revisado": ahora, "error": None}
+            _cargados[ruta] = entrada
+            return entrada["motor"]
+        try:
+            firma = _firma(ruta)
+            if firma != entrada["firma"]:
+                entrada["firma"] = firma
+                entrada["motor"] = MotorReglas.cargar(ruta)
+                entrada["error"] = None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            entrada["error"] = e
+        entrada["revisado"] = ahora
+    return entrada["motor"]
+
+
+def error_reglas(ruta=None):
+    """Último error al recargar la tabla `ruta` (None si la vigente es la última guardada)"""
+    entrada = _cargados.get(ruta or configuracion.RUTA_REGLAS)
+    return entrada["error"] if entrada is not None else None
@@ -0,0 +1,68 @@
+import math
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+# ---- Zona horaria de Monterrey, México ----
+ZONA_HORARIA = ZoneInfo('America/Monterrey')
+
+
+class RelojLocal:
+    """Fecha y hora local formateadas, con los textos cacheados por segundo.
+
+    `strftime` corre una vez por minuto: los cambios de horario ocurren en
+    minutos enteros, así que dentro de un minuto UTC solo cambian los
+    segundos, que se agregan al prefijo ya formateado. Los textos del
+    segundo vigente se reutilizan tal cual entre llamadas. Cada caché se
+    guarda en un solo atributo (tupla), así que se puede usar desde varios
+    hilos sin locks.
+    """
+
+    def __init__(self, zona=ZONA_HORARIA, reloj=time.time):
+        self.zona = zona
+        self.reloj = reloj
+        self._minuto = (None, None)  # (minuto UTC, prefijos del minuto)
+        self._segundo = (None, None)  # (segundo, (completa, fecha, hora))
+
+    def _prefijos(self, minuto):
+        ahora = datetime.fromtimestamp(minuto * 60, self.zona)
+        prefijos = (ahora.strftime("%Y-%m-%d %H:%M:"), ahora.strftime("%A, %d de %B de %Y"), ahora.strftime("%H:%M:"))
+        self._minuto = (minuto, prefijos)
+        return prefijos
+
+    def textos(self, segundos=None):
+        """(fecha y hora completas, fecha larga, hora HH:MM:SS) de `segundos` desde época (por omisión, ahora)"""
+        segundo = math.floor(self.reloj() if segundos is None else segundos)
+        cacheado, textos = self._segundo
+        if segundo == cacheado:
+            return textos
+        minuto, resto = divmod(segundo, 60)
+        cacheado, prefijos = self._minuto
+        if minuto != cacheado:
+            prefijos = self._prefijos(minuto)
+        completa, fecha, hora = prefijos
+        segundos_texto = f"{resto:02d}"
+        textos = (completa + segundos_texto, fecha, hora + segundos_texto)
+        self._segundo = (segundo, textos)
+        return textos
+
+    def hora(self, segundos=None):
+        """Hora local (HH:MM:SS) de `segundos` desde época (por omisión, ahora)"""
+        return self.textos(segundos)[2]
+
+    def horas(self, segundos):
+        """Horas locales de muchas marcas de tiempo (reutiliza el texto de las que caen en el mismo segundo)"""
+        return [self.textos(s)[2] for s in segundos]
+
+
+RELOJ = RelojLocal()
+
+
+def obtener_fecha_hora_mty():
+    """Obtiene la fecha y hora actual de Monterrey, México"""
+    return RELOJ.textos()
+
+
+def hora_de_muestra(segundos):
+    """Hora local (HH:MM:SS) de una marca de tiempo en segundos desde época"""
+    return RELOJ.hora(segundos)
@@ -0,0 +1,234 @@
+import math
+import os
+
+import numpy as np
+
+# Filas de cada archivo de resúmenes de una partición diaria
+MINUTOS, HORAS = 1440, 24
+FILA_HORA = MINUTOS
+FILA_DIA = MINUTOS + HORAS
+FILAS = MINUTOS + HORAS + 1
+
+# Columnas: conteo y, por variable, suma, suma de cuadrados, mínimo y máximo
+N = 0
+VARIABLES = {"rpm": 1, "temperatura": 5}
+SUMA, SUMA2, MIN, MAX = 0, 1, 2, 3
+COLUMNAS = 9
+
+TODOS = -1  # Resumen combinado de todos los vehículos
+
+# Particiones con resúmenes abiertos en escritura: el día en curso y el anterior (bloques que cruzan la
+# medianoche); las demás se cierran para no acumular un mapeo por vehículo y día en procesos largos
+PARTICIONES_ABIERTAS = 2
+
+
+def resumen_vacio(filas=1):
+    resumen = np.zeros((filas, COLUMNAS))
+    for base in VARIABLES.values():
+        resumen[:, base + MIN] = math.inf
+        resumen[:, base + MAX] = -math.inf
+    return resumen
+
+
+def resumir(indices, filas, rpm, temperatura, destino):
+    """Acumula las muestras en las filas `indices` de `destino` (en sitio)"""
+    destino[:, N] += np.bincount(indices, minlength=filas)
+    for base, valores in ((VARIABLES["rpm"], rpm), (VARIABLES["temperatura"], temperatura)):
+        valores = np.asarray(valores, dtype=np.float64)
+        destino[:, base + SUMA] += np.bincount(indices, valores, minlength=filas)
+        destino[:, base + SUMA2] += np.bincount(indices, valores * valores, minlength=filas)
+        np.minimum.at(destino[:, base + MIN], indices, valores)
+        np.maximum.at(destino[:, base + MAX], indices, valores)
+
+
+def _reducir(resumenes, eje):
+    """Combina resúmenes a lo largo de un eje (sumas se suman, extremos se comparan)"""
+    resultado = resumenes.sum(axis=eje)
+    for base in VARIABLES.values():
+        resultado[..., base + MIN] = resumenes[..., base + MIN].min(axis=eje)
+        resultado[..., base + MAX] = resumenes[..., base + MAX].max(axis=eje)
+    return resultado
+
+
+def _fusionar(destino, origen):
+    """Incorpora `origen` en `destino` fila a fila (en sitio)"""
+    for base in VARIABLES.values():
+        np.minimum(destino[:, base + MIN], origen[:, base + MIN], out=destino[:, base + MIN])
+        np.maximum(destino[:, base + MAX], origen[:, base + MAX], out=destino[:, base + MAX])
+        destino[:, base + SUMA] += origen[:, base + SUMA]
+        destino[:, base + SUMA2] += origen[:, base + SUMA2]
+    destino[:, N] += origen[:, N]
+
+
+def combinar(filas):
+    """Combina varias filas de resumen en una sola"""
+    filas = np.asarray(filas).reshape(-1, COLUMNAS)
+    if not len(filas):
+        return resumen_vacio()[0]
+    return _reducir(filas, 0)
+
+
+def a_estadisticas(resumen):
+    """Traduce una fila de resumen al formato de `AlmacenTelemetria.estadisticas`"""
+    n = int(resumen[N])
+    resultado = {}
+    for variable, base in VARIABLES.items():
+        suma, suma2 = resumen[base + SUMA], resumen[base + SUMA2]
+        varianza = max(suma2 - suma * suma / n, 0.0) / (n - 1) if n > 1 else math.nan
+        resultado[variable] = {
+            "n": n, "media": suma / n if n else math.nan,
+            "min": resumen[base + MIN] if n else math.nan, "max": resumen[base + MAX] if n else math.nan,
+            "std": math.sqrt(varianza) if n > 1 else math.nan,
+        }
+    return resultado
+
+
+class IndiceResumenes:
+    """Resúmenes por minuto, hora y día que se mantienen al anexar datos.
+
+    Cada partición diaria guarda un arreglo `resumen_<vehiculo>.npy` de
+    FILAS × COLUMNAS (1440 minutos, 24 horas y el día completo), además del
+    combinado de todos los vehículos. Una estadística de cualquier rango se
+    responde combinando unas pocas filas; solo los minutos incompletos de los
+    extremos se leen de las muestras crudas, así el resultado es el mismo que
+    recorrer todos los datos.
+    """
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+        self._abiertos = {}  # partición -> {ruta: memmap en escritura}, de la menos a la más reciente
+
+    def _ruta(self, particion, vehiculo):
+        nombre = "todos" if vehiculo == TODOS else str(vehiculo)
+        return os.path.join(particion, f"resumen_{nombre}.npy")
+
+    def actualizar(self, particion, inicio_dia, columnas):
+        """Incorpora un bloque de muestras de una misma partición"""
+        segundo = columnas["tiempo"] - inicio_dia
+        minuto = np.clip((segundo // 60).astype(np.int64), 0, MINUTOS - 1)
+        vehiculos, inverso = np.unique(columnas["vehiculo"], return_inverse=True)
+        # Una sola pasada por muestra: resumen por (vehículo, minuto)
+        por_minuto = resumen_vacio(len(vehiculos) * MINUTOS)
+        resumir(inverso * MINUTOS + minuto, len(por_minuto), columnas["rpm"], columnas["temperatura"], por_minuto)
+        por_minuto = por_minuto.reshape(len(vehiculos), MINUTOS, COLUMNAS)
+        # Horas, día y el combinado de vehículos salen de los minutos
+        niveles = [(TODOS, _reducir(por_minuto, 0))] + list(zip((int(v) for v in vehiculos), por_minuto))
+        for vehiculo, minutos in niveles:
+            horas = _reducir(minutos.reshape(HORAS, 60, COLUMNAS), 1)
+            resumen = self._abrir(particion, vehiculo)
+            _fusionar(resumen[:MINUTOS], minutos)
+            _fusionar(resumen[FILA_HORA:FILA_DIA], horas)
+            _fusionar(resumen[FILA_DIA:], _reducir(horas, 0)[None])
+
+    def _abrir(self, particion, vehiculo):
+        """Memmap de escritura del resumen (se crea vacío si no existe)"""
+        abiertos = self._abiertos.pop(particion, None)
+        if abiertos is None:
+            abiertos = {}
+            while len(self._abiertos) >= PARTICIONES_ABIERTAS:
+                self._cerrar(next(iter(self._abiertos)))
+        self._abiertos[particion] = abiertos  # Al final: la más reciente
+        ruta = self._ruta(particion, vehiculo)
+        if ruta not in abiertos:
+            if os.path.exists(ruta):
+                abiertos[ruta] = np.load(ruta, mmap_mode="r+")
+            else:
+                resumen = np.lib.format.open_memmap(ruta, mode="w+", dtype=np.float64, shape=(FILAS, COLUMNAS))
+                resumen[:] = resumen_vacio(FILAS)
+                abiertos[ruta] = resumen
+        return abiertos[ruta]
+
+    def _cerrar(self, particion):
+        """Escribe y suelta los memmaps de una partición"""
+        for resumen in self._abiertos.pop(particion).values():
+            resumen.flush()
+
+    def cerrar(self):
+        """Escribe y suelta todos los resúmenes abiertos en escritura"""
+        for particion in list(self._abiertos):
+            self._cerrar(particion)
+
+    def reconstruir(self):
+        """Recalcula los resúmenes de todas las particiones desde los datos crudos"""
+        self.cerrar()
+        for particion in self.almacen.particiones():
+            for nombre in os.listdir(particion):
+                if nombre.startswith("resumen_"):
+                    os.remove(os.path.join(particion, nombre))
+            inicio_dia = self.almacen.inicio_particion(particion)
+            for bloque in self.almacen.consultar(inicio_dia, inicio_dia + 86400):
+                self.actualizar(particion, inicio_dia, bloque)
+
+    def estadisticas(self, t_inicio=None, t_fin=None, vehiculo=None):
+        """Estadísticas exactas del rango [t_inicio, t_fin) combinando resúmenes"""
+        id_vehiculo = TODOS if vehiculo is None else vehiculo
+        filas = []
+        for particion in self.almacen.particiones(t_inicio, t_fin):
+            inicio_dia = self.almacen.inicio_particion(particion)
+            a = 0.0 if t_inicio is None else min(max(t_inicio - inicio_dia, 0.0), 86400.0)
+            b = 86400.0 if t_fin is None else min(max(t_fin - inicio_dia, 0.0), 86400.0)
+            if a >= b:
+                continue
+            ruta = self._ruta(particion, id_vehiculo)
+            if not os.path.exists(ruta):
+                if os.path.exists(self._ruta(particion, TODOS)):
+                    continue  # El vehículo no tiene muestras en esta partición
+                filas.append(self._crudo(inicio_dia + a, inicio_dia + b, vehiculo))  # Datos previos al índice
+                continue
+            resumen = np.load(ruta, mmap_mode="r")
+            if a == 0 and b == 86400:
+                filas.append(resumen[FILA_DIA])
+                continue
+            m0, m1 = math.ceil(a / 60), math.floor(b / 60)
+            if m0 >= m1:
+                filas.append(self._crudo(inicio_dia + a, inicio_dia + b, vehiculo))
+                continue
+            # Extremos que no completan un minuto: muestras crudas
+            if a < m0 * 60:
+                filas.append(self._crudo(inicio_dia + a, inicio_dia + m0 * 60, vehiculo))
+            if m1 * 60 < b:
+                filas.append(self._crudo(inicio_dia + m1 * 60, inicio_dia + b, vehiculo))
+            # Horas completas y los minutos sueltos alrededor
+            h0, h1 = math.ceil(m0 / 60), math.floor(m1 / 60)
+            if h0 < h1:
+                filas.extend(resumen[FILA_HORA + h0:FILA_HORA + h1])
+                filas.extend(resumen[m0:h0 * 60])
+                filas.extend(resumen[h1 * 60:m1])
+            else:
+                filas.extend(resumen[m0:m1])
+        return a_estadisticas(combinar(filas))
+
+    def serie(self, t_inicio, t_fin, vehiculo=None, max_puntos=5000):
+        """Promedios por cubeta del nivel más fino que no exceda `max_puntos`.
+
+        Devuelve (inicio de cada cubeta, filas de resumen) solo con cubetas
+        que tienen datos.
+        """
+        id_vehiculo = TODOS if vehiculo is None else vehiculo
+        duracion = t_fin - t_inicio
+        if duracion / 60 <= max_puntos:
+            primera, cuantas, ancho = 0, MINUTOS, 60
+        elif duracion / 3600 <= max_puntos:
+            primera, cuantas, ancho = FILA_HORA, HORAS, 3600
+        else:
+            primera, cuantas, ancho = FILA_DIA, 1, 86400
+        inicios, filas = [], []
+        for particion in self.almacen.particiones(t_inicio, t_fin):
+            ruta = self._ruta(particion, id_vehiculo)
+            if not os.path.exists(ruta):
+                continue
+            inicio_dia = self.almacen.inicio_particion(particion)
+            bloque = np.load(ruta, mmap_mode="r")[primera:primera + cuantas]
+            tiempos = inicio_dia + np.arange(cuantas) * ancho
+            seleccion = (bloque[:, N] > 0) & (tiempos + ancho > t_inicio) & (tiempos < t_fin)
+            inicios.append(tiempos[seleccion])
+            filas.append(np.asarray(bloque[seleccion]))
+        if not filas:
+            return np.empty(0), resumen_vacio(0)
+        return np.concatenate(inicios), np.concatenate(filas)
+
+    def _crudo(self, t_inicio, t_fin, vehiculo):
+        resumen = resumen_vacio()
+        for bloque in self.almacen.consultar(t_inicio, t_fin, vehiculo, ("rpm", "temperatura")):
+            resumir(np.zeros(len(bloque["rpm"]), dtype=np.int64), 1, bloque["rpm"], bloque["temperatura"], resumen)
+        return resumen[0]
@@ -0,0 +1,159 @@
+import itertools
+import math
+import threading
+import time
+from collections import deque
+
+from .alertas import construir_mensaje
+from .instrumentacion import medir
+from .monitoreo import UMBRALES_POR_DEFECTO
+from .reloj import obtener_fecha_hora_mty
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+class SesionMonitoreo:
+    """Monitoreo persistente en un hilo propio; la interfaz solo lee lo nuevo.
+
+    El hilo consume un iterable de resultados (p. ej. `monitorear(...)`) y los
+    registra con un número de secuencia; la vista pide los posteriores a su
+    cursor con `leer` en cada refresco, de modo que pausar, reanudar o cambiar
+    umbrales no reinicia la fuente ni reprocesa datos. `umbrales` es un dict
+    que se modifica en sitio y el ciclo lo lee en cada tick.
+
+    Cada resultado lleva la marca `recibida` (time.time() de la llegada de su
+    muestra más antigua); la vista llama a `registrar_mostrados` después de
+    dibujarlo para medir la latencia de muestra a pantalla. Con
+    `tiempos_de_ingesta` los `tiempos` de cada resultado son las horas de
+    recepción de sus muestras (como en `ticks_ingesta`); si no, la muestra se
+    da por recibida cuando se pide el tick a la fuente.
+    """
+
+    def __init__(self, umbrales=None, despachador=None, intervalo=0.0, capacidad=10_000, tiempos_de_ingesta=False):
+        self.umbrales = dict(UMBRALES_POR_DEFECTO, **(umbrales or {}))
+        self.despachador = despachador
+        self.alertas_activas = despachador is not None
+        self.intervalo = intervalo  # Pausa entre ticks (fuentes sin ritmo propio)
+        self.tiempos_de_ingesta = tiempos_de_ingesta
+        self.error = None
+        self.terminada = False
+        self.alertas = deque(maxlen=20)  # (secuencia, mensaje, encolada)
+        self.latencias = deque(maxlen=1000)
+        self._registro = deque(maxlen=capacidad)
+        self._total = 0
+        self._lock = threading.Lock()
+        self._activa = threading.Event()
+        self._fin = threading.Event()
+        self._al_cerrar = []
+        self._hilo = None
+
+    # ---- Control ----
+    def iniciar(self, resultados, al_cerrar=None):
+        """Arranca el hilo sobre `resultados`.
+
+        `al_cerrar` libera los recursos de la fuente al cerrar la sesión o al
+        agotarse los resultados.
+        """
+        if self._hilo is not None:
+            raise RuntimeError("La sesión ya se inició")
+        if al_cerrar is not None:
+            self._al_cerrar.append(al_cerrar)
+        self._hilo = threading.Thread(target=self._ejecutar, args=(iter(resultados),),
+                                      name="sesion-monitoreo", daemon=True)
+        self._activa.set()
+        self._hilo.start()
+
+    def pausar(self):
+        self._activa.clear()
+
+    def reanudar(self):
+        self._activa.set()
+
+    @property
+    def en_curso(self):
+        return self._activa.is_set() and not self.terminada
+
+    def cerrar(self, timeout=1.0):
+        self._fin.set()
+        self._activa.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+        self._liberar()
+
+    def _liberar(self):
+        with self._lock:
+            funciones, self._al_cerrar = self._al_cerrar, []
+        for funcion in funciones:
+            funcion()
+
+    # ---- Hilo de monitoreo ----
+    def _ejecutar(self, resultados):
+        while not self._fin.is_set():
+            if not self._activa.wait(0.1) or self._fin.is_set():
+                continue
+            pedido = time.time()
+            try:
+                resultado = next(resultados)
+            except StopIteration:
+                break
+            except Exception as e:  # Se informa en la interfaz en lugar de matar el hilo en silencio
+                self.error = e
+                break
+            resultado["recibida"] = float(resultado["tiempos"][0]) if self.tiempos_de_ingesta else pedido
+            with self._lock:
+                self._total += 1
+                self._registro.append((self._total, resultado))
+            if self.intervalo:
+                with medir("sesion.espera"):
+                    self._fin.wait(self.intervalo)
+        self.terminada = True
+        self._liberar()  # Al terminar la fuente ya no hace falta (p. ej. procesos de la flota)
+
+    def notificando(self):
+        """Si las alertas llegan a alguien (se pasa como `notificar` al ciclo de monitoreo)"""
+        return self.alertas_activas and self.despachador is not None
+
+    def enviar_alerta(self, mensaje, irregularidades=None, fallo_probable=None):
+        """Encola una alerta en el despachador (llamado desde el hilo de monitoreo)"""
+        if not self.notificando():
+            return
+        _, fecha_formateada, hora_actual = obtener_fecha_hora_mty()
+        encolada = self.despachador.enviar(
+            construir_mensaje(mensaje, fecha_formateada, hora_actual, irregularidades, fallo_probable))
+        self.alertas.append((self._total + 1, mensaje, encolada))
+
+    # ---- Lectura desde la interfaz ----
+    @property
+    def total(self):
+        return self._total
+
+    def leer(self, cursor=0):
+        """Devuelve (resultados posteriores a `cursor`, nuevo cursor, perdidos)"""
+        with self._lock:
+            total = self._total
+            # Las secuencias son consecutivas: los nuevos son los últimos (total - cursor) del registro,
+            # y se toman desde la derecha para no copiar todo el registro bajo el candado
+            recientes = itertools.islice(reversed(self._registro), max(total - cursor, 0))
+            nuevos = [r for _, r in recientes]
+        nuevos.reverse()
+        perdidos = total - cursor - len(nuevos)
+        return nuevos, total, perdidos
+
+    def registrar_mostrados(self, resultados):
+        """Registra la latencia de los resultados que se acaban de dibujar"""
+        ahora = time.time()
+        self.latencias.extend(ahora - r["recibida"] for r in resultados)
+
+    def metricas(self):
+        latencias = list(self.latencias)
+        return {
+            "total": self._total,
+            "latencia_p50": _percentil(latencias, 50),
+            "latencia_p95": _percentil(latencias, 95),
+            "latencia_max": max(latencias) if latencias else None,
+        }
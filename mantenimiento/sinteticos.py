@@ -0,0 +1,204 @@
+import math
+import time
+
+import numpy as np
+
+from .almacen import ESQUEMA, SEGUNDOS_POR_DIA
+
+# Patrones de fallo que inyecta el generador (los escenarios del simulador);
+# el código de cada uno en la columna `fallo` es su posición
+PATRONES = ("Bujías", "Sobrecarga", "Fallo de refrigeración", "Filtro obstruido",
+            "Problema de encendido", "Inyectores defectuosos")
+SIN_PATRON = -1
+_TRAMO_FASE = 4096  # Muestras por tramo de referencia de las fases
+
+
+class GeneradorFlota:
+    """Telemetría sintética de una flota por bloques, con memoria acotada.
+
+    Cada vehículo tiene su línea base (RPM de crucero, ciclo de manejo,
+    temperatura ambiente con ciclo diario) y sufre episodios de fallo al azar
+    con los patrones de `PATRONES`, que entran en rampa y duran entre
+    `duracion_fallo` segundos. Todos los vehículos se muestrean a
+    `frecuencia` Hz en los mismos instantes y los bloques salen ordenados por
+    tiempo, listos para `AlmacenTelemetria.agregar`.
+
+    Los números al azar de cada vehículo salen de flujos propios derivados de
+    (seed, id del vehículo) y se consumen en orden de tiempo, así que la serie
+    de un vehículo es la misma sin importar el tamaño de los bloques ni qué
+    otros vehículos se generen junto a él (se puede repartir la flota entre
+    procesos por rangos de ids).
+    """
+
+    def __init__(self, vehiculos=10, frecuencia=1.0, inicio=None, seed=42, fallos_por_dia=2.0,
+                 duracion_fallo=(600.0, 7200.0)):
+        self.ids = np.arange(vehiculos) if isinstance(vehiculos, int) else np.asarray(list(vehiculos), dtype=np.int64)
+        self.frecuencia = float(frecuencia)
+        # Por omisión, hoy a las 00:00 UTC (los valores no dependen del inicio)
+        self.inicio = math.floor(time.time() / SEGUNDOS_POR_DIA) * SEGUNDOS_POR_DIA if inicio is None else inicio
+        self.seed = seed
+        self.fallos_por_dia = fallos_por_dia
+        self.duracion_fallo = duracion_fallo
+        self.muestra = 0  # Índice de la próxima muestra (común a todos los vehículos)
+
+        # Flujos por vehículo: parámetros, ruido de RPM, ruido de temperatura y episodios
+        self._rng_rpm, self._rng_temp, self._rng_eventos = [], [], []
+        parametros = []
+        for v in self.ids:
+            parametros_v, rpm_v, temp_v, eventos_v = np.random.SeedSequence(seed, spawn_key=(int(v),)).spawn(4)
+            rng = np.random.default_rng(parametros_v)
+            parametros.append((
+                rng.uniform(2500, 3500),  # RPM de crucero
+                rng.uniform(0.05, 0.15),  # Amplitud del ciclo de manejo (fracción)
+                rng.uniform(300, 1800),  # Período del ciclo de manejo (s)
+                rng.uniform(0, 2 * math.pi),
+                rng.uniform(28, 36),  # Temperatura base (°C)
+                rng.uniform(1, 4),  # Amplitud del ciclo diario (°C)
+                rng.uniform(0, 2 * math.pi),
+            ))
+            self._rng_rpm.append(np.random.default_rng(rpm_v))
+            self._rng_temp.append(np.random.default_rng(temp_v))
+            self._rng_eventos.append(np.random.default_rng(eventos_v))
+        parametros = np.array(parametros).reshape(-1, 7).T
+        self._base, self._amplitud, periodo, self._fase, self._temp_base, self._amplitud_temp, self._fase_temp = parametros
+        self._omega = 2 * math.pi / periodo
+        self._base32 = self._base.astype(np.float32)[:, None]
+        # Episodio vigente o próximo de cada vehículo: (inicio, fin, código, intensidad) en muestras
+        self._eventos = [self._siguiente_evento(v, 0) for v in range(len(self.ids))]
+
+    def _siguiente_evento(self, v, desde):
+        rng = self._rng_eventos[v]
+        espera = rng.exponential(SEGUNDOS_POR_DIA / self.fallos_por_dia) if self.fallos_por_dia else math.inf
+        duracion = rng.uniform(*self.duracion_fallo)
+        codigo = int(rng.integers(len(PATRONES)))
+        intensidad = rng.uniform(0.7, 1.3)
+        if math.isinf(espera):
+            return (math.inf, math.inf, codigo, intensidad)
+        inicio = desde + max(1, round(espera * self.frecuencia))
+        return (inicio, inicio + max(1, round(duracion * self.frecuencia)), codigo, intensidad)
+
+    # ---- Generación ----
+    def generar(self, n):
+        """Las próximas `n` muestras de cada vehículo como columnas (n × vehículos filas)"""
+        n_vehiculos = len(self.ids)
+        k0 = self.muestra
+        self.muestra += n
+        # Las fases se calculan respecto de tramos fijos de muestras (no del bloque) para que
+        # cada muestra dé lo mismo sin importar cómo se corten los bloques
+        k = k0 + np.arange(n)
+        referencia = k - k % _TRAMO_FASE
+        tramo = (referencia - referencia[0]) // _TRAMO_FASE
+        t_tramos = np.arange(referencia[0], referencia[-1] + 1, _TRAMO_FASE) / self.frecuencia
+        paso = ((k - referencia) / self.frecuencia).astype(np.float32)  # Segundos desde el inicio del tramo
+
+        ruido = np.empty((n_vehiculos, n), dtype=np.float32)
+        ruido_temp = np.empty((n_vehiculos, n), dtype=np.float32)
+        for v in range(n_vehiculos):
+            self._rng_rpm[v].standard_normal(out=ruido[v], dtype=np.float32)
+            self._rng_temp[v].random(out=ruido_temp[v], dtype=np.float32)
+        ruido_temp -= np.float32(0.5)  # Uniforme en ±0.5 °C (resolución del sensor)
+
+        # Ciclo de manejo y ciclo diario; la fase de cada tramo en float64 para no perder precisión con días
+        fase = ((self._omega[:, None] * t_tramos + self._fase[:, None]) % (2 * math.pi)).astype(np.float32)
+        rpm = np.sin(fase[:, tramo] + self._omega.astype(np.float32)[:, None] * paso)
+        rpm *= (self._amplitud * self._base).astype(np.float32)[:, None]
+        rpm += self._base32
+        rpm += ruido * (np.float32(0.03) * self._base32)
+        omega_dia = 2 * math.pi / SEGUNDOS_POR_DIA
+        fase_dia = ((omega_dia * t_tramos + self._fase_temp[:, None]) % (2 * math.pi)).astype(np.float32)
+        temperatura = np.sin(fase_dia[:, tramo] + np.float32(omega_dia) * paso)
+        temperatura *= self._amplitud_temp.astype(np.float32)[:, None]
+        temperatura += self._temp_base.astype(np.float32)[:, None]
+        temperatura += ruido_temp
+
+        fallo = np.full((n_vehiculos, n), SIN_PATRON, dtype=np.int8)
+        k1 = k0 + n
+        for v in range(n_vehiculos):
+            while self._eventos[v][0] < k1:
+                inicio, fin, codigo, intensidad = self._eventos[v]
+                if fin > k0:
+                    a, b = max(inicio, k0) - k0, min(fin, k1) - k0
+                    rampa = (np.arange(a + k0 - inicio, b + k0 - inicio, dtype=np.float32)
+                             / np.float32(max(1, (fin - inicio) // 10)))
+                    np.minimum(rampa, 1, out=rampa)
+                    rampa *= np.float32(intensidad)
+                    self._aplicar(codigo, v, rampa, rpm[v, a:b], temperatura[v, a:b], ruido[v, a:b], k[a:b])
+                    fallo[v, a:b] = codigo
+                if fin > k1:
+                    break
+                self._eventos[v] = self._siguiente_evento(v, fin)
+        np.maximum(rpm, 0, out=rpm)
+
+        # Orden por tiempo: en cada instante, todos los vehículos
+        return {
+            "tiempo": np.repeat(self.inicio + k / self.frecuencia, n_vehiculos),
+            "vehiculo": np.tile(self.ids.astype(ESQUEMA["vehiculo"]), n),
+            "rpm": rpm.T.ravel(),
+            "temperatura": temperatura.T.ravel(),
+            "fallo": fallo.T.ravel(),
+        }
+
+    def _aplicar(self, codigo, v, rampa, rpm, temperatura, ruido, k):
+        """Modifica en su lugar el tramo de un vehículo según el patrón de fallo"""
+        base = np.float32(self._base[v])
+        patron = PATRONES[codigo]
+        if patron == "Bujías":
+            # Variación de RPM del 15-25% y algo de calentamiento
+            rpm += ruido * rampa * (np.float32(0.17) * base)
+            temperatura += rampa * np.float32(5)
+        elif patron == "Sobrecarga":
+            # RPM forzadas y temperatura por encima de 50 °C
+            rpm += rampa * (np.float32(0.6) * base)
+            temperatura += rampa * np.float32(22)
+        elif patron == "Fallo de refrigeración":
+            # RPM estables, temperatura elevada persistente
+            temperatura += rampa * np.float32(14)
+        elif patron == "Filtro obstruido":
+            # RPM bajas y temperatura variable
+            rpm -= rampa * (np.float32(0.45) * base)
+            temperatura += ruido * rampa * np.float32(3)
+        elif patron == "Problema de encendido":
+            # Un cilindro falla una vez por ciclo (dos vueltas): caídas bruscas en el 7% de cada
+            # ciclo, periódicas en el ángulo del cigüeñal (órdenes semienteros). Las vueltas salen de
+            # integrar el ciclo de manejo; muestreado a pocos Hz, el ángulo queda al azar y las
+            # caídas son sueltas (~7% de las muestras)
+            t = k / self.frecuencia
+            vueltas = self._base[v] / 60 * (t - self._amplitud[v] / self._omega[v]
+                                            * np.cos(self._omega[v] * t + self._fase[v]))
+            rpm[vueltas / 2 % 1 < 0.07] *= np.float32(0.45)
+            rpm += ruido * rampa * (np.float32(0.08) * base)
+        elif patron == "Inyectores defectuosos":
+            # RPM que fluctúan con un período de pocos segundos
+            oscilacion = np.sin(k / self.frecuencia * (2 * math.pi / 4)).astype(np.float32)
+            rpm += oscilacion * rampa * (np.float32(0.12) * base)
+            rpm += ruido * rampa * (np.float32(0.05) * base)
+
+    def bloques(self, duracion=None, muestras_por_bloque=1 << 20):
+        """Itera bloques de columnas hasta cubrir `duracion` segundos (sin fin si es None).
+
+        Cada bloque tiene unas `muestras_por_bloque` filas en total.
+        """
+        por_vehiculo = max(1, muestras_por_bloque // len(self.ids))
+        fin = math.inf if duracion is None else round(duracion * self.frecuencia)
+        while self.muestra < fin:
+            yield self.generar(int(min(por_vehiculo, fin - self.muestra)))
+
+    def dataframes(self, duracion=None, muestras_por_bloque=1 << 20):
+        """Igual que `bloques` pero cada bloque como DataFrame de pandas"""
+        import pandas as pd
+
+        for bloque in self.bloques(duracion, muestras_por_bloque):
+            yield pd.DataFrame(bloque, copy=False)
+
+    def escribir(self, almacen, duracion, muestras_por_bloque=1 << 20):
+        """Escribe `duracion` segundos en un `AlmacenTelemetria`; devuelve las filas escritas.
+
+        Los vehículos se registran como "Vehículo {id + 1}". La columna de
+        fallos no forma parte del almacén y se descarta.
+        """
+        ids = np.array([almacen.id_vehiculo(f"Vehículo {v + 1}") for v in self.ids], dtype=ESQUEMA["vehiculo"])
+        filas = 0
+        for bloque in self.bloques(duracion, muestras_por_bloque):
+            filas += almacen.agregar(bloque["tiempo"], np.tile(ids, len(bloque["tiempo"]) // len(ids)),
+                                     bloque["rpm"], bloque["temperatura"])
+        return filas
@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Resultado de `actualizar`: 0 = no notificar; n >= 1 = notificar con nivel n
+SIN_NOTIFICACION = 0
+
+
+class EstadoAlerta:
+    """Estado de una clave (vehículo, tipo de alerta)"""
+
+    __slots__ = ("activa", "desde", "notificada", "nivel", "suprimidas")
+
+    def __init__(self, activa=False, desde=None, notificada=None, nivel=0, suprimidas=0):
+        self.activa = bool(activa)
+        self.desde = desde  # Inicio de la activación vigente (o la última)
+        self.notificada = notificada  # Última notificación enviada
+        self.nivel = nivel
+        self.suprimidas = suprimidas
+
+
+class SupresorAlertas:
+    """Máquina de estados de alertas por (vehículo, tipo) con persistencia en SQLite.
+
+    Una alerta se notifica al activarse su condición y no se repite mientras
+    siga activa; se desactiva solo cuando el valor cruza el umbral de despeje
+    (histéresis, lo calcula quien llama). Si la condición vuelve antes de
+    `enfriamiento` segundos desde la última notificación, la reactivación se
+    suprime. Mientras siga activa, cada `escalamiento` segundos sin notificar
+    se escala un nivel (hasta `max_nivel`) y se vuelve a notificar.
+
+    El estado vive en un dict en memoria (costo constante por evaluación sin
+    importar cuántas claves haya) y solo las transiciones se escriben en
+    `ruta`, así que sobrevive a reinicios. Sin `ruta` no se persiste.
+    """
+
+    def __init__(self, ruta=None, enfriamiento=300.0, escalamiento=900.0, max_nivel=3):
+        self.ruta = ruta
+        self.enfriamiento = enfriamiento
+        self.escalamiento = escalamiento
+        self.max_nivel = max_nivel
+        self.contadores = {"notificadas": 0, "escaladas": 0, "suprimidas": 0, "despejadas": 0}
+        self._estados = {}
+        self._lock = threading.Lock()
+        self._conexion = None
+        if ruta is not None:
+            self._conectar()
+            filas = self._conexion.execute(
+                "SELECT vehiculo, tipo, activa, desde, notificada, nivel, suprimidas FROM alertas").fetchall()
+            for vehiculo, tipo, *campos in filas:
+                self._estados[vehiculo, tipo] = EstadoAlerta(*campos)
+
+    def _conectar(self):
+        directorio = os.path.dirname(os.path.abspath(self.ruta))
+        os.makedirs(directorio, exist_ok=True)
+        # Los trabajadores de la flota escriben cada uno sus vehículos en el mismo archivo
+        self._conexion = sqlite3.connect(self.ruta, timeout=5.0, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS alertas (vehiculo TEXT NOT NULL, tipo TEXT NOT NULL, "
+            "activa INTEGER NOT NULL, desde REAL, notificada REAL, nivel INTEGER NOT NULL, "
+            "suprimidas INTEGER NOT NULL, PRIMARY KEY (vehiculo, tipo)) WITHOUT ROWID")
+        self._conexion.commit()
+
+    # ---- Evaluación ----
+    def estado(self, vehiculo, tipo):
+        clave = ("" if vehiculo is None else vehiculo, tipo)
+        estado = self._estados.get(clave)
+        if estado is None:
+            estado = self._estados[clave] = EstadoAlerta()
+        return estado
+
+    def actualizar(self, vehiculo, tipo, excede, despejada, ahora=None, enviar=True):
+        """Avanza la máquina de una clave con la muestra actual.
+
+        `excede` indica que se cruzó el umbral de alerta y `despejada` que el
+        valor ya volvió más allá del umbral de despeje. Devuelve el nivel a
+        notificar o SIN_NOTIFICACION. Con `enviar=False` (nadie recibirá la
+        notificación) solo se registra el despeje: una condición que sigue
+        activa se notifica cuando vuelvan a enviarse alertas.
+        """
+        estado = self.estado(vehiculo, tipo)
+        ahora = time.time() if ahora is None else ahora
+        if estado.activa:
+            if despejada:
+                estado.activa = False
+                self._registrar("despejadas", vehiculo, tipo, estado)
+            elif (enviar and self.escalamiento and estado.nivel < self.max_nivel
+                  and ahora - estado.notificada >= self.escalamiento):
+                estado.nivel += 1
+                estado.notificada = ahora
+                self._registrar("escaladas", vehiculo, tipo, estado)
+                return estado.nivel
+            return SIN_NOTIFICACION
+        if not excede or not enviar:
+            return SIN_NOTIFICACION
+
+        estado.activa = True
+        estado.desde = ahora
+        if estado.notificada is not None and ahora - estado.notificada < self.enfriamiento:
+            # Reaparece dentro del enfriamiento: se conserva el nivel y no se notifica
+            estado.suprimidas += 1
+            self._registrar("suprimidas", vehiculo, tipo, estado)
+            return SIN_NOTIFICACION
+        estado.nivel = 1
+        estado.notificada = ahora
+        self._registrar("notificadas", vehiculo, tipo, estado)
+        return estado.nivel
+
+    # ---- Persistencia ----
+    def _registrar(self, evento, vehiculo, tipo, estado):
+        """Cuenta la transición y la escribe en disco"""
+        with self._lock:
+            self.contadores[evento] += 1
+            if self._conexion is None:
+                return
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO alertas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ("" if vehiculo is None else vehiculo, tipo, int(estado.activa), estado.desde,
+                 estado.notificada, estado.nivel, estado.suprimidas))
+            self._conexion.commit()
+
+    def activas(self):
+        """Claves (vehículo, tipo) con la condición activa"""
+        return [clave for clave, estado in list(self._estados.items()) if estado.activa]
+
+    def metricas(self):
+        resultado = dict(self.contadores)
+        resultado["activas"] = len(self.activas())
+        resultado["claves"] = len(self._estados)
+        return resultado
+
+    def cerrar(self):
+        if self._conexion is not None:
+            with self._lock:
+                self._conexion.close()
+                self._conexion = None